@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.schemas.baseline import BaselineRequest, BaselineResponse
+from app.schemas.baseline import BaselineJob, BaselineRequest, BaselineResponse
 from app.services.baseline_service import BaselineService
+from app.tasks.baseline import baseline_job_status, enqueue_baseline_job, is_known_job
 from app.api.deps import get_current_user
 import uuid
 
@@ -22,6 +24,30 @@ async def calculate_baseline(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/jobs", response_model=BaselineJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_baseline_job(
+    request: BaselineRequest,
+    current_user = Depends(get_current_user)
+):
+    # Runs calculate on a worker; poll GET /jobs/{job_id} for the result.
+    job_id, deduplicated = await enqueue_baseline_job(request)
+    if not deduplicated:
+        return BaselineJob(job_id=job_id, status="queued")
+    # The existing job may already be running or finished.
+    job = await run_in_threadpool(baseline_job_status, job_id, True)
+    job.deduplicated = True
+    return job
+
+@router.get("/jobs/{job_id}", response_model=BaselineJob)
+async def get_baseline_job(
+    job_id: str,
+    current_user = Depends(get_current_user)
+):
+    job = await run_in_threadpool(baseline_job_status, job_id, await is_known_job(job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.get("/{building_id}")
 async def get_building_baselines(
     building_id: uuid.UUID,
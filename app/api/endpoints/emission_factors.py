@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import UUID4
 
 from app.api import deps
-from app.schemas.emission_factor import EmissionFactor, EmissionFactorCreate, EmissionFactorUpdate
+from app.schemas.emission_factor import EmissionFactor, EmissionFactorCreate, EmissionFactorUpdate, EmissionIntensitySeries
 from app.models.user import User
 from app.services import emission_factor_service
 
@@ -31,14 +31,27 @@ async def create_emission_factor(
     """
     Create new emission factor. Admin only? For now allow any auth user.
     """
-    # Check uniqueness
-    existing = await emission_factor_service.get_emission_factor_by_region_year(
-        db, region_id=factor_in.region_id, year=factor_in.year
-    )
-    if existing:
-        raise HTTPException(status_code=400, detail="Emission factor for this region and year already exists")
-    
-    return await emission_factor_service.create_emission_factor(db, factor_in=factor_in)
+    try:
+        return await emission_factor_service.create_emission_factor(db, factor_in=factor_in)
+    except ValueError as e:
+        # Invalid window, or DuplicateEmissionFactorError
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/intensity", summary="Bulk Upload Hourly Intensity", description="Upsert an hourly carbon intensity series for a region. Where present it overrides the emission factors for that hour.")
+async def upload_emission_intensity(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    series: EmissionIntensitySeries,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Upsert hourly intensity points (kg CO2 per kWh).
+    """
+    try:
+        count = await emission_factor_service.upsert_emission_intensity(db, series)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"status": "success", "count": count}
 
 @router.get("/{factor_id}", response_model=EmissionFactor)
 async def read_emission_factor(
@@ -1,25 +1,30 @@
-from typing import List, Any
-import shutil
-import os
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from typing import List, Any, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks, Query, Response
+from fastapi.responses import StreamingResponse
 from app.tasks.ingestion import process_meter_csv
+from app.tasks.rollups import schedule_rollup_refresh
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import UUID4
 
 from app.api import deps
-from app.schemas.meter import MeterReadingCreate, MeterReadingResponse, MeterReading
-from app.services import meter_service
+from app.core.database import AsyncSessionLocal
+from app.schemas.meter import (
+    MeterReadingCreate, MeterReadingColumnarBatch, MeterReadingResponse, MeterReading, MeterReadingSeries,
+    ConflictMode, ExportFormat, SortOrder, SeriesAggregate, SeriesFill, SeriesInterval,
+)
+from app.services import export_service, meter_service, rollup_service, upload_service
 from app.models.user import User
 
 router = APIRouter()
 
-@router.post("/batch", response_model=MeterReadingResponse, summary="Batch Ingest Readings", description="Ingest a list of meter readings (JSON format).")
+@router.post("/batch", response_model=MeterReadingResponse, summary="Batch Ingest Readings", description="Ingest a list of meter readings (JSON format). Re-sent readings for the same building and time are upserted (`on_conflict=update`) or skipped (`on_conflict=ignore`); `count` is the number of rows inserted or changed.")
 async def ingest_meter_readings(
     *,
     db: AsyncSession = Depends(deps.get_db),
     readings: List[MeterReadingCreate],
+    on_conflict: ConflictMode = ConflictMode.UPDATE,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
@@ -29,10 +34,31 @@ async def ingest_meter_readings(
     # For now assume API key/Token access grants ability to push.
     # Ideally checking every building_id in the list matches user access would be costly.
     
-    count = await meter_service.create_meter_readings_batch(db, readings=readings)
+    count = await meter_service.create_meter_readings_batch(
+        db, readings=readings, on_conflict=on_conflict, on_written=schedule_rollup_refresh
+    )
     return {"status": "success", "count": count}
 
-@router.post("/upload-csv", response_model=MeterReadingResponse, summary="Upload CSV", description="Upload a CSV file containing meter readings (`timestamp`, `kwh`). Processing happens in background.")
+@router.post("/batch/columnar", response_model=MeterReadingResponse, summary="Batch Ingest Readings (Columnar)", description="Ingest readings as parallel `timestamps`/`values_kwh` arrays per building. Validated in bulk; much cheaper than the list-of-objects format for large batches.")
+async def ingest_meter_readings_columnar(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    batch: MeterReadingColumnarBatch,
+    on_conflict: ConflictMode = ConflictMode.UPDATE,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Ingest a columnar batch of meter readings.
+    """
+    try:
+        count = await meter_service.create_meter_readings_columnar(
+            db, batch=batch, on_conflict=on_conflict, on_written=schedule_rollup_refresh
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"status": "success", "count": count}
+
+@router.post("/upload-csv", response_model=MeterReadingResponse, summary="Upload CSV", description="Upload a CSV file containing meter readings (`timestamp`, `kwh`), optionally gzip or zstd compressed. Processing happens in background.")
 async def upload_csv(
     *,
     building_id: UUID4,
@@ -42,28 +68,106 @@ async def upload_csv(
     """
     Upload CSV file for background processing.
     """
-    # 1. Save file to disk
-    os.makedirs("/tmp/uploads", exist_ok=True)
-    file_location = f"/tmp/uploads/{uuid.uuid4()}.csv"
-    with open(file_location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
-    
-    # 2. Trigger Celery Task
+    # 1. Stream file into the upload store (chunked, off the event loop)
+    try:
+        upload = await upload_service.save_upload(file, str(building_id))
+    except upload_service.UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if upload.duplicate:
+        return {"status": "duplicate", "count": 0, "upload_id": upload.sha256}
+
+    # 2. Trigger Celery Task once the file is fully written
     # building_id must be passed as string to Celery (JSON serialization)
-    process_meter_csv.delay(file_location, str(building_id))
+    process_meter_csv.delay(upload.key, str(building_id))
     
-    return {"status": "processing_started", "count": 0}
+    return {"status": "processing_started", "count": 0, "upload_id": upload.sha256}
+
+@router.get("/{building_id}/series", response_model=MeterReadingSeries, summary="Get Bucketed Series", description="Readings aggregated into 15m / 1h / 1d / 1mo buckets (UTC) over `[start, end)`, widened to whole buckets. `fill` controls empty buckets: omitted (`none`), `null`, `zero`, last value carried forward (`locf`) or `interpolate`d. Aggregation and gap filling run in the database.")
+async def get_series(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    building_id: UUID4,
+    start: datetime,
+    end: datetime,
+    interval: SeriesInterval = SeriesInterval.HOUR,
+    aggregate: SeriesAggregate = SeriesAggregate.SUM,
+    fill: SeriesFill = SeriesFill.NONE,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get a time-bucketed series of meter readings for a building.
+    """
+    if rollup_service.as_utc(end) <= rollup_service.as_utc(start):
+        raise HTTPException(status_code=400, detail="end must be after start")
+    try:
+        points = await rollup_service.get_series(db, building_id, interval, aggregate, fill, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return MeterReadingSeries(
+        building_id=building_id,
+        interval=interval,
+        aggregate=aggregate,
+        fill=fill,
+        timestamps=[bucket for bucket, _ in points],
+        values=[value for _, value in points],
+    )
+
+@router.get("/{building_id}/export", summary="Export Readings", description="Stream all readings of a building in `[start, end)`, oldest first, as NDJSON, CSV (same columns as the upload format) or an Arrow IPC stream.")
+async def export_readings(
+    *,
+    building_id: UUID4,
+    format: ExportFormat = ExportFormat.NDJSON,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Export meter readings for a building.
+    """
+    try:
+        export_service.check_available(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The body is produced after this handler returns, when the get_db session is already
+    # closed, so the stream owns its session (and its server-side cursor).
+    async def body():
+        async with AsyncSessionLocal() as db:
+            partitions = meter_service.stream_meter_readings(db, str(building_id), start=start, end=end)
+            async for chunk in export_service.encode(format, partitions):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="meter-readings-{building_id}.{format.value}"'},
+    )
 
-@router.get("/{building_id}", response_model=List[MeterReading])
+@router.get("/{building_id}", response_model=List[MeterReading], summary="Get Readings", description="Readings of a building in `[start, end)`, newest first by default. When more readings exist, the `X-Next-Cursor` response header holds the `cursor` for the next page.")
 async def get_readings(
     *,
     db: AsyncSession = Depends(deps.get_db),
+    response: Response,
     building_id: UUID4,
-    limit: int = 1000,
+    limit: int = Query(1000, ge=1, le=10000),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.DESC,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Get latest meter readings for a building.
+    Get meter readings for a building, one page at a time.
     """
-    readings = await meter_service.get_meter_readings(db, building_id=building_id, limit=limit)
+    try:
+        readings, next_cursor = await meter_service.get_meter_readings(
+            db, building_id=building_id, limit=limit, start=start, end=end, cursor=cursor, order=order
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return readings
@@ -1,15 +1,40 @@
-from typing import Any, Dict
+import json
+from typing import Any, Dict, List
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import UUID4
 from datetime import datetime
 
 from app.api import deps
-from app.services import mrv_service
+from app.core.database import AsyncSessionLocal
+from app.schemas.data_quality import DataQualityPeriod
+from app.schemas.mrv import MrvPortfolioRequest
+from app.services import data_quality_service, mrv_service
 from app.models.user import User
 
 router = APIRouter()
 
+@router.post("/portfolio/summary", summary="Portfolio MRV Summary", description="MRV summary for many buildings (default: all of the current user's), streamed as NDJSON, one building per line.")
+async def get_portfolio_summary(
+    *,
+    request: MrvPortfolioRequest,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get MRV summaries (Savings, CO2, Credits) for a portfolio of buildings.
+    """
+    # The body is produced after this handler returns, when the get_db session is already
+    # closed, so the stream owns its session.
+    async def lines():
+        async with AsyncSessionLocal() as db:
+            async for summary in mrv_service.stream_portfolio_savings(
+                db, current_user.id, request.start_date, request.end_date, request.building_ids
+            ):
+                yield json.dumps(summary) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.get("/{building_id}/summary", summary="MRV Summary", description="Calculate savings, CO2 reduction, and estimated credits for a given period.")
 async def get_mrv_summary(
     *,
@@ -25,7 +50,21 @@ async def get_mrv_summary(
     # Validation
     # check permission...
 
-    return await mrv_service.calculate_savings(db, building_id, start_date, end_date)
+    return await mrv_service.calculate_savings_cached(db, building_id, start_date, end_date)
+
+@router.get("/{building_id}/data-quality", response_model=List[DataQualityPeriod], summary="Data Quality", description="Assessed monthly data quality (coverage, interpolation, status) of the months overlapping a period.")
+async def get_data_quality(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    building_id: UUID4,
+    start_date: datetime = Query(...),
+    end_date: datetime = Query(...),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get the data quality periods behind an MRV summary.
+    """
+    return await data_quality_service.get_periods(db, building_id, start_date, end_date)
 
 @router.post("/{building_id}/baseline", summary="Set Baseline (Admin)", description="Manually set the baseline kWh for a specific period (YYYY-MM).")
 async def set_baseline(
@@ -0,0 +1,27 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import UUID4
+
+from app.api import deps
+from app.models.user import User
+from app.schemas.user import User as UserSchema, UserActiveUpdate
+from app.services import user_service
+
+router = APIRouter()
+
+@router.patch("/{user_id}/active", response_model=UserSchema, summary="Activate / Deactivate User (Admin)", description="Activate or deactivate a user. A deactivated user's tokens are rejected from the next request on (after USER_CACHE_TTL_SECONDS in other processes with the memory user cache).")
+async def set_user_active(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: UUID4,
+    update: UserActiveUpdate,
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Activate or deactivate a user (Admin function).
+    """
+    user = await user_service.get_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return await user_service.set_user_active(db, user, update.is_active)
@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional: only needed for the "redis" backend
+    aioredis = None
+
+class MemoryCache:
+    """
+    Per-process LRU cache with a TTL per entry. Values must be JSON-compatible
+    so the same callers work unchanged against RedisCache.
+    """
+    def __init__(self, namespace: str, max_entries: int = 10000):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def _store(self, key: str, value: Any, expires: Optional[float]) -> None:
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._store(key, value, expires)
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        # Set only if absent (like Redis SET NX); True if this call stored the value.
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._store(key, value, expires)
+            return True
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        with self._lock:
+            return [entry[0] if entry else None for entry in map(self._live, keys)]
+
+    async def incr(self, key: str) -> int:
+        # Counters never expire (but are still subject to LRU eviction).
+        with self._lock:
+            entry = self._live(key)
+            value = (entry[0] if entry else 0) + 1
+            self._store(key, value, None)
+            return value
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+class RedisCache:
+    """
+    Shared cache in Redis; entries are visible to (and invalidated for) every process.
+    """
+    def __init__(self, namespace: str, url: str):
+        if aioredis is None:
+            raise RuntimeError("The redis cache backend requires the 'redis' package")
+        self.namespace = namespace
+        self.client = aioredis.from_url(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self.client.set(self._key(key), json.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        stored = await self.client.set(self._key(key), json.dumps(value), px=int(ttl * 1000) if ttl else None, nx=True)
+        return bool(stored)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        if not keys:
+            return []
+        raws = await self.client.mget([self._key(key) for key in keys])
+        return [json.loads(raw) if raw is not None else None for raw in raws]
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(self._key(key))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self._key(key))
+
+def build_cache(namespace: str, backend: str, max_entries: int = 10000):
+    if backend == "memory":
+        return MemoryCache(namespace, max_entries=max_entries)
+    if backend == "redis":
+        return RedisCache(namespace, settings.REDIS_URL or settings.CELERY_BROKER_URL)
+    raise ValueError(f"Unknown cache backend: {backend}")
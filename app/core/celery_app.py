@@ -1,10 +1,13 @@
 from celery import Celery
+from celery.schedules import crontab
 from app.core.config import settings
 
 celery_app = Celery(
     "worker",
     broker=settings.CELERY_BROKER_URL,
-    backend=settings.CELERY_RESULT_BACKEND
+    backend=settings.CELERY_RESULT_BACKEND,
+    # Importing the task modules also registers the worker runtime signals (app.tasks.runtime).
+    include=["app.tasks.ingestion", "app.tasks.rollups", "app.tasks.baseline", "app.tasks.data_quality"],
 )
 
 celery_app.conf.update(
@@ -13,4 +16,16 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    beat_schedule={
+        # Assess the month that just ended once late readings had a few hours to arrive.
+        "assess-previous-month-data-quality": {
+            "task": "assess_data_quality",
+            "schedule": crontab(minute=0, hour=6, day_of_month=1),
+        },
+        # Full rebuild of the maintained baselines' stats, after the month's assessment.
+        "rebuild-baseline-stats": {
+            "task": "rebuild_baseline_stats",
+            "schedule": crontab(minute=0, hour=7, day_of_month=1),
+        },
+    },
 )
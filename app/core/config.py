@@ -9,14 +9,85 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     DATABASE_URL: str
+
+    # Connection pools (per process). API processes and Celery workers are sized separately.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    WORKER_DB_POOL_SIZE: int = 2
+    WORKER_DB_MAX_OVERFLOW: int = 2
     
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+
+    # Shared cache; defaults to the Celery broker's Redis when unset
+    REDIS_URL: Optional[str] = None
     
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # bcrypt runs on a bounded thread pool, off the event loop; operations beyond
+    # MAX_PENDING queued or running are rejected with 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Authenticated-user cache for get_current_user ("memory" per process, or "redis")
+    USER_CACHE_BACKEND: str = "memory"
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # MRV summary cache; use "redis" when ingestion runs in other processes (Celery),
+    # otherwise their invalidations only take effect after the TTL
+    MRV_CACHE_BACKEND: str = "memory"
+    MRV_CACHE_TTL_SECONDS: float = 3600.0
+    MRV_CACHE_MAX_ENTRIES: int = 10000
+
+    # SQL logging / instrumentation (echo is for local debugging only)
+    DB_ECHO: bool = False
+    DB_INSTRUMENTATION: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 500.0
+
+    # Baseline jobs: dedupe locks and job records. Must be "redis": the API takes a lock
+    # and the Celery worker (always another process) releases it
+    BASELINE_JOB_CACHE_BACKEND: str = "redis"
+    BASELINE_JOB_DEDUPE_TTL_SECONDS: float = 900.0
+    BASELINE_JOB_TTL_SECONDS: float = 86400.0
+    # Bulk recalculation: buildings per vectorised batch, and worker processes for the batches
+    # (1 = in process; Celery prefork children are daemonic, so use >1 with --pool threads/solo)
+    BASELINE_RECALC_BATCH_SIZE: int = 5000
+    BASELINE_RECALC_PROCESSES: int = 1
+
+    # In-process emission factor index: reloaded on NOTIFY from the DB (API processes),
+    # and at least this often as a backstop
+    EMISSION_FACTOR_LISTENER: bool = True
+    EMISSION_FACTOR_INDEX_MAX_AGE_SECONDS: float = 300.0
+
+    # Rows per chunk for streaming CSV ingestion (bounds worker memory)
+    CSV_CHUNK_ROWS: int = 50000
+
+    # Rows fetched per server-side cursor round-trip when exporting readings
+    EXPORT_BATCH_ROWS: int = 10000
+
+    # Upper bound on buckets per GET /meters/{building_id}/series request
+    SERIES_MAX_POINTS: int = 10000
+
+    # CSV uploads (limit applies to the decompressed size)
+    # UPLOAD_STORE: "local" (UPLOAD_DIR, must be shared with workers) or "s3" (MinIO / S3)
+    UPLOAD_STORE: str = "local"
+    UPLOAD_DIR: str = "/tmp/uploads"
+    UPLOAD_SPOOL_DIR: str = "/tmp/uploads/.spool"
+    UPLOAD_MAX_BYTES: int = 512 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_BUCKET: str = "carbonexia-uploads"
+    S3_ACCESS_KEY: Optional[str] = None
+    S3_SECRET_KEY: Optional[str] = None
+    S3_REGION: Optional[str] = None
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -1,15 +1,45 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.core.config import settings
+from app.core.instrumentation import InstrumentedAsyncQueuePool, instrument_engine, register_pool_gauges
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+def build_engine(role: str = "api") -> AsyncEngine:
+    """
+    Create an engine for an API process (role="api") or a Celery worker process (role="worker").
+    Each role gets its own pool sizing; pool usage is exported under pool=<role>.
+    """
+    if role == "worker":
+        pool_size, max_overflow = settings.WORKER_DB_POOL_SIZE, settings.WORKER_DB_MAX_OVERFLOW
+    else:
+        pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False
-)
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_logging_name=role,
+    )
+    register_pool_gauges(engine, role)
+    if settings.DB_INSTRUMENTATION:
+        instrument_engine(engine)
+    return engine
+
+def build_session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False
+    )
+
+engine = build_engine()
+
+AsyncSessionLocal = build_session_factory(engine)
 
 class Base(DeclarativeBase):
     pass
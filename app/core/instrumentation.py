@@ -0,0 +1,117 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import settings
+from app.core.metrics import REGISTRY, ROW_BUCKETS
+
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+QUERY_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds", "SQL statement latency.", ("operation", "endpoint")
+)
+QUERY_ROWS = REGISTRY.histogram(
+    "db_query_rows", "Rows affected or returned per SQL statement.", ("operation", "endpoint"), buckets=ROW_BUCKETS
+)
+POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds", "Time to obtain a pooled connection (queueing or connecting).", ("pool",)
+)
+POOL_CHECKOUT_TIMEOUTS = REGISTRY.counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT.", ("pool",)
+)
+POOL_SIZE = REGISTRY.gauge("db_pool_size", "Configured pool size.", ("pool",))
+POOL_CHECKED_OUT = REGISTRY.gauge("db_pool_checked_out", "Connections currently in use.", ("pool",))
+POOL_OVERFLOW = REGISTRY.gauge("db_pool_overflow", "Connections open beyond pool_size.", ("pool",))
+
+# The ASGI scope of the request being served. FastAPI fills in scope["route"] after
+# routing, so the route template (not the raw path with IDs) is read lazily at query time.
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+# Explicit label for non-HTTP callers, e.g. "task:process_meter_csv".
+_endpoint_label: ContextVar[Optional[str]] = ContextVar("endpoint_label", default=None)
+
+def set_endpoint_label(label: Optional[str]) -> None:
+    _endpoint_label.set(label)
+
+def current_endpoint() -> str:
+    scope = _request_scope.get()
+    if scope is not None:
+        route = scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        return f"{scope.get('method', '')} {path}".strip()
+    return _endpoint_label.get() or "-"
+
+class EndpointContextMiddleware:
+    """
+    Pure ASGI middleware that makes the current request visible to the SQL hooks.
+    """
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+def _operation(statement: str) -> str:
+    parts = statement.lstrip().split(None, 1)
+    return parts[0].upper() if parts else "UNKNOWN"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    operation = _operation(statement)
+    endpoint = current_endpoint()
+
+    QUERY_DURATION.observe(elapsed, operation=operation, endpoint=endpoint)
+    rowcount = getattr(cursor, "rowcount", -1)
+    if rowcount is not None and rowcount >= 0:
+        QUERY_ROWS.observe(rowcount, operation=operation, endpoint=endpoint)
+
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        slow_query_logger.warning(
+            "slow query: %.1f ms endpoint=%s rows=%s statement=%s",
+            elapsed_ms, endpoint, rowcount, " ".join(statement.split())[:1000],
+        )
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Record per-statement latency and row counts, labelled by operation and endpoint,
+    and log statements slower than SLOW_QUERY_THRESHOLD_MS.
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waits.
+    The metric label is the pool's logging name (pool_logging_name), which survives pool recreation.
+    """
+    def _do_get(self):
+        label = getattr(self, "logging_name", None) or "default"
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc(pool=label)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, pool=label)
+
+def register_pool_gauges(engine: AsyncEngine, label: str) -> None:
+    # Read at scrape time; engine.pool is looked up each time in case the pool was recreated.
+    POOL_SIZE.set_function(lambda: engine.pool.size(), pool=label)
+    POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout(), pool=label)
+    POOL_OVERFLOW.set_function(lambda: max(engine.pool.overflow(), 0), pool=label)
@@ -1,11 +1,35 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Callable, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import REGISTRY
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop.
+# At most PASSWORD_HASH_MAX_PENDING operations are queued or running; beyond that
+# requests are rejected at once (PasswordHashBusyError, 503) instead of waiting, so
+# a login storm cannot pile up unbounded work.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+PASSWORD_HASH_SECONDS = REGISTRY.histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify latency including queueing.", ("operation",)
+)
+PASSWORD_HASH_IN_FLIGHT = REGISTRY.gauge(
+    "password_hash_in_flight", "bcrypt operations queued or running.", ("operation",)
+)
+PASSWORD_HASH_REJECTED = REGISTRY.counter(
+    "password_hash_rejected_total", "bcrypt operations rejected because the queue was full.", ("operation",)
+)
+
+class PasswordHashBusyError(RuntimeError):
+    pass
+
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -21,3 +45,22 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+async def _run_hashing(operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+    if _hash_slots.locked():
+        PASSWORD_HASH_REJECTED.inc(operation=operation)
+        raise PasswordHashBusyError("Too many password operations in progress, retry shortly")
+    started = time.perf_counter()
+    async with _hash_slots:
+        PASSWORD_HASH_IN_FLIGHT.inc(operation=operation)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+        finally:
+            PASSWORD_HASH_IN_FLIGHT.dec(operation=operation)
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing("verify", verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing("hash", get_password_hash, password)
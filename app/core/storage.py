@@ -0,0 +1,145 @@
+import os
+import shutil
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import BinaryIO
+from app.core.config import settings
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # optional: only needed for UPLOAD_STORE=s3
+    boto3 = None
+
+class UploadStore(ABC):
+    """
+    Where uploaded files wait between the API and the Celery workers.
+    Keys are content-addressed, so writing the same key twice is a no-op.
+    """
+    @abstractmethod
+    def put_file(self, local_path: str, key: str) -> bool:
+        """Move a local file under `key`. Returns False if the key already exists."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open `key` for streaming reads."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove `key`; missing keys are ignored."""
+
+    @abstractmethod
+    def move(self, key: str, new_key: str) -> None:
+        """Rename `key` to `new_key`, replacing whatever is stored there."""
+
+class LocalUploadStore(UploadStore):
+    """
+    Directory on a filesystem shared by the API and the workers (e.g. a Docker volume).
+    """
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def put_file(self, local_path: str, key: str) -> bool:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # link() fails atomically if the target exists, so concurrent identical uploads dedupe safely.
+            os.link(local_path, path)
+        except FileExistsError:
+            return False
+        except OSError:
+            # Different filesystems: fall back to a copy under a temporary name.
+            if os.path.exists(path):
+                return False
+            shutil.copyfile(local_path, f"{path}.part")
+            os.replace(f"{path}.part", path)
+        finally:
+            os.remove(local_path)
+        return True
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def move(self, key: str, new_key: str) -> None:
+        path = self._path(new_key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self._path(key), path)
+
+class S3UploadStore(UploadStore):
+    """
+    S3-compatible object storage (MinIO in docker-compose), so workers need no shared disk.
+    """
+    def __init__(self, bucket: str, endpoint_url: str = None, access_key: str = None, secret_key: str = None, region: str = None):
+        if boto3 is None:
+            raise RuntimeError("UPLOAD_STORE=s3 requires the 'boto3' package")
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region,
+        )
+        self._bucket_checked = False
+
+    def _ensure_bucket(self) -> None:
+        if self._bucket_checked:
+            return
+        try:
+            self.client.head_bucket(Bucket=self.bucket)
+        except ClientError:
+            self.client.create_bucket(Bucket=self.bucket)
+        self._bucket_checked = True
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, local_path: str, key: str) -> bool:
+        try:
+            self._ensure_bucket()
+            if self._exists(key):
+                return False
+            self.client.upload_file(local_path, self.bucket, key)
+            return True
+        finally:
+            os.remove(local_path)
+
+    def open(self, key: str) -> BinaryIO:
+        # StreamingBody: read() pulls from the HTTP response incrementally.
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def move(self, key: str, new_key: str) -> None:
+        self.client.copy_object(Bucket=self.bucket, Key=new_key, CopySource={"Bucket": self.bucket, "Key": key})
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+@lru_cache
+def get_upload_store() -> UploadStore:
+    if settings.UPLOAD_STORE == "local":
+        return LocalUploadStore(settings.UPLOAD_DIR)
+    if settings.UPLOAD_STORE == "s3":
+        return S3UploadStore(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            access_key=settings.S3_ACCESS_KEY,
+            secret_key=settings.S3_SECRET_KEY,
+            region=settings.S3_REGION,
+        )
+    raise ValueError(f"Unknown UPLOAD_STORE: {settings.UPLOAD_STORE}")
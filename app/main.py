@@ -1,6 +1,32 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+import logging
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.instrumentation import EndpointContextMiddleware
+from app.core.metrics import REGISTRY
+from app.core.security import PasswordHashBusyError
 from app.api.api import api_router
+from app.services.emission_factor_index import emission_factor_index, listen_for_changes
+
+logger = logging.getLogger(__name__)
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    listener = asyncio.create_task(listen_for_changes()) if settings.EMISSION_FACTOR_LISTENER else None
+    try:
+        async with AsyncSessionLocal() as db:
+            await emission_factor_index.ensure_loaded(db)
+    except Exception as e:
+        # Not fatal: the index loads lazily on the first MRV request instead.
+        logger.warning("emission factor index preload failed: %s", e)
+    yield
+    if listener:
+        listener.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await listener
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -15,14 +41,26 @@ app = FastAPI(
     * **Emission Factors**: Manage regional carbon intensity.
     """,
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+if settings.DB_INSTRUMENTATION:
+    app.add_middleware(EndpointContextMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.exception_handler(PasswordHashBusyError)
+async def password_hash_busy(request: Request, exc: PasswordHashBusyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Carbonexia API", "status": "running"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
     return {"status": "ok", "db": "unknown", "redis": "unknown"}
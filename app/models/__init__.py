@@ -1,5 +1,7 @@
 from .user import User
 from .building import Building
 from .meter import MeterReading
-from .emission_factor import EmissionFactor
-from .baseline import BaselineHistory
+from .emission_factor import EmissionFactor, EmissionIntensity
+from .baseline import BaselineHistory, BaselineStats
+from .weather import WeatherObservation
+from .data_quality import DataQualityPeriod
@@ -1,12 +1,16 @@
 import uuid
-from sqlalchemy import String, Float, DateTime, ForeignKey, Integer
+from typing import List, Optional
+from sqlalchemy import String, Float, DateTime, ForeignKey, Integer, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class BaselineHistory(Base):
     __tablename__ = "baseline_history"
+    __table_args__ = (
+        Index("ix_baseline_history_building_id_period_created_at", "building_id", "period", text("created_at DESC")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     building_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("buildings.id"))
@@ -20,3 +24,32 @@ class BaselineHistory(Base):
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     building = relationship("Building")
+
+class BaselineStats(Base):
+    # Running statistics behind a building's maintained baseline (see baseline_stats_service):
+    # the 12-month window of monthly kWh / degree days plus sums over it, updated month by
+    # month as rollups change instead of refetching and recomputing the whole window.
+    __tablename__ = "baseline_stats"
+
+    building_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("buildings.id"), primary_key=True)
+    # Method and outlier threshold the maintained baseline is evaluated with (set by the
+    # bulk recalculation, so ingestion refreshes keep its configuration).
+    method: Mapped[str] = mapped_column(String)
+    threshold_pct: Mapped[float] = mapped_column(Float)
+    # First month of the window; element i of the arrays is window_start + i months.
+    window_start: Mapped[DateTime] = mapped_column(DateTime(timezone=True))
+    # NULL elements = no readings (kWh) / no station coverage (degree days) that month.
+    monthly_kwh: Mapped[List[Optional[float]]] = mapped_column(ARRAY(Float))
+    monthly_hdd: Mapped[List[Optional[float]]] = mapped_column(ARRAY(Float))
+    monthly_cdd: Mapped[List[Optional[float]]] = mapped_column(ARRAY(Float))
+
+    # Over months with kWh: count and Σkwh.
+    kwh_count: Mapped[int] = mapped_column(Integer, default=0)
+    kwh_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    # Over months with kWh and degree days, x = (1, hdd, cdd): XᵀX (row-major 3x3) and Xᵀy.
+    regression_xtx: Mapped[List[float]] = mapped_column(ARRAY(Float))
+    regression_xty: Mapped[List[float]] = mapped_column(ARRAY(Float))
+    # Σy² over the same months (for R²).
+    regression_yty: Mapped[float] = mapped_column(Float, default=0.0)
+
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
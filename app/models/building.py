@@ -10,7 +10,7 @@ class Building(Base):
     __tablename__ = "buildings"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), index=True)
     
     name: Mapped[str] = mapped_column(String)
     address: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -18,6 +18,8 @@ class Building(Base):
     area_sqft: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     timezone: Mapped[str] = mapped_column(String, default="UTC")
     utility_provider: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    region_id: Mapped[Optional[str]] = mapped_column(String, nullable=True) # Emission factor region, e.g. "US-CA"
+    weather_station_id: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True) # weather_observations.station_id
     occupancy_profile: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
     
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
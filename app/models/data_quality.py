@@ -0,0 +1,26 @@
+import uuid
+from sqlalchemy import String, Float, DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class DataQualityPeriod(Base):
+    # Monitoring quality of one building-month (see data_quality_service), assessed from
+    # hourly coverage so MRV and baselines can use it without rescanning readings.
+    __tablename__ = "data_quality_periods"
+
+    building_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("buildings.id"), primary_key=True)
+    period_start: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True) # first of the month, UTC
+
+    expected_hours: Mapped[int] = mapped_column(Integer)
+    missing_hours: Mapped[int] = mapped_column(Integer)
+    missing_pct: Mapped[float] = mapped_column(Float)
+    longest_gap_hours: Mapped[int] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String) # OK | INTERPOLATED | FLAGGED | REJECTED
+
+    measured_kwh: Mapped[float] = mapped_column(Float)
+    # kWh estimated for the missing hours by linear interpolation (0 when not interpolated)
+    interpolated_kwh: Mapped[float] = mapped_column(Float, default=0.0)
+
+    assessed_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
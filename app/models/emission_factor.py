@@ -1,5 +1,6 @@
 import uuid
-from sqlalchemy import String, Float, Integer, DateTime
+from typing import Optional
+from sqlalchemy import String, Float, Integer, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.database import Base
@@ -8,8 +9,27 @@ class EmissionFactor(Base):
     __tablename__ = "emission_factors"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    region_id: Mapped[str] = mapped_column(String, index=True) # e.g., "US-CA", "IN-MH"
+    region_id: Mapped[str] = mapped_column(String) # e.g., "US-CA", "IN-MH"
     region_name: Mapped[str] = mapped_column(String)
     factor_kg_per_kwh: Mapped[float] = mapped_column(Float)
     year: Mapped[int] = mapped_column(Integer)
     source: Mapped[str] = mapped_column(String) # e.g., "EPA", "CEA"
+    # Validity window [valid_from, valid_to); annual factors span the calendar year (UTC).
+    valid_from: Mapped[DateTime] = mapped_column(DateTime(timezone=True))
+    valid_to: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), nullable=True) # None = open-ended
+
+    __table_args__ = (
+        # Identity of a factor; create_emission_factor relies on it instead of a read-then-insert.
+        Index("ix_emission_factors_region_id_valid_from", "region_id", "valid_from", unique=True),
+        Index("ix_emission_factors_region_id_year", "region_id", "year"),
+    )
+
+class EmissionIntensity(Base):
+    # Hypertable of hourly carbon intensity per region (time = start of the hour).
+    # Where present it overrides the emission factor windows for that hour.
+    __tablename__ = "emission_intensity"
+
+    region_id: Mapped[str] = mapped_column(String, primary_key=True)
+    time: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    kg_per_kwh: Mapped[float] = mapped_column(Float)
+    source: Mapped[Optional[str]] = mapped_column(String, nullable=True)
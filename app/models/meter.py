@@ -1,6 +1,6 @@
 import uuid
 from typing import Optional, Dict, Any
-from sqlalchemy import String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import String, Float, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.core.database import Base
@@ -17,7 +17,12 @@ class MeterReading(Base):
     # For TimescaleDB, the primary key must usually include the time column and partition key.
     # However, for pure insert speed, sometimes no PK is defined. 
     # Here we define a composite PK for uniqueness if needed, or just standard columns.
-    
+    # The migrated hypertable has no PK; uniqueness is enforced by ix_meter_readings_building_id_time,
+    # which is also the ON CONFLICT target for idempotent ingestion.
+    __table_args__ = (
+        Index("ix_meter_readings_building_id_time", "building_id", "time", unique=True),
+    )
+
     time: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True)
     building_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("buildings.id"), primary_key=True)
     
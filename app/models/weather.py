@@ -0,0 +1,34 @@
+from typing import Optional
+from sqlalchemy import String, Float, DateTime, Table, Column, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+from app.models.rollup import rollup_metadata
+
+class WeatherObservation(Base):
+    # Hypertable of air temperature observations per weather station (e.g. NOAA ISD,
+    # station_id "USAF-WBAN"); buildings reference a station via weather_station_id.
+    __tablename__ = "weather_observations"
+
+    station_id: Mapped[str] = mapped_column(String, primary_key=True)
+    time: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    temperature_c: Mapped[float] = mapped_column(Float)
+    source: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+# Degree days (base 18 °C) per station, continuous aggregates over weather_observations
+# (see migration e5b2c7d9a413). Daily HDD/CDD come from the daily mean temperature;
+# monthly values are the sums of the daily ones.
+def _degree_day_table(name: str) -> Table:
+    return Table(
+        name,
+        rollup_metadata,
+        Column("station_id", String),
+        Column("bucket", DateTime(timezone=True)),
+        Column("avg_temperature_c", Float),
+        Column("hdd", Float),
+        Column("cdd", Float),
+        # Observations (daily) / days with observations (monthly), for coverage checks.
+        Column("observation_count", BigInteger),
+    )
+
+weather_daily = _degree_day_table("weather_daily")
+weather_monthly = _degree_day_table("weather_monthly")
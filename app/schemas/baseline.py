@@ -1,16 +1,34 @@
-from pydantic import BaseModel, UUID4
+from pydantic import BaseModel, Field, UUID4
 from typing import List, Optional
 from datetime import datetime
+from enum import Enum
+
+class BaselineMethod(str, Enum):
+    HISTORICAL_12_MONTHS = "historical_12_months"
+    WEATHER_NORMALIZED = "weather_normalized"
+    OCCUPANCY_NORMALIZED = "occupancy_normalized"
+    REGRESSION = "regression"
+    STATIC = "static"
 
 class BaselineMonthData(BaseModel):
     period: str  # YYYY-MM
     kwh: float
+    # Drivers for the normalized / regression methods
+    hdd: Optional[float] = None
+    cdd: Optional[float] = None
+    occupancy: Optional[float] = None
 
 class BaselineRequest(BaseModel):
     building_id: UUID4
     # Optional: if provided, use this data; else fetch from DB
     months: Optional[List[BaselineMonthData]] = None 
-    method: str = "historical_12_months"
+    method: BaselineMethod = BaselineMethod.HISTORICAL_12_MONTHS
+    # Reference conditions the baseline is normalized to (default: mean over the input months)
+    normal_hdd: Optional[float] = None
+    normal_cdd: Optional[float] = None
+    reference_occupancy: Optional[float] = None
+    # Outlier threshold for this calculation only (default 0.20, +/- 20% of the mean)
+    threshold_pct: Optional[float] = Field(default=None, gt=0)
 
 class BaselineNormalization(BaseModel):
     weather: bool
@@ -19,5 +37,16 @@ class BaselineNormalization(BaseModel):
 class BaselineResponse(BaseModel):
     building_id: UUID4
     baseline_monthly_kwh: float
-    method: str
+    method: BaselineMethod
     normalization: BaselineNormalization
+    # Regression methods only
+    r_squared: Optional[float] = None
+
+class BaselineJob(BaseModel):
+    job_id: str
+    # queued | running | succeeded | failed
+    status: str
+    # True when an identical job was already queued or running and its ID is returned.
+    deduplicated: bool = False
+    result: Optional[BaselineResponse] = None
+    error: Optional[str] = None
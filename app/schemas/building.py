@@ -10,6 +10,8 @@ class BuildingBase(BaseModel):
     area_sqft: Optional[float] = None
     timezone: Optional[str] = "UTC"
     utility_provider: Optional[str] = None
+    region_id: Optional[str] = None
+    weather_station_id: Optional[str] = None
     occupancy_profile: Optional[Dict[str, Any]] = None
 
 # Properties to receive via API on creation
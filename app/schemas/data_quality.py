@@ -0,0 +1,25 @@
+from pydantic import BaseModel, UUID4
+from datetime import datetime
+from enum import Enum
+
+class DataQualityStatus(str, Enum):
+    # Methodology monitoring rules, by share of missing hourly intervals in the month.
+    OK = "OK"                      # nothing missing
+    INTERPOLATED = "INTERPOLATED"  # <= 5%: gaps filled by linear interpolation
+    FLAGGED = "FLAGGED"            # 5-20%: interpolated, flagged for review
+    REJECTED = "REJECTED"          # > 20%: period rejected
+
+class DataQualityPeriod(BaseModel):
+    building_id: UUID4
+    period_start: datetime
+    expected_hours: int
+    missing_hours: int
+    missing_pct: float
+    longest_gap_hours: int
+    status: DataQualityStatus
+    measured_kwh: float
+    interpolated_kwh: float
+    assessed_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, UUID4
-from typing import Optional
+from pydantic import BaseModel, UUID4, model_validator
+from typing import List, Optional
+from datetime import datetime
 
 class EmissionFactorBase(BaseModel):
     region_id: str
@@ -7,6 +8,9 @@ class EmissionFactorBase(BaseModel):
     factor_kg_per_kwh: float
     year: int
     source: str
+    # Defaults to the calendar year (UTC); set both for e.g. a monthly factor.
+    valid_from: Optional[datetime] = None
+    valid_to: Optional[datetime] = None
 
 class EmissionFactorCreate(EmissionFactorBase):
     pass
@@ -17,9 +21,27 @@ class EmissionFactorUpdate(BaseModel):
     factor_kg_per_kwh: Optional[float] = None
     year: Optional[int] = None
     source: Optional[str] = None
+    valid_from: Optional[datetime] = None
+    valid_to: Optional[datetime] = None
 
 class EmissionFactor(EmissionFactorBase):
     id: UUID4
 
     class Config:
         from_attributes = True
+
+class EmissionIntensitySeries(BaseModel):
+    """
+    Hourly carbon intensity of one region as parallel arrays.
+    Timestamps are ISO-8601 strings at the start of each hour.
+    """
+    region_id: str
+    timestamps: List[str]
+    kg_per_kwh: List[float]
+    source: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_lengths(self) -> "EmissionIntensitySeries":
+        if len(self.timestamps) != len(self.kg_per_kwh):
+            raise ValueError("timestamps and kg_per_kwh must have the same length")
+        return self
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, UUID4, validator
+from pydantic import BaseModel, UUID4, validator, model_validator
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
@@ -8,6 +8,42 @@ class DataSource(str, Enum):
     CSV = "CSV"
     MANUAL = "MANUAL"
 
+class ConflictMode(str, Enum):
+    # Re-sent readings overwrite the stored value (last write wins).
+    UPDATE = "update"
+    # Re-sent readings are dropped; the first stored value is kept.
+    IGNORE = "ignore"
+
+class SortOrder(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+    ARROW = "arrow"
+
+class SeriesInterval(str, Enum):
+    MINUTES_15 = "15m"
+    HOUR = "1h"
+    DAY = "1d"
+    MONTH = "1mo"
+
+class SeriesAggregate(str, Enum):
+    SUM = "sum"
+    AVG = "avg"
+    MIN = "min"
+    MAX = "max"
+
+class SeriesFill(str, Enum):
+    # Only buckets that have readings.
+    NONE = "none"
+    # Every bucket; empty ones are null / 0 / last value carried forward / linearly interpolated.
+    NULL = "null"
+    ZERO = "zero"
+    LOCF = "locf"
+    INTERPOLATE = "interpolate"
+
 class MeterReadingBase(BaseModel):
     time: datetime
     building_id: UUID4
@@ -21,6 +57,37 @@ class MeterReadingCreate(MeterReadingBase):
 class MeterReading(MeterReadingBase):
     pass # No ID for time-series usually, or composite
 
+class MeterSeries(BaseModel):
+    """
+    Readings of one building as parallel arrays.
+    Timestamps are ISO-8601 strings; they are parsed in bulk, not per item.
+    """
+    building_id: UUID4
+    timestamps: List[str]
+    values_kwh: List[float]
+
+    @model_validator(mode="after")
+    def check_lengths(self) -> "MeterSeries":
+        if len(self.timestamps) != len(self.values_kwh):
+            raise ValueError("timestamps and values_kwh must have the same length")
+        return self
+
+class MeterReadingColumnarBatch(BaseModel):
+    source: DataSource = DataSource.API
+    series: List[MeterSeries]
+
+class MeterReadingSeries(BaseModel):
+    """
+    Time-bucketed readings of one building as parallel arrays (bucket start, aggregate).
+    """
+    building_id: UUID4
+    interval: SeriesInterval
+    aggregate: SeriesAggregate
+    fill: SeriesFill
+    timestamps: List[datetime]
+    values: List[Optional[float]]
+
 class MeterReadingResponse(BaseModel):
     status: str
     count: int
+    upload_id: Optional[str] = None
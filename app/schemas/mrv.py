@@ -0,0 +1,15 @@
+from pydantic import BaseModel, UUID4, Field, model_validator
+from typing import List, Optional
+from datetime import datetime
+
+class MrvPortfolioRequest(BaseModel):
+    start_date: datetime
+    end_date: datetime
+    # None: every building of the current user.
+    building_ids: Optional[List[UUID4]] = Field(default=None, max_length=10000)
+
+    @model_validator(mode="after")
+    def check_period(self):
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
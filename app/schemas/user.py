@@ -52,6 +52,9 @@ class User(UserBase):
     class Config:
         from_attributes = True
  
+class UserActiveUpdate(BaseModel):
+    is_active: bool
+ 
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -0,0 +1,302 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from functools import partial
+from typing import Dict, List, Optional
+import numpy as np
+
+from app.schemas.baseline import BaselineMethod
+
+# Baseline methods of the carbon methodology, computed for many buildings at once.
+#
+# Inputs are (buildings, periods) arrays, one row per building and one column per rollup
+# period (months, or days for daily rollups); NaN marks a missing period. Every step is a
+# masked array operation over the whole batch, and the regressions are solved as one
+# stack of normal equations, so cost grows with array size rather than with Python loops.
+
+# Periods deviating more than this from the building's mean are dropped as outliers.
+OUTLIER_THRESHOLD_PCT = 0.20
+
+# Methods that regress on heating / cooling degree days.
+WEATHER_METHODS = (BaselineMethod.WEATHER_NORMALIZED, BaselineMethod.REGRESSION)
+# Methods that need occupancy, which is not kept in the maintained stats.
+OCCUPANCY_METHODS = (BaselineMethod.OCCUPANCY_NORMALIZED, BaselineMethod.REGRESSION)
+
+@dataclass
+class BaselineBatch:
+    # Per building: mean of all valid periods, and the baseline after cleaning/normalization.
+    raw_kwh: np.ndarray
+    adjusted_kwh: np.ndarray
+    # adjusted / mean of the cleaned periods before normalization (1.0 where not applied).
+    weather_factor: np.ndarray
+    occupancy_factor: np.ndarray
+    # Whether the normalization could be applied (enough periods with drivers).
+    weather_applied: np.ndarray
+    occupancy_applied: np.ndarray
+    # Periods used after outlier removal.
+    periods_used: np.ndarray
+    # Regression methods only: (intercept, per-driver slopes...) and R² per building.
+    coefficients: Optional[np.ndarray] = None
+    r_squared: Optional[np.ndarray] = None
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    count = mask.sum(axis=1)
+    total = np.where(mask, values, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+def outlier_mask(kwh: np.ndarray, threshold_pct: float = OUTLIER_THRESHOLD_PCT) -> np.ndarray:
+    """
+    Valid periods within ±threshold_pct of the building's mean. Rows where this would
+    drop every period keep all their valid periods instead.
+    """
+    valid = np.isfinite(kwh)
+    mean = _masked_mean(kwh, valid)[:, None]
+    with np.errstate(invalid="ignore"):
+        kept = valid & (kwh >= mean * (1 - threshold_pct)) & (kwh <= mean * (1 + threshold_pct))
+    empty = ~kept.any(axis=1)
+    kept[empty] = valid[empty]
+    return kept
+
+def regression_accumulators(y: np.ndarray, drivers: np.ndarray, mask: np.ndarray):
+    """
+    Sufficient statistics of y ~ 1 + drivers per row: (XᵀX (B, K+1, K+1), Xᵀy (B, K+1),
+    yᵀy (B,)) over the masked periods that have y and every driver. y and mask are (B, P),
+    drivers is (B, P, K). Sums over disjoint period sets add up, so they can be updated one
+    period at a time (see baseline_stats_service).
+    """
+    rows, periods, k = drivers.shape
+    mask = mask & np.isfinite(y) & np.isfinite(drivers).all(axis=2)
+    weights = mask.astype(np.float64)
+    design = np.concatenate([np.ones((rows, periods, 1)), np.nan_to_num(drivers)], axis=2)
+    target = np.nan_to_num(y)
+    xtx = np.einsum("bpi,bp,bpj->bij", design, weights, design)
+    xty = np.einsum("bpi,bp,bp->bi", design, weights, target)
+    yty = (weights * target ** 2).sum(axis=1)
+    return xtx, xty, yty
+
+def solve_regression(xtx: np.ndarray, xty: np.ndarray, yty: np.ndarray):
+    """
+    Least squares from accumulated sums, for every row at once: solves the normal
+    equations XᵀX β = Xᵀy. Returns (coefficients (B, K+1), R² (B,), fitted (B,) bool).
+    Rows with fewer than K+2 periods (XᵀX[0, 0] is the count), or singular designs, are
+    not fitted (coefficients NaN).
+    """
+    rows, params = xty.shape
+    count = xtx[:, 0, 0]
+    fitted = (count >= params + 1) & (np.linalg.matrix_rank(xtx) == params)
+
+    coefficients = np.full((rows, params), np.nan)
+    if fitted.any():
+        coefficients[fitted] = np.linalg.solve(xtx[fitted], xty[fitted][..., None])[..., 0]
+
+    beta = np.nan_to_num(coefficients)
+    ss_res = yty - 2 * np.einsum("bi,bi->b", beta, xty) + np.einsum("bi,bij,bj->b", beta, xtx, beta)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ss_tot = yty - xty[:, 0] ** 2 / count
+        r_squared = np.where(fitted & (ss_tot > 0), 1.0 - ss_res / ss_tot, np.nan)
+    return coefficients, r_squared, fitted
+
+def fit_regression(y: np.ndarray, drivers: np.ndarray, mask: np.ndarray):
+    """
+    Least squares y ~ 1 + drivers over the masked periods, for every row at once.
+    Returns (coefficients (B, K+1), R² (B,), fitted (B,) bool), as solve_regression.
+    """
+    return solve_regression(*regression_accumulators(y, drivers, mask))
+
+def _reference(values: Optional[np.ndarray], drivers: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    # Per-building reference conditions; defaults to the mean over the periods used.
+    default = _masked_mean(drivers, mask & np.isfinite(drivers))
+    if values is None:
+        return default
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isfinite(values), values, default)
+
+def _regression_baseline(coefficients: np.ndarray, fitted: np.ndarray, reference: List[np.ndarray], cleaned: np.ndarray):
+    # (baseline, factor vs the cleaned mean): the fit evaluated at the reference conditions.
+    predicted = coefficients[:, 0] + sum(
+        coefficients[:, i + 1] * np.nan_to_num(ref) for i, ref in enumerate(reference)
+    )
+    adjusted = np.where(fitted, predicted, cleaned)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        factor = np.where(fitted & (cleaned != 0), adjusted / cleaned, 1.0)
+    return adjusted, factor
+
+def compute_baselines(
+    method: BaselineMethod,
+    kwh: np.ndarray,
+    hdd: Optional[np.ndarray] = None,
+    cdd: Optional[np.ndarray] = None,
+    occupancy: Optional[np.ndarray] = None,
+    normal_hdd: Optional[np.ndarray] = None,
+    normal_cdd: Optional[np.ndarray] = None,
+    reference_occupancy: Optional[np.ndarray] = None,
+    threshold_pct: float = OUTLIER_THRESHOLD_PCT,
+) -> BaselineBatch:
+    """
+    Baselines (kWh per period) for a batch of buildings.
+
+    - historical_12_months: mean of the periods left after outlier removal.
+    - static: mean of all valid periods, no cleaning or adjustment (a fixed reference).
+    - weather_normalized: kwh ~ 1 + HDD + CDD per building, evaluated at normal_hdd /
+      normal_cdd (default: the building's mean degree days over the periods used).
+    - occupancy_normalized: mean kWh per occupancy unit × reference_occupancy (default:
+      mean occupancy over the periods used).
+    - regression: kwh ~ 1 + HDD + CDD + occupancy, evaluated at the reference conditions.
+
+    Buildings without enough driver data for their method fall back to the cleaned mean
+    with factor 1.0 and *_applied False. Rows without any valid period are NaN.
+    """
+    kwh = np.asarray(kwh, dtype=np.float64)
+    shape = kwh.shape
+
+    def driver(values: Optional[np.ndarray]) -> np.ndarray:
+        return np.full(shape, np.nan) if values is None else np.asarray(values, dtype=np.float64)
+
+    hdd, cdd, occupancy = driver(hdd), driver(cdd), driver(occupancy)
+    valid = np.isfinite(kwh)
+    raw = _masked_mean(kwh, valid)
+
+    used = valid if method == BaselineMethod.STATIC else outlier_mask(kwh, threshold_pct)
+    cleaned = _masked_mean(kwh, used)
+    adjusted = cleaned.copy()
+    weather_factor = np.ones(shape[0])
+    occupancy_factor = np.ones(shape[0])
+    weather_applied = np.zeros(shape[0], dtype=bool)
+    occupancy_applied = np.zeros(shape[0], dtype=bool)
+    coefficients = r_squared = None
+
+    if method in WEATHER_METHODS:
+        with_occupancy = method == BaselineMethod.REGRESSION
+        drivers = [hdd, cdd] + ([occupancy] if with_occupancy else [])
+        coefficients, r_squared, fitted = fit_regression(kwh, np.stack(drivers, axis=2), used)
+        reference = [
+            _reference(normal_hdd, hdd, used),
+            _reference(normal_cdd, cdd, used),
+        ] + ([_reference(reference_occupancy, occupancy, used)] if with_occupancy else [])
+        adjusted, weather_factor = _regression_baseline(coefficients, fitted, reference, cleaned)
+        weather_applied = fitted
+        occupancy_applied = fitted & with_occupancy
+
+    elif method == BaselineMethod.OCCUPANCY_NORMALIZED:
+        usable = used & np.isfinite(occupancy) & (occupancy > 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            intensity = _masked_mean(kwh / np.where(usable, occupancy, 1.0), usable)
+        reference = _reference(reference_occupancy, occupancy, usable)
+        applied = usable.any(axis=1) & np.isfinite(reference)
+        adjusted = np.where(applied, intensity * np.nan_to_num(reference), cleaned)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            occupancy_factor = np.where(applied & (cleaned != 0), adjusted / cleaned, 1.0)
+        occupancy_applied = applied
+
+    return BaselineBatch(
+        raw_kwh=raw,
+        adjusted_kwh=adjusted,
+        weather_factor=weather_factor,
+        occupancy_factor=occupancy_factor,
+        weather_applied=weather_applied,
+        occupancy_applied=occupancy_applied,
+        periods_used=used.sum(axis=1),
+        coefficients=coefficients,
+        r_squared=r_squared,
+    )
+
+def compute_baselines_from_stats(
+    method: BaselineMethod,
+    kwh: np.ndarray,
+    hdd: np.ndarray,
+    cdd: np.ndarray,
+    count: np.ndarray,
+    total: np.ndarray,
+    xtx: np.ndarray,
+    xty: np.ndarray,
+    yty: np.ndarray,
+    normal_hdd: Optional[np.ndarray] = None,
+    normal_cdd: Optional[np.ndarray] = None,
+    threshold_pct: float = OUTLIER_THRESHOLD_PCT,
+) -> BaselineBatch:
+    """
+    compute_baselines from maintained sums instead of a pass over every period: the mean
+    is total / count, outliers are subtracted from the sums rather than the window being
+    re-summed, and the HDD/CDD regression is solved from the accumulated XᵀX, Xᵀy, yᵀy
+    (regression_accumulators over the window). kwh / hdd / cdd are the window's period
+    values, only read to find the outliers and reference conditions. Methods that need
+    occupancy (not kept in the sums) are computed with compute_baselines.
+    """
+    if method in OCCUPANCY_METHODS:
+        return compute_baselines(method, kwh, hdd, cdd, normal_hdd=normal_hdd, normal_cdd=normal_cdd, threshold_pct=threshold_pct)
+
+    kwh = np.asarray(kwh, dtype=np.float64)
+    rows = kwh.shape[0]
+    valid = np.isfinite(kwh)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        raw = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+    used = valid if method == BaselineMethod.STATIC else outlier_mask(kwh, threshold_pct)
+    dropped = valid & ~used
+    remaining = count - dropped.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cleaned = np.where(
+            remaining > 0, (total - np.where(dropped, kwh, 0.0).sum(axis=1)) / np.maximum(remaining, 1), np.nan
+        )
+    adjusted = cleaned.copy()
+    weather_factor = np.ones(rows)
+    weather_applied = np.zeros(rows, dtype=bool)
+    coefficients = r_squared = None
+
+    if method == BaselineMethod.WEATHER_NORMALIZED:
+        drivers = np.stack([hdd, cdd], axis=2)
+        dropped_xtx, dropped_xty, dropped_yty = regression_accumulators(kwh, drivers, dropped)
+        coefficients, r_squared, fitted = solve_regression(xtx - dropped_xtx, xty - dropped_xty, yty - dropped_yty)
+        reference = [_reference(normal_hdd, hdd, used), _reference(normal_cdd, cdd, used)]
+        adjusted, weather_factor = _regression_baseline(coefficients, fitted, reference, cleaned)
+        weather_applied = fitted
+
+    return BaselineBatch(
+        raw_kwh=raw,
+        adjusted_kwh=adjusted,
+        weather_factor=weather_factor,
+        occupancy_factor=np.ones(rows),
+        weather_applied=weather_applied,
+        occupancy_applied=np.zeros(rows, dtype=bool),
+        periods_used=used.sum(axis=1),
+        coefficients=coefficients,
+        r_squared=r_squared,
+    )
+
+def _concat(batches: List[BaselineBatch]) -> BaselineBatch:
+    def join(name: str):
+        parts = [getattr(batch, name) for batch in batches]
+        return None if any(part is None for part in parts) else np.concatenate(parts)
+    return BaselineBatch(**{field.name: join(field.name) for field in fields(BaselineBatch)})
+
+def _compute_chunk(method: BaselineMethod, threshold_pct: float, arrays: Dict[str, np.ndarray]) -> BaselineBatch:
+    return compute_baselines(method, threshold_pct=threshold_pct, **arrays)
+
+def compute_baselines_chunked(
+    method: BaselineMethod,
+    kwh: np.ndarray,
+    batch_size: int,
+    processes: int = 1,
+    threshold_pct: float = OUTLIER_THRESHOLD_PCT,
+    **drivers: Optional[np.ndarray],
+) -> BaselineBatch:
+    """
+    compute_baselines over row chunks of `batch_size` buildings, spread across a pool of
+    `processes` worker processes when processes > 1 (in this process otherwise). Keyword
+    drivers (hdd, cdd, occupancy, normal_hdd, ...) are sliced along with kwh.
+    """
+    kwh = np.asarray(kwh, dtype=np.float64)
+    if not len(kwh):
+        return compute_baselines(method, kwh, threshold_pct=threshold_pct, **drivers)
+    chunks = [
+        {"kwh": kwh[lo:lo + batch_size], **{
+            name: None if values is None else np.asarray(values)[lo:lo + batch_size]
+            for name, values in drivers.items()
+        }}
+        for lo in range(0, len(kwh), batch_size)
+    ]
+    compute = partial(_compute_chunk, method, threshold_pct)
+    if processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(chunks))) as pool:
+            return _concat(list(pool.map(compute, chunks)))
+    return _concat([compute(chunk) for chunk in chunks])
@@ -1,117 +1,188 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc, func
+from sqlalchemy import select
+from app.core.config import settings
 from app.models.baseline import BaselineHistory
-from app.models.meter import MeterReading
-from app.schemas.baseline import BaselineRequest, BaselineResponse, BaselineNormalization, BaselineMonthData
+from app.schemas.baseline import BaselineMethod, BaselineRequest, BaselineResponse, BaselineNormalization, BaselineMonthData
+from app.services import baseline_engine, baseline_stats_service, data_quality_service, rollup_service, weather_service
 import uuid
+import time
 from datetime import datetime
-import statistics
+import numpy as np
 
 class BaselineService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def calculate_baseline(self, request: BaselineRequest) -> BaselineResponse:
-        months_data = []
-
-        if request.months:
-            months_data = request.months
-        else:
-            # Fetch last 12 months from DB
-            result = await self.db.execute(
-                select(MeterReading)
-                .where(MeterReading.building_id == request.building_id)
-                .order_by(desc(MeterReading.time))
-                .limit(12)
+        # The requested method / threshold apply to this calculation only; the maintained
+        # baselines keep theirs (see recalculate_baselines).
+        threshold_pct = baseline_engine.OUTLIER_THRESHOLD_PCT if request.threshold_pct is None else request.threshold_pct
+        if request.method in baseline_engine.OCCUPANCY_METHODS and not any(
+            m.occupancy is not None for m in request.months or []
+        ):
+            raise ValueError(f"The {request.method.value} method needs monthly occupancy in the request months")
+
+        # Normal weather of the building's station, unless the request sets it.
+        normal_hdd = normal_cdd = np.full(1, np.nan)
+        if request.method in baseline_engine.WEATHER_METHODS:
+            normal_hdd, normal_cdd = await weather_service.normal_degree_days(self.db, [request.building_id])
+        if request.normal_hdd is not None:
+            normal_hdd = np.array([request.normal_hdd], dtype=np.float64)
+        if request.normal_cdd is not None:
+            normal_cdd = np.array([request.normal_cdd], dtype=np.float64)
+
+        batch = None
+        if not request.months:
+            # Maintained baseline: evaluated from the running stats of the last 12 months
+            # (kept up to date on ingestion) instead of refetching them.
+            stats = await baseline_stats_service.ensure_current(self.db, request.building_id)
+            if stats.kwh_count:
+                (_, batch, index), = baseline_stats_service.evaluate(
+                    [stats], normal_hdd, normal_cdd, request.method, threshold_pct
+                )
+
+        if batch is None:
+            months_data = request.months or await self._fetch_months(request)
+            if not months_data:
+                raise ValueError("No data available for baseline calculation")
+
+            def column(field: str) -> np.ndarray:
+                return np.array([[getattr(m, field) if getattr(m, field) is not None else np.nan for m in months_data]], dtype=np.float64)
+
+            # Outlier removal (+/- 20% of the mean) and normalization, as a batch of one building.
+            batch = baseline_engine.compute_baselines(
+                request.method,
+                column("kwh"),
+                hdd=column("hdd"),
+                cdd=column("cdd"),
+                occupancy=column("occupancy"),
+                normal_hdd=normal_hdd,
+                normal_cdd=normal_cdd,
+                reference_occupancy=None if request.reference_occupancy is None else np.array([request.reference_occupancy]),
+                threshold_pct=threshold_pct,
             )
-            readings = result.scalars().all()
-            if not readings:
-                raise ValueError("No meter readings found for this building")
-            
-            for reading in readings:
-                months_data.append(BaselineMonthData(
-                    period=reading.time.strftime("%Y-%m"),
-                    kwh=reading.value_kwh
-                ))
-
-        if not months_data:
-            raise ValueError("No data available for baseline calculation")
-
-        # Step 1: Remove Outliers (+/- 20% deviation)
-        cleaned_data = self._remove_outliers(months_data, threshold_pct=0.20)
-        
-        # Step 2: Weather Normalization (Placeholder)
-        # In a real implementation, this would fetch HDD/CDD data and adjust.
-        # For now, we assume data is already normalized or weather factor is 1.0.
-        norm_weather_data = self._normalize_weather(cleaned_data)
-        
-        # Step 3: Occupancy Normalization (Placeholder)
-        norm_occupancy_data = self._normalize_occupancy(norm_weather_data)
-
-        if not norm_occupancy_data:
-             # Fallback if aggressive filtering removed everything, though unlikely with just 20% rule on valid data.
-             # We might revert to raw average or throw warning.
-             # For MVP, let's use the raw mean if cleaning leaves nothing.
-             norm_occupancy_data = months_data
-
-        # Calculate Raw Average (for record keeping)
-        raw_total_kwh = sum(m.kwh for m in months_data)
-        raw_avg_kwh = raw_total_kwh / len(months_data)
-
-        # Step 4: Baseline Average
-        total_kwh = sum(m.kwh for m in norm_occupancy_data)
-        avg_kwh = total_kwh / len(norm_occupancy_data)
+            index = 0
+
+        values = baseline_stats_service.batch_values(batch, index)
+        if not np.isfinite(values["adjusted_kwh"]):
+            raise ValueError("No valid monthly consumption for baseline calculation")
+        # Normalization the method could not apply is an error rather than a plain mean.
+        missing = [
+            driver
+            for driver, needed, applied in (
+                ("degree days", request.method in baseline_engine.WEATHER_METHODS, batch.weather_applied[index]),
+                ("occupancy", request.method in baseline_engine.OCCUPANCY_METHODS, batch.occupancy_applied[index]),
+            )
+            if needed and not applied
+        ]
+        if missing:
+            raise ValueError(f"Not enough months with {' and '.join(missing)} for the {request.method.value} method")
 
         # Store in History
         # We store the result for the CURRENT period (e.g. today's month) to indicate this is the active baseline.
+        # Unchanged baselines are not recorded again.
         current_period = datetime.now().strftime("%Y-%m")
-        
-        baseline_record = BaselineHistory(
-            building_id=request.building_id,
-            period=current_period,
-            raw_kwh=raw_avg_kwh,
-            adjusted_kwh=avg_kwh,
-            weather_factor=1.0,
-            occupancy_factor=1.0
-        )
-        self.db.add(baseline_record)
-        await self.db.commit()
-        await self.db.refresh(baseline_record)
+        await baseline_stats_service.record_baselines(self.db, {request.building_id: values}, current_period)
 
+        r_squared = batch.r_squared[index] if batch.r_squared is not None else np.nan
         response = BaselineResponse(
             building_id=request.building_id,
-            baseline_monthly_kwh=round(avg_kwh, 2),
+            baseline_monthly_kwh=round(values["adjusted_kwh"], 2),
             method=request.method,
-            normalization=BaselineNormalization(weather=True, occupancy=True)
+            normalization=BaselineNormalization(
+                weather=bool(batch.weather_applied[index]),
+                occupancy=bool(batch.occupancy_applied[index])
+            ),
+            r_squared=round(float(r_squared), 4) if np.isfinite(r_squared) else None
         )
         return response
 
-    def _remove_outliers(self, data: List[BaselineMonthData], threshold_pct: float) -> List[BaselineMonthData]:
-        if not data:
-            return []
-        
-        values = [d.kwh for d in data]
-        mean_val = statistics.mean(values)
-        
-        # Determine bounds
-        lower_bound = mean_val * (1 - threshold_pct)
-        upper_bound = mean_val * (1 + threshold_pct)
-        
-        cleaned = []
-        for d in data:
-            if lower_bound <= d.kwh <= upper_bound:
-                cleaned.append(d)
-        
-        return cleaned
-
-    def _normalize_weather(self, data: List[BaselineMonthData]) -> List[BaselineMonthData]:
-        # Placeholder: Return as-is
-        return data
-
-    def _normalize_occupancy(self, data: List[BaselineMonthData]) -> List[BaselineMonthData]:
-        # Placeholder: Return as-is
-        return data
+    async def _fetch_months(self, request: BaselineRequest) -> List[BaselineMonthData]:
+        # Latest 12 months with readings, for buildings with none in the maintained window.
+        months = await rollup_service.get_monthly_consumption(self.db, request.building_id, months=12)
+        buckets = [bucket for bucket, _ in months]
+        # Rejected months (data quality) are left out; gaps of the others are interpolated.
+        kwh = await data_quality_service.apply_to_monthly(
+            self.db, [request.building_id], buckets, np.array([[value for _, value in months]], dtype=np.float64)
+        )
+        if not np.isfinite(kwh).any():
+            raise ValueError("Every month with meter readings was rejected by the data quality checks")
+
+        hdd = cdd = np.full((1, len(months)), np.nan)
+        if request.method in baseline_engine.WEATHER_METHODS:
+            hdd, cdd = await weather_service.monthly_degree_days(self.db, [request.building_id], buckets)
+        return [
+            BaselineMonthData(
+                period=bucket.strftime("%Y-%m"),
+                kwh=float(kwh[0, i]),
+                hdd=float(hdd[0, i]) if np.isfinite(hdd[0, i]) else None,
+                cdd=float(cdd[0, i]) if np.isfinite(cdd[0, i]) else None
+            )
+            for i, bucket in enumerate(buckets)
+            if np.isfinite(kwh[0, i])
+        ]
+
+    async def recalculate_baselines(
+        self,
+        method: BaselineMethod = BaselineMethod.HISTORICAL_12_MONTHS,
+        threshold_pct: float = baseline_engine.OUTLIER_THRESHOLD_PCT,
+        processes: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recompute the baseline of every building with readings (e.g. after a methodology or
+        threshold change): one rollup query for the last 12 complete months of all buildings,
+        vectorised batches in a process pool, and one bulk insert into baseline_history
+        (skipping buildings whose baseline did not change). The maintained baselines switch
+        to the same method and threshold, so ingestion refreshes do not revert them.
+        Returns counts and timings, including throughput in buildings/sec.
+        """
+        started = time.perf_counter()
+        building_ids, buckets, kwh = await rollup_service.monthly_consumption_matrix(self.db, months=12)
+        kwh = await data_quality_service.apply_to_monthly(self.db, building_ids, buckets, kwh)
+        drivers = {}
+        if method in baseline_engine.WEATHER_METHODS:
+            drivers["hdd"], drivers["cdd"] = await weather_service.monthly_degree_days(self.db, building_ids, buckets)
+            drivers["normal_hdd"], drivers["normal_cdd"] = await weather_service.normal_degree_days(self.db, building_ids)
+        loaded = time.perf_counter()
+
+        batch = await run_in_threadpool(
+            baseline_engine.compute_baselines_chunked,
+            method,
+            kwh,
+            batch_size or settings.BASELINE_RECALC_BATCH_SIZE,
+            processes or settings.BASELINE_RECALC_PROCESSES,
+            threshold_pct,
+            **drivers,
+        )
+        computed = time.perf_counter()
+
+        # One query for the latest rows and one bulk insert of the baselines that changed.
+        baselines = {
+            building_id: baseline_stats_service.batch_values(batch, i)
+            for i, building_id in enumerate(building_ids)
+            if np.isfinite(batch.adjusted_kwh[i])
+        }
+        written = await baseline_stats_service.record_baselines(
+            self.db, baselines, datetime.now().strftime("%Y-%m")
+        )
+        maintained = await baseline_stats_service.set_maintained_method(self.db, method, threshold_pct)
+        finished = time.perf_counter()
+
+        elapsed = finished - started
+        return {
+            "method": method.value,
+            "buildings": len(building_ids),
+            "baselines_written": written,
+            "maintained_updated": maintained,
+            "query_seconds": round(loaded - started, 3),
+            "compute_seconds": round(computed - loaded, 3),
+            "write_seconds": round(finished - computed, 3),
+            "seconds": round(elapsed, 3),
+            "buildings_per_second": round(len(building_ids) / elapsed, 1) if elapsed > 0 else None,
+        }
 
     async def get_baselines(self, building_id: uuid.UUID):
         # Retrieve history
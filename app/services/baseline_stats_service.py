@@ -0,0 +1,388 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.baseline import BaselineHistory, BaselineStats
+from app.models.building import Building
+from app.models.rollup import meter_readings_monthly
+from app.schemas.baseline import BaselineMethod
+from app.services import baseline_engine, data_quality_service, mrv_cache, weather_service
+from app.services.rollup_service import add_months, as_utc, floor_month, monthly_consumption_matrix
+
+# Maintained baselines: per building, the 12 complete months before the current one and
+# running sums over them (BaselineStats). A changed monthly rollup updates the sums by
+# subtracting the month's old contribution and adding the new one, so a refresh after
+# ingestion costs O(changed months) per building instead of a refetch of the window, and
+# a baseline history row is only written when the baseline actually changed.
+
+STATS_MONTHS = 12
+
+# Relative change below which a recomputed baseline counts as unchanged.
+CHANGE_TOLERANCE = 1e-9
+
+def current_window_start(now: Optional[datetime] = None) -> datetime:
+    return add_months(floor_month(as_utc(now or datetime.now(timezone.utc))), -STATS_MONTHS)
+
+def month_bucket(month: str) -> datetime:
+    return datetime.strptime(month, "%Y-%m").replace(tzinfo=timezone.utc)
+
+def _as_array(values: Sequence[Optional[float]]) -> np.ndarray:
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+def _as_list(values: np.ndarray) -> List[Optional[float]]:
+    return [value if np.isfinite(value) else None for value in values.tolist()]
+
+def _accumulate(kwh: np.ndarray, hdd: np.ndarray, cdd: np.ndarray) -> Dict[str, Any]:
+    # Sums over (buildings, months) arrays; the column values of BaselineStats per row.
+    valid = np.isfinite(kwh)
+    xtx, xty, yty = baseline_engine.regression_accumulators(kwh, np.stack([hdd, cdd], axis=2), valid)
+    return {
+        "kwh_count": valid.sum(axis=1),
+        "kwh_sum": np.where(valid, kwh, 0.0).sum(axis=1),
+        "regression_xtx": xtx.reshape(len(kwh), -1),
+        "regression_xty": xty,
+        "regression_yty": yty,
+    }
+
+class _Window:
+    # One building's window as arrays, updated in place month by month.
+    def __init__(self, stats: BaselineStats):
+        self.stats = stats
+        self.start = as_utc(stats.window_start)
+        self.kwh = _as_array(stats.monthly_kwh)
+        self.hdd = _as_array(stats.monthly_hdd)
+        self.cdd = _as_array(stats.monthly_cdd)
+        self.count = stats.kwh_count
+        self.total = stats.kwh_sum
+        self.xtx = np.asarray(stats.regression_xtx, dtype=np.float64).reshape(3, 3)
+        self.xty = np.asarray(stats.regression_xty, dtype=np.float64)
+        self.yty = stats.regression_yty
+
+    def _apply(self, i: int, sign: float) -> None:
+        kwh, hdd, cdd = self.kwh[i], self.hdd[i], self.cdd[i]
+        if not np.isfinite(kwh):
+            return
+        self.count += int(sign)
+        self.total += sign * kwh
+        if np.isfinite(hdd) and np.isfinite(cdd):
+            x = np.array([1.0, hdd, cdd])
+            self.xtx += sign * np.outer(x, x)
+            self.xty += sign * kwh * x
+            self.yty += sign * kwh * kwh
+
+    def set_month(self, i: int, kwh: float, hdd: float, cdd: float) -> None:
+        self._apply(i, -1.0)
+        self.kwh[i], self.hdd[i], self.cdd[i] = kwh, hdd, cdd
+        self._apply(i, 1.0)
+
+    def shift(self, months: int) -> None:
+        # Slide the window forward; the months entering it start empty.
+        for i in range(months):
+            self._apply(i, -1.0)
+        for values in (self.kwh, self.hdd, self.cdd):
+            values[:] = np.concatenate([values[months:], np.full(months, np.nan)])
+        self.start = add_months(self.start, months)
+
+    def save(self) -> None:
+        stats = self.stats
+        stats.window_start = self.start
+        stats.monthly_kwh = _as_list(self.kwh)
+        stats.monthly_hdd = _as_list(self.hdd)
+        stats.monthly_cdd = _as_list(self.cdd)
+        stats.kwh_count = self.count
+        stats.kwh_sum = float(self.total)
+        stats.regression_xtx = self.xtx.ravel().tolist()
+        stats.regression_xty = self.xty.tolist()
+        stats.regression_yty = float(self.yty)
+
+async def rebuild_stats(
+    db: AsyncSession, building_ids: Sequence[Any], method: Optional[BaselineMethod] = None,
+    threshold_pct: Optional[float] = None,
+) -> None:
+    """
+    (Re)compute the stats of buildings from the rollups: one query for their windows and
+    one for degree days. Sets the maintained method / threshold when given (new rows
+    default to historical_12_months and OUTLIER_THRESHOLD_PCT). Commits.
+    """
+    start = current_window_start()
+    ids, _, kwh = await monthly_consumption_matrix(db, months=STATS_MONTHS, building_ids=list(building_ids))
+    # Buildings without readings in the window still get (empty) stats.
+    found = set(ids)
+    missing = [building_id for building_id in building_ids if building_id not in found]
+    ids = list(ids) + missing
+    kwh = np.concatenate([kwh, np.full((len(missing), STATS_MONTHS), np.nan)])
+    buckets = [add_months(start, i) for i in range(STATS_MONTHS)]
+    kwh = await data_quality_service.apply_to_monthly(db, ids, buckets, kwh)
+    hdd, cdd = await weather_service.monthly_degree_days(db, ids, buckets)
+    sums = _accumulate(kwh, hdd, cdd)
+
+    rows = [
+        {
+            "building_id": building_id,
+            "method": (method or BaselineMethod.HISTORICAL_12_MONTHS).value,
+            "threshold_pct": baseline_engine.OUTLIER_THRESHOLD_PCT if threshold_pct is None else threshold_pct,
+            "window_start": start,
+            "monthly_kwh": _as_list(kwh[i]),
+            "monthly_hdd": _as_list(hdd[i]),
+            "monthly_cdd": _as_list(cdd[i]),
+            "kwh_count": int(sums["kwh_count"][i]),
+            "kwh_sum": float(sums["kwh_sum"][i]),
+            "regression_xtx": sums["regression_xtx"][i].tolist(),
+            "regression_xty": sums["regression_xty"][i].tolist(),
+            "regression_yty": float(sums["regression_yty"][i]),
+        }
+        for i, building_id in enumerate(ids)
+    ]
+    if not rows:
+        return
+    stmt = pg_insert(BaselineStats)
+    updated = {
+        column: stmt.excluded[column]
+        for column in rows[0]
+        if column != "building_id"
+        and (column != "method" or method is not None)
+        and (column != "threshold_pct" or threshold_pct is not None)
+    }
+    updated["updated_at"] = func.now()
+    await db.execute(stmt.on_conflict_do_update(index_elements=[BaselineStats.building_id], set_=updated), rows)
+    await db.commit()
+
+async def _load(db: AsyncSession, building_ids: Iterable[Any]) -> Dict[Any, BaselineStats]:
+    # populate_existing: rows may have been rewritten by rebuild_stats' bulk upsert.
+    result = await db.execute(
+        select(BaselineStats)
+        .where(BaselineStats.building_id.in_(list(building_ids)))
+        .execution_options(populate_existing=True)
+    )
+    return {stats.building_id: stats for stats in result.scalars()}
+
+async def update_months(db: AsyncSession, pairs: Iterable[Tuple[Any, str]]) -> Set[Any]:
+    """
+    Fold changed monthly rollups, (building_id, YYYY-MM) pairs, into the stats of the
+    buildings that have them, sliding windows that fell behind the current month. Months
+    outside a building's window are ignored. Returns the buildings whose stats changed.
+    Commits.
+    """
+    touched: Dict[Any, Set[datetime]] = defaultdict(set)
+    for building_id, month in pairs:
+        touched[uuid.UUID(str(building_id))].add(month_bucket(month))
+    windows = {building_id: _Window(stats) for building_id, stats in (await _load(db, touched)).items()}
+    return await _update_windows(db, windows, touched)
+
+async def _update_windows(
+    db: AsyncSession, windows: Dict[Any, "_Window"], touched: Dict[Any, Set[datetime]]
+) -> Set[Any]:
+    start = current_window_start()
+    end = add_months(start, STATS_MONTHS)
+    wanted: Dict[Any, Set[datetime]] = {}
+    for building_id, window in windows.items():
+        behind = (start.year - window.start.year) * 12 + start.month - window.start.month
+        months = {bucket for bucket in touched.get(building_id, ()) if start <= bucket < end}
+        if behind > 0:
+            window.shift(min(behind, STATS_MONTHS))
+            window.start = start
+            months |= {add_months(start, i) for i in range(STATS_MONTHS - min(behind, STATS_MONTHS), STATS_MONTHS)}
+        if months:
+            wanted[building_id] = months
+    if not wanted:
+        return set()
+
+    keys = [(building_id, bucket) for building_id, buckets in wanted.items() for bucket in buckets]
+    result = await db.execute(
+        select(meter_readings_monthly.c.building_id, meter_readings_monthly.c.bucket, meter_readings_monthly.c.sum_kwh)
+        .where(tuple_(meter_readings_monthly.c.building_id, meter_readings_monthly.c.bucket).in_(keys))
+    )
+    kwh = {(building_id, as_utc(bucket)): float(value) for building_id, bucket, value in result.all()}
+    ids = list(wanted)
+    buckets = [add_months(start, i) for i in range(STATS_MONTHS)]
+    hdd, cdd = await weather_service.monthly_degree_days(db, ids, buckets)
+    quality = await data_quality_service.monthly_quality(db, ids, buckets)
+
+    for row, building_id in enumerate(ids):
+        window = windows[building_id]
+        for bucket in wanted[building_id]:
+            i = (bucket.year - start.year) * 12 + bucket.month - start.month
+            month_kwh = data_quality_service.adjusted_kwh(kwh.get((building_id, bucket), np.nan), quality.get((building_id, bucket)))
+            window.set_month(i, month_kwh, hdd[row, i], cdd[row, i])
+        window.save()
+    await db.commit()
+    return set(ids)
+
+async def ensure_current(db: AsyncSession, building_id: Any) -> BaselineStats:
+    """
+    Stats of one building, built on first use and slid forward when the month has rolled
+    over since the last update. The maintained method / threshold are left as they are.
+    """
+    stats = (await _load(db, [building_id])).get(building_id)
+    if stats is None:
+        await rebuild_stats(db, [building_id])
+    else:
+        await _update_windows(db, {building_id: _Window(stats)}, {})
+        await db.commit()
+    return (await _load(db, [building_id]))[building_id]
+
+def evaluate(
+    stats_rows: Sequence[BaselineStats], normal_hdd: np.ndarray, normal_cdd: np.ndarray,
+    method: Optional[BaselineMethod] = None, threshold_pct: Optional[float] = None,
+) -> List[Tuple[BaselineMethod, baseline_engine.BaselineBatch, int]]:
+    """
+    Baselines of buildings from their stats, batched per maintained method and threshold;
+    `method` / `threshold_pct` replace the maintained ones for this evaluation only.
+    Returns (method, batch, index into the batch) in the order of stats_rows.
+    """
+    by_method: Dict[Tuple[BaselineMethod, float], List[int]] = defaultdict(list)
+    for i, stats in enumerate(stats_rows):
+        by_method[
+            method or BaselineMethod(stats.method), stats.threshold_pct if threshold_pct is None else threshold_pct
+        ].append(i)
+
+    results: List[Optional[Tuple[BaselineMethod, baseline_engine.BaselineBatch, int]]] = [None] * len(stats_rows)
+    for (group_method, group_threshold), indexes in by_method.items():
+        rows = [stats_rows[i] for i in indexes]
+        batch = baseline_engine.compute_baselines_from_stats(
+            group_method,
+            np.array([_as_array(row.monthly_kwh) for row in rows]),
+            np.array([_as_array(row.monthly_hdd) for row in rows]),
+            np.array([_as_array(row.monthly_cdd) for row in rows]),
+            np.array([row.kwh_count for row in rows]),
+            np.array([row.kwh_sum for row in rows]),
+            np.array([row.regression_xtx for row in rows], dtype=np.float64).reshape(len(rows), 3, 3),
+            np.array([row.regression_xty for row in rows], dtype=np.float64),
+            np.array([row.regression_yty for row in rows], dtype=np.float64),
+            normal_hdd=normal_hdd[indexes],
+            normal_cdd=normal_cdd[indexes],
+            threshold_pct=group_threshold,
+        )
+        for position, i in enumerate(indexes):
+            results[i] = (group_method, batch, position)
+    return results
+
+async def set_maintained_method(db: AsyncSession, method: BaselineMethod, threshold_pct: float) -> int:
+    """
+    Evaluate every maintained baseline with `method` and `threshold_pct` from now on (after
+    a portfolio-wide recalculation). Returns the stats rows updated. Commits.
+    """
+    result = await db.execute(
+        update(BaselineStats).values(method=method.value, threshold_pct=threshold_pct, updated_at=func.now())
+    )
+    await db.commit()
+    return result.rowcount
+
+def _changed(previous: Optional[BaselineHistory], values: Dict[str, float]) -> bool:
+    if previous is None:
+        return True
+    return any(
+        abs(getattr(previous, column) - value) > CHANGE_TOLERANCE * max(1.0, abs(value))
+        for column, value in values.items()
+    )
+
+async def record_baselines(db: AsyncSession, baselines: Dict[Any, Dict[str, float]], period: str) -> int:
+    """
+    Append baseline history rows for `period` ({building_id: raw_kwh, adjusted_kwh,
+    weather_factor, occupancy_factor}), skipping buildings whose latest row for the period
+    already has these values. One query, one bulk insert. Returns the rows written.
+    """
+    if not baselines:
+        return 0
+    result = await db.execute(
+        select(BaselineHistory)
+        .where(BaselineHistory.building_id.in_(list(baselines)), BaselineHistory.period == period)
+        .order_by(BaselineHistory.building_id, BaselineHistory.created_at.desc())
+        .distinct(BaselineHistory.building_id)
+    )
+    latest = {row.building_id: row for row in result.scalars()}
+    rows = [
+        {"building_id": building_id, "period": period, **values}
+        for building_id, values in baselines.items()
+        if _changed(latest.get(building_id), values)
+    ]
+    if rows:
+        await db.execute(insert(BaselineHistory), rows)
+        await db.commit()
+        await mrv_cache.invalidate_building_months((row["building_id"], period) for row in rows)
+    return len(rows)
+
+def batch_values(batch: baseline_engine.BaselineBatch, i: int) -> Dict[str, float]:
+    return {
+        "raw_kwh": float(batch.raw_kwh[i]),
+        "adjusted_kwh": float(batch.adjusted_kwh[i]),
+        "weather_factor": float(batch.weather_factor[i]),
+        "occupancy_factor": float(batch.occupancy_factor[i]),
+    }
+
+async def refresh_baselines(db: AsyncSession, building_ids: Iterable[Any]) -> int:
+    """
+    Re-evaluate the maintained baselines of buildings from their stats and record the ones
+    that changed. Returns the history rows written.
+    """
+    stats_rows = list((await _load(db, building_ids)).values())
+    if not stats_rows:
+        return 0
+    ids = [stats.building_id for stats in stats_rows]
+    normal_hdd, normal_cdd = await weather_service.normal_degree_days(db, ids)
+    baselines = {}
+    for stats, (_, batch, i) in zip(stats_rows, evaluate(stats_rows, normal_hdd, normal_cdd)):
+        if np.isfinite(batch.adjusted_kwh[i]):
+            baselines[stats.building_id] = batch_values(batch, i)
+    return await record_baselines(db, baselines, datetime.now().strftime("%Y-%m"))
+
+async def apply_rollup_changes(db: AsyncSession, pairs: Iterable[Tuple[Any, str]]) -> Dict[str, int]:
+    """
+    After ingestion: fold the changed months into the stats and record baselines that
+    moved. Buildings without maintained baselines are skipped.
+    """
+    updated = await update_months(db, pairs)
+    written = await refresh_baselines(db, updated) if updated else 0
+    return {"buildings_updated": len(updated), "baselines_written": written}
+
+async def apply_weather_changes(db: AsyncSession, station_id: str, start: datetime, end: datetime) -> Dict[str, int]:
+    """
+    After a weather import: refetch the degree days of the window months in [start, end]
+    for the maintained baselines of buildings on the station, and record baselines that moved.
+    """
+    window_start = current_window_start()
+    first = max(floor_month(as_utc(start)), window_start)
+    last = min(floor_month(as_utc(end)), add_months(window_start, STATS_MONTHS - 1))
+    result = await db.execute(
+        select(BaselineStats.building_id)
+        .join(Building, Building.id == BaselineStats.building_id)
+        .where(Building.weather_station_id == station_id)
+    )
+    building_ids = list(result.scalars())
+    months = []
+    while first <= last:
+        months.append(first.strftime("%Y-%m"))
+        first = add_months(first, 1)
+    if not building_ids or not months:
+        return {"buildings_updated": 0, "baselines_written": 0}
+    return await apply_rollup_changes(db, [(building_id, month) for building_id in building_ids for month in months])
+
+async def rebuild_maintained(db: AsyncSession, building_ids: Optional[Sequence[Any]] = None) -> Dict[str, int]:
+    """
+    Rebuild the stats of maintained baselines (all of them by default) from the rollups and
+    weather, in batches of BASELINE_RECALC_BATCH_SIZE, and record baselines that moved. Used
+    when cached degree days went stale (station change) and periodically, to reset the
+    floating-point drift of the incremental sums. Method and threshold are kept.
+    """
+    query = select(BaselineStats.building_id)
+    if building_ids is not None:
+        query = query.where(BaselineStats.building_id.in_(list(building_ids)))
+    ids = list((await db.execute(query)).scalars())
+    written = 0
+    for lo in range(0, len(ids), settings.BASELINE_RECALC_BATCH_SIZE):
+        chunk = ids[lo:lo + settings.BASELINE_RECALC_BATCH_SIZE]
+        await rebuild_stats(db, chunk)
+        written += await refresh_baselines(db, chunk)
+    return {"buildings_updated": len(ids), "baselines_written": written}
+
+def window_months(pairs: Iterable[Tuple[Any, str]]) -> List[Tuple[str, str]]:
+    # The (building_id, YYYY-MM) pairs that fall in the current stats window, as strings.
+    start = current_window_start()
+    first, last = start.strftime("%Y-%m"), add_months(start, STATS_MONTHS - 1).strftime("%Y-%m")
+    return sorted({(str(building_id), month) for building_id, month in pairs if first <= month <= last})
@@ -6,6 +6,7 @@ from pydantic import UUID4
 
 from app.models.building import Building
 from app.schemas.building import BuildingCreate, BuildingUpdate
+from app.services import baseline_stats_service, mrv_cache
 
 async def get_building(db: AsyncSession, building_id: UUID4) -> Optional[Building]:
     result = await db.execute(select(Building).filter(Building.id == building_id))
@@ -29,12 +30,20 @@ async def update_building(
     db: AsyncSession, db_building: Building, building_update: BuildingUpdate
 ) -> Building:
     update_data = building_update.model_dump(exclude_unset=True)
+    station_changed = (
+        "weather_station_id" in update_data and update_data["weather_station_id"] != db_building.weather_station_id
+    )
     for key, value in update_data.items():
         setattr(db_building, key, value)
     
     db.add(db_building)
     await db.commit()
     await db.refresh(db_building)
+    # e.g. region_id changes which emission factors apply
+    await mrv_cache.invalidate_building(db_building.id)
+    if station_changed:
+        # The maintained baseline's cached degree days came from the old station.
+        await baseline_stats_service.rebuild_maintained(db, [db_building.id])
     return db_building
 
 async def delete_building(db: AsyncSession, building_id: UUID4) -> Optional[Building]:
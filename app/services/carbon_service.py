@@ -0,0 +1,79 @@
+from typing import Optional, Tuple
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import Select, Subquery, and_, func, literal, or_, true
+from pydantic import UUID4
+
+from app.models.building import Building
+from app.models.emission_factor import EmissionFactor, EmissionIntensity
+from app.services import rollup_service
+
+# Region for buildings without region_id.
+DEFAULT_REGION_ID = "US-CA"
+# Used when neither an hourly intensity nor a factor window covers an hour.
+DEFAULT_FACTOR_KG_PER_KWH = 0.5
+
+def emissions_by_building(building_ids: Select, period_start: datetime, period_end: datetime) -> Optional[Subquery]:
+    """
+    Subquery of (building_id, region_id, kwh, co2_kg) for readings with
+    period_start <= time <= period_end.
+
+    Consumption is joined hour by hour against the building region's carbon intensity:
+    the hourly emission_intensity series where present, else the emission factor whose
+    validity window contains the hour, else DEFAULT_FACTOR_KG_PER_KWH. The whole
+    computation is one set-based query; no per-interval work happens in Python.
+    """
+    hourly = rollup_service.hourly_consumption(building_ids, period_start, period_end)
+    if hourly is None:
+        return None
+
+    region = func.coalesce(Building.region_id, literal(DEFAULT_REGION_ID))
+    # Latest-starting window covering the hour (windows may nest, e.g. a monthly
+    # override inside an annual factor).
+    factor = (
+        select(EmissionFactor.factor_kg_per_kwh)
+        .where(
+            EmissionFactor.region_id == region,
+            EmissionFactor.valid_from <= hourly.c.bucket,
+            or_(EmissionFactor.valid_to.is_(None), EmissionFactor.valid_to > hourly.c.bucket),
+        )
+        .order_by(EmissionFactor.valid_from.desc())
+        .limit(1)
+        .lateral("factor")
+    )
+    intensity = func.coalesce(
+        EmissionIntensity.kg_per_kwh, factor.c.factor_kg_per_kwh, literal(DEFAULT_FACTOR_KG_PER_KWH)
+    )
+    return (
+        select(
+            hourly.c.building_id,
+            region.label("region_id"),
+            func.sum(hourly.c.kwh).label("kwh"),
+            func.sum(hourly.c.kwh * intensity).label("co2_kg"),
+        )
+        .select_from(hourly)
+        .join(Building, Building.id == hourly.c.building_id)
+        .outerjoin(EmissionIntensity, and_(
+            EmissionIntensity.region_id == region,
+            EmissionIntensity.time == hourly.c.bucket,
+        ))
+        .outerjoin(factor, true())
+        .group_by(hourly.c.building_id, region)
+        .subquery("emissions")
+    )
+
+async def get_emissions(
+    db: AsyncSession, building_id: UUID4, period_start: datetime, period_end: datetime
+) -> Tuple[float, float]:
+    """
+    (kWh, kg CO2) of one building for period_start <= time <= period_end.
+    """
+    emissions = emissions_by_building(
+        select(Building.id).filter(Building.id == building_id), period_start, period_end
+    )
+    if emissions is None:
+        return 0.0, 0.0
+    result = await db.execute(select(emissions.c.kwh, emissions.c.co2_kg))
+    row = result.first()
+    return (float(row.kwh), float(row.co2_kg)) if row else (0.0, 0.0)
@@ -0,0 +1,304 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from sqlalchemy import Select, Subquery, case, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.building import Building
+from app.models.data_quality import DataQualityPeriod
+from app.models.rollup import meter_readings_hourly
+from app.schemas.data_quality import DataQualityStatus
+from app.services import mrv_cache
+from app.services.rollup_service import add_months, as_utc, floor_month
+
+# Monitoring rules of the methodology, applied per building and calendar month (UTC).
+#
+# Coverage is measured in hourly intervals: an hour counts as present when the hourly
+# rollup has readings for it. Counting runs as one set query over the rollup; only months
+# that need interpolation fetch their hourly series (time_bucket_gapfill, missing hours
+# as NULL), and the gaps of all of them are filled at once with array operations.
+# Results are stored in data_quality_periods, where MRV and baselines read them.
+
+# Missing share (%) up to which gaps are interpolated, and above which the month is rejected.
+INTERPOLATE_MAX_PCT = 5.0
+REJECT_PCT = 20.0
+
+# Worst first, for combining months into one status for a period.
+SEVERITY = {
+    DataQualityStatus.OK: 0,
+    DataQualityStatus.INTERPOLATED: 1,
+    DataQualityStatus.FLAGGED: 2,
+    DataQualityStatus.REJECTED: 3,
+}
+
+def classify(missing_pct: np.ndarray) -> List[DataQualityStatus]:
+    return [
+        DataQualityStatus.OK if pct == 0
+        else DataQualityStatus.INTERPOLATED if pct <= INTERPOLATE_MAX_PCT
+        else DataQualityStatus.FLAGGED if pct <= REJECT_PCT
+        else DataQualityStatus.REJECTED
+        for pct in missing_pct.tolist()
+    ]
+
+def interpolate_gaps(values: np.ndarray) -> np.ndarray:
+    """
+    Linear interpolation of NaN gaps along each row of a (series, intervals) array, all
+    rows at once. Leading / trailing gaps take the nearest value; all-NaN rows stay NaN.
+    """
+    rows, width = values.shape
+    valid = np.isfinite(values)
+    positions = np.broadcast_to(np.arange(width), (rows, width))
+    # Nearest valid position at or before / at or after every interval (-1 / width: none).
+    before = np.maximum.accumulate(np.where(valid, positions, -1), axis=1)
+    after = np.minimum.accumulate(np.where(valid, positions, width)[:, ::-1], axis=1)[:, ::-1]
+    has_before, has_after = before >= 0, after < width
+    left = np.take_along_axis(values, np.clip(before, 0, width - 1), axis=1)
+    right = np.take_along_axis(values, np.clip(after, 0, width - 1), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(has_before & has_after, (positions - before) / np.maximum(after - before, 1), 0.0)
+    filled = np.where(
+        has_before & has_after, left + weight * (right - left),
+        np.where(has_before, left, np.where(has_after, right, np.nan)),
+    )
+    return np.where(valid, values, filled)
+
+def longest_gaps(values: np.ndarray) -> np.ndarray:
+    # Longest run of NaNs per row.
+    rows, width = values.shape
+    missing = ~np.isfinite(values)
+    positions = np.broadcast_to(np.arange(width), (rows, width))
+    last_valid = np.maximum.accumulate(np.where(missing, -1, positions), axis=1)
+    runs = np.where(missing, positions - last_valid, 0)
+    return runs.max(axis=1) if width else np.zeros(rows, dtype=np.int64)
+
+def _month_hours(month: datetime) -> int:
+    return int((add_months(month, 1) - month) / timedelta(hours=1))
+
+def complete_months(pairs: Iterable[Tuple[Any, str]], now: Optional[datetime] = None) -> List[Tuple[str, str]]:
+    # (building_id, YYYY-MM) pairs of months that have ended, as strings (task arguments).
+    current = floor_month(as_utc(now or datetime.now(timezone.utc))).strftime("%Y-%m")
+    return sorted({(str(building_id), month) for building_id, month in pairs if month < current})
+
+async def _hourly_series(db: AsyncSession, building_ids: Sequence[uuid.UUID], month: datetime) -> Dict[uuid.UUID, np.ndarray]:
+    # Gap-filled hourly kWh of one month per building; missing hours are NaN.
+    end = add_months(month, 1)
+    hour = func.time_bucket_gapfill(text("INTERVAL '1 hour'"), meter_readings_hourly.c.bucket, month, end).label("hour")
+    result = await db.execute(
+        select(meter_readings_hourly.c.building_id, hour, func.sum(meter_readings_hourly.c.sum_kwh))
+        .where(
+            meter_readings_hourly.c.building_id.in_(building_ids),
+            meter_readings_hourly.c.bucket >= month,
+            meter_readings_hourly.c.bucket < end,
+        )
+        .group_by(meter_readings_hourly.c.building_id, hour)
+        .order_by(meter_readings_hourly.c.building_id, hour)
+    )
+    series: Dict[uuid.UUID, List[float]] = defaultdict(list)
+    for building_id, _, kwh in result.all():
+        series[building_id].append(np.nan if kwh is None else float(kwh))
+    return {building_id: np.array(values) for building_id, values in series.items()}
+
+async def assess_months(db: AsyncSession, pairs: Iterable[Tuple[Any, str]]) -> Dict[str, int]:
+    """
+    Assess (building_id, YYYY-MM) months and upsert their data_quality_periods rows.
+    Months that have not ended yet are skipped. Returns the number of months per status.
+    """
+    wanted: Dict[datetime, Set[uuid.UUID]] = defaultdict(set)
+    for building_id, month in complete_months(pairs):
+        wanted[datetime.strptime(month, "%Y-%m").replace(tzinfo=timezone.utc)].add(uuid.UUID(building_id))
+    if not wanted:
+        return {}
+    keys = sorted((building_id, month) for month, ids in wanted.items() for building_id in ids)
+    lo, hi = min(wanted), add_months(max(wanted), 1)
+
+    # 1. Present hours and measured kWh per building-month, one query over the hourly rollup.
+    month_bucket = func.time_bucket(text("INTERVAL '1 month'"), meter_readings_hourly.c.bucket).label("month")
+    result = await db.execute(
+        select(meter_readings_hourly.c.building_id, month_bucket, func.count(), func.sum(meter_readings_hourly.c.sum_kwh))
+        .where(
+            meter_readings_hourly.c.building_id.in_({building_id for building_id, _ in keys}),
+            meter_readings_hourly.c.bucket >= lo,
+            meter_readings_hourly.c.bucket < hi,
+        )
+        .group_by(meter_readings_hourly.c.building_id, month_bucket)
+    )
+    present = {(building_id, as_utc(month)): (hours, float(kwh or 0.0)) for building_id, month, hours, kwh in result.all()}
+
+    expected = np.array([_month_hours(month) for _, month in keys])
+    hours = np.array([present.get(key, (0, 0.0))[0] for key in keys])
+    measured = np.array([present.get(key, (0, 0.0))[1] for key in keys])
+    missing = expected - hours
+    missing_pct = np.round(100.0 * missing / expected, 3)
+    statuses = classify(missing_pct)
+    interpolated = np.zeros(len(keys))
+    longest = np.where(hours == 0, expected, 0)
+
+    # 2. Hourly series of the partially covered months: gap lengths for all of them,
+    #    interpolation for those not rejected.
+    by_month: Dict[datetime, List[int]] = defaultdict(list)
+    for i in np.flatnonzero((missing > 0) & (hours > 0)).tolist():
+        by_month[keys[i][1]].append(i)
+    for month, indexes in by_month.items():
+        series = await _hourly_series(db, [keys[i][0] for i in indexes], month)
+        values = np.array([series[keys[i][0]] for i in indexes])
+        longest[indexes] = longest_gaps(values)
+        fill = [n for n, i in enumerate(indexes) if statuses[i] != DataQualityStatus.REJECTED]
+        if fill:
+            filled = interpolate_gaps(values[fill])
+            interpolated[[indexes[n] for n in fill]] = np.nansum(filled, axis=1) - np.nansum(values[fill], axis=1)
+
+    rows = [
+        {
+            "building_id": building_id,
+            "period_start": month,
+            "expected_hours": int(expected[i]),
+            "missing_hours": int(missing[i]),
+            "missing_pct": float(missing_pct[i]),
+            "longest_gap_hours": int(longest[i]),
+            "status": statuses[i].value,
+            "measured_kwh": float(measured[i]),
+            "interpolated_kwh": float(interpolated[i]),
+        }
+        for i, (building_id, month) in enumerate(keys)
+    ]
+    stmt = insert(DataQualityPeriod)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[DataQualityPeriod.building_id, DataQualityPeriod.period_start],
+            set_={**{column: stmt.excluded[column] for column in rows[0] if column not in ("building_id", "period_start")},
+                  "assessed_at": func.now()},
+        ),
+        rows,
+    )
+    await db.commit()
+    await mrv_cache.invalidate_building_months((building_id, month.strftime("%Y-%m")) for building_id, month in keys)
+
+    counts: Dict[str, int] = defaultdict(int)
+    for status in statuses:
+        counts[status.value] += 1
+    return dict(counts)
+
+async def previous_month_pairs(db: AsyncSession, now: Optional[datetime] = None) -> List[Tuple[str, str]]:
+    # Every building's last complete month, to assess once the month has rolled over.
+    month = add_months(floor_month(as_utc(now or datetime.now(timezone.utc))), -1).strftime("%Y-%m")
+    result = await db.execute(select(Building.id))
+    return [(str(building_id), month) for building_id in result.scalars()]
+
+async def get_periods(db: AsyncSession, building_id: uuid.UUID, start: datetime, end: datetime) -> List[DataQualityPeriod]:
+    # Assessed months overlapping [start, end], oldest first.
+    result = await db.execute(
+        select(DataQualityPeriod)
+        .where(
+            DataQualityPeriod.building_id == building_id,
+            DataQualityPeriod.period_start >= floor_month(as_utc(start)),
+            DataQualityPeriod.period_start <= as_utc(end),
+        )
+        .order_by(DataQualityPeriod.period_start)
+    )
+    return list(result.scalars())
+
+def period_quality(building_ids: Select, period_start: datetime, period_end: datetime) -> Subquery:
+    """
+    Subquery of (building_id, severity, missing_pct, interpolated_kwh) over the assessed
+    months overlapping period_start <= time <= period_end: the worst status (SEVERITY) and
+    missing share of those months, and the interpolated kWh of the months that lie wholly
+    inside the period (partial months are not apportioned). Buildings with no assessed
+    month have no row.
+    """
+    first, last = floor_month(as_utc(period_start)), floor_month(as_utc(period_end))
+    whole = []
+    month = first
+    while month <= last:
+        if month >= as_utc(period_start) and add_months(month, 1) - timedelta(microseconds=1) <= as_utc(period_end):
+            whole.append(month)
+        month = add_months(month, 1)
+
+    severity = case(
+        *[(DataQualityPeriod.status == status.value, literal(rank)) for status, rank in SEVERITY.items()],
+        else_=literal(0),
+    )
+    interpolated = (
+        case((DataQualityPeriod.period_start.in_(whole), DataQualityPeriod.interpolated_kwh), else_=literal(0.0))
+        if whole else literal(0.0)
+    )
+    return (
+        select(
+            DataQualityPeriod.building_id,
+            func.max(severity).label("severity"),
+            func.max(DataQualityPeriod.missing_pct).label("missing_pct"),
+            func.sum(interpolated).label("interpolated_kwh"),
+        )
+        .where(
+            DataQualityPeriod.building_id.in_(building_ids),
+            DataQualityPeriod.period_start >= first,
+            DataQualityPeriod.period_start <= last,
+        )
+        .group_by(DataQualityPeriod.building_id)
+        .subquery("quality")
+    )
+
+async def get_period_quality(
+    db: AsyncSession, building_id: Any, period_start: datetime, period_end: datetime,
+) -> Tuple[Optional[DataQualityStatus], float, float]:
+    # period_quality of one building: (worst status or None if not assessed, missing %, interpolated kWh).
+    quality = period_quality(select(Building.id).filter(Building.id == building_id), period_start, period_end)
+    row = (await db.execute(select(quality.c.severity, quality.c.missing_pct, quality.c.interpolated_kwh))).first()
+    if row is None:
+        return None, 0.0, 0.0
+    return status_of(row[0]), float(row[1]), float(row[2] or 0.0)
+
+def status_of(severity: Optional[int]) -> Optional[DataQualityStatus]:
+    if severity is None:
+        return None
+    return next(status for status, rank in SEVERITY.items() if rank == severity)
+
+async def monthly_quality(
+    db: AsyncSession, building_ids: Sequence[Any], buckets: Sequence[datetime],
+) -> Dict[Tuple[Any, datetime], Tuple[DataQualityStatus, float]]:
+    # {(building_id, month): (status, measured + interpolated kWh)} for the assessed months.
+    if not len(building_ids) or not len(buckets):
+        return {}
+    result = await db.execute(
+        select(DataQualityPeriod.building_id, DataQualityPeriod.period_start, DataQualityPeriod.status,
+               DataQualityPeriod.measured_kwh + DataQualityPeriod.interpolated_kwh)
+        .where(
+            DataQualityPeriod.building_id.in_(list(building_ids)),
+            DataQualityPeriod.period_start >= min(as_utc(bucket) for bucket in buckets),
+            DataQualityPeriod.period_start <= max(as_utc(bucket) for bucket in buckets),
+        )
+    )
+    return {
+        (building_id, as_utc(month)): (DataQualityStatus(status), float(kwh))
+        for building_id, month, status, kwh in result.all()
+    }
+
+def adjusted_kwh(kwh: float, quality: Optional[Tuple[DataQualityStatus, float]]) -> float:
+    """
+    A month's kWh with the monitoring rules applied: NaN when rejected (excluded from
+    baselines), measured plus interpolated kWh when interpolated / flagged, otherwise as is.
+    """
+    if quality is None or not np.isfinite(kwh):
+        return kwh
+    status, adjusted = quality
+    if status == DataQualityStatus.REJECTED:
+        return np.nan
+    return kwh if status == DataQualityStatus.OK else adjusted
+
+async def apply_to_monthly(
+    db: AsyncSession, building_ids: Sequence[Any], buckets: Sequence[datetime], kwh: np.ndarray,
+) -> np.ndarray:
+    # adjusted_kwh over a (buildings, buckets) monthly kWh array.
+    quality = await monthly_quality(db, building_ids, buckets)
+    if not quality:
+        return kwh
+    kwh = np.array(kwh, dtype=np.float64)
+    rows = {building_id: i for i, building_id in enumerate(building_ids)}
+    columns = {as_utc(bucket): j for j, bucket in enumerate(buckets)}
+    for (building_id, month), entry in quality.items():
+        if building_id in rows and month in columns:
+            i, j = rows[building_id], columns[month]
+            kwh[i, j] = adjusted_kwh(kwh[i, j], entry)
+    return kwh
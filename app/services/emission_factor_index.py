@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+import asyncpg
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.models.emission_factor import EmissionFactor
+from app.services.rollup_service import as_utc
+
+logger = logging.getLogger(__name__)
+
+# Sent by the emission_factors trigger (see migration b6c0f1d2e3a4) on every write.
+NOTIFY_CHANNEL = "emission_factors_changed"
+
+EMISSION_FACTOR_INDEX_RELOADS = REGISTRY.counter(
+    "emission_factor_index_reloads_total", "Reloads of the in-process emission factor index.", ("reason",)
+)
+
+@dataclass(frozen=True)
+class FactorEntry:
+    # Detached copy of an EmissionFactor row; safe to share across sessions and tasks.
+    id: uuid.UUID
+    region_id: str
+    region_name: str
+    factor_kg_per_kwh: float
+    year: int
+    source: str
+    valid_from: datetime
+    valid_to: Optional[datetime]
+
+    def covers(self, when: datetime) -> bool:
+        return self.valid_from <= when and (self.valid_to is None or when < self.valid_to)
+
+class EmissionFactorIndex:
+    """
+    The whole emission_factors table (it is tiny) as validity windows per region, so
+    lookups cost no DB round-trip. The table is reloaded lazily on the first lookup after it
+    was marked stale (local write, NOTIFY from another process, lost listener) or after
+    EMISSION_FACTOR_INDEX_MAX_AGE_SECONDS as a backstop.
+    """
+    def __init__(self):
+        # Per region, latest valid_from first (so nested windows win over enclosing ones).
+        self._factors: Dict[str, List[FactorEntry]] = {}
+        self._loaded_at: Optional[float] = None
+        self._stale_reason: Optional[str] = "startup"
+        self._lock = asyncio.Lock()
+
+    def mark_stale(self, reason: str) -> None:
+        self._stale_reason = reason
+
+    def _needs_reload(self) -> Optional[str]:
+        if self._stale_reason:
+            return self._stale_reason
+        if time.monotonic() - self._loaded_at > settings.EMISSION_FACTOR_INDEX_MAX_AGE_SECONDS:
+            return "max_age"
+        return None
+
+    async def reload(self, db: AsyncSession, reason: str) -> None:
+        # Cleared before the query, so a NOTIFY arriving mid-load marks it stale again.
+        self._stale_reason = None
+        result = await db.execute(select(EmissionFactor).order_by(EmissionFactor.valid_from.desc()))
+        factors: Dict[str, List[FactorEntry]] = defaultdict(list)
+        for row in result.scalars():
+            factors[row.region_id].append(FactorEntry(
+                id=row.id,
+                region_id=row.region_id,
+                region_name=row.region_name,
+                factor_kg_per_kwh=row.factor_kg_per_kwh,
+                year=row.year,
+                source=row.source,
+                valid_from=row.valid_from,
+                valid_to=row.valid_to,
+            ))
+        self._factors = dict(factors)
+        self._loaded_at = time.monotonic()
+        EMISSION_FACTOR_INDEX_RELOADS.inc(reason=reason)
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self._needs_reload() is None:
+            return
+        async with self._lock:
+            reason = self._needs_reload()
+            if reason is not None:
+                await self.reload(db, reason)
+
+    async def get(self, db: AsyncSession, region_id: str, when: datetime) -> Optional[FactorEntry]:
+        """
+        Factor in effect for a region at `when` (naive = UTC), same precedence as the SQL
+        join in carbon_service. `db` is only used when the index has to be (re)loaded.
+        """
+        await self.ensure_loaded(db)
+        return self.lookup(region_id, when)
+
+    def lookup(self, region_id: str, when: datetime) -> Optional[FactorEntry]:
+        # As get, against the index as currently loaded (call ensure_loaded first).
+        when = as_utc(when)
+        return next((entry for entry in self._factors.get(region_id, ()) if entry.covers(when)), None)
+
+emission_factor_index = EmissionFactorIndex()
+
+def _listener_dsn() -> str:
+    # asyncpg takes a plain libpq URL, without SQLAlchemy's "+asyncpg" driver suffix.
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+async def listen_for_changes(index: EmissionFactorIndex = emission_factor_index) -> None:
+    """
+    Keep a dedicated connection LISTENing for emission factor writes made by other
+    processes. Runs until cancelled; reconnects with backoff, and marks the index stale
+    whenever notifications may have been missed.
+    """
+    delay = 1.0
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(_listener_dsn())
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: lost.set())
+            await conn.add_listener(NOTIFY_CHANNEL, lambda *_args: index.mark_stale("notify"))
+            # Writes may have happened while we were not listening.
+            index.mark_stale("listener_connected")
+            delay = 1.0
+            await lost.wait()
+            logger.warning("emission factor listener connection lost; reconnecting")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("emission factor listener failed: %s; retrying in %.0fs", e, delay)
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        index.mark_stale("listener_lost")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60.0)
@@ -1,10 +1,21 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
 from pydantic import UUID4
 
-from app.models.emission_factor import EmissionFactor
-from app.schemas.emission_factor import EmissionFactorCreate, EmissionFactorUpdate
+from app.models.emission_factor import EmissionFactor, EmissionIntensity
+from app.schemas.emission_factor import EmissionFactorCreate, EmissionFactorUpdate, EmissionIntensitySeries
+from app.services import mrv_cache
+from app.services.emission_factor_index import emission_factor_index
+from app.services.rollup_service import as_utc
+
+class DuplicateEmissionFactorError(ValueError):
+    pass
 
 async def get_emission_factor(db: AsyncSession, factor_id: UUID4) -> Optional[EmissionFactor]:
     result = await db.execute(select(EmissionFactor).filter(EmissionFactor.id == factor_id))
@@ -17,25 +28,122 @@ async def get_emission_factor_by_region_year(db: AsyncSession, region_id: str, y
     ))
     return result.scalars().first()
 
+async def get_emission_factor_by_region_valid_from(
+    db: AsyncSession, region_id: str, valid_from: datetime
+) -> Optional[EmissionFactor]:
+    result = await db.execute(select(EmissionFactor).filter(
+        EmissionFactor.region_id == region_id,
+        EmissionFactor.valid_from == valid_from
+    ))
+    return result.scalars().first()
+
+def _window(year: int, valid_from: Optional[datetime], valid_to: Optional[datetime]) -> Tuple[datetime, Optional[datetime]]:
+    # Naive bounds are taken as UTC, so they compare with (and are stored like) aware ones.
+    valid_from = None if valid_from is None else as_utc(valid_from)
+    valid_to = None if valid_to is None else as_utc(valid_to)
+    if valid_from is None:
+        valid_from = datetime(year, 1, 1, tzinfo=timezone.utc)
+        valid_to = valid_to or datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    if valid_to is not None and valid_to <= valid_from:
+        raise ValueError("valid_to must be after valid_from")
+    return valid_from, valid_to
+
+def factor_window(factor_in: EmissionFactorCreate) -> Tuple[datetime, Optional[datetime]]:
+    """
+    Validity window of a new factor; without explicit bounds it covers its calendar year (UTC).
+    """
+    return _window(factor_in.year, factor_in.valid_from, factor_in.valid_to)
+
+def updated_window(db_factor: EmissionFactor, update_data: dict) -> Tuple[datetime, Optional[datetime]]:
+    """
+    Validity window after an update. A new year without an explicit valid_from moves the
+    window to that calendar year, as on create; otherwise unset bounds are kept.
+    """
+    if "year" in update_data and "valid_from" not in update_data:
+        return _window(update_data["year"], None, update_data.get("valid_to"))
+    return _window(
+        update_data.get("year", db_factor.year),
+        update_data.get("valid_from", db_factor.valid_from),
+        update_data.get("valid_to", db_factor.valid_to),
+    )
+
 async def get_all_emission_factors(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[EmissionFactor]:
     result = await db.execute(select(EmissionFactor).offset(skip).limit(limit))
     return result.scalars().all()
 
 async def create_emission_factor(db: AsyncSession, factor_in: EmissionFactorCreate) -> EmissionFactor:
-    db_factor = EmissionFactor(**factor_in.model_dump())
+    valid_from, valid_to = factor_window(factor_in)
+    db_factor = EmissionFactor(
+        **factor_in.model_dump(exclude={"valid_from", "valid_to"}),
+        valid_from=valid_from,
+        valid_to=valid_to,
+    )
     db.add(db_factor)
-    await db.commit()
+    try:
+        # Uniqueness of (region_id, valid_from) is enforced by ix_emission_factors_region_id_valid_from,
+        # so concurrent creates cannot both succeed.
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise DuplicateEmissionFactorError("Emission factor for this region and validity window already exists")
     await db.refresh(db_factor)
+    emission_factor_index.mark_stale("write")
+    await mrv_cache.invalidate_emission_factors(mrv_cache.window_years(db_factor.valid_from, db_factor.valid_to))
     return db_factor
 
 async def update_emission_factor(
     db: AsyncSession, db_factor: EmissionFactor, factor_update: EmissionFactorUpdate
 ) -> EmissionFactor:
+    """
+    Raises ValueError for an invalid window and DuplicateEmissionFactorError if the new
+    window starts where another factor of the region does.
+    """
+    previous = mrv_cache.window_years(db_factor.valid_from, db_factor.valid_to)
     update_data = factor_update.model_dump(exclude_unset=True)
+    if update_data.keys() & {"year", "valid_from", "valid_to"}:
+        update_data["valid_from"], update_data["valid_to"] = updated_window(db_factor, update_data)
     for key, value in update_data.items():
         setattr(db_factor, key, value)
     
     db.add(db_factor)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise DuplicateEmissionFactorError("Emission factor for this region and validity window already exists")
     await db.refresh(db_factor)
+    emission_factor_index.mark_stale("write")
+    await mrv_cache.invalidate_emission_factors(
+        [*previous, *mrv_cache.window_years(db_factor.valid_from, db_factor.valid_to)]
+    )
     return db_factor
+
+async def upsert_emission_intensity(db: AsyncSession, series: EmissionIntensitySeries) -> int:
+    """
+    Bulk upsert an hourly intensity series. Timestamps are parsed in bulk (naive = UTC);
+    the whole series is rejected if any point is unparseable, non-finite or not on the hour.
+    """
+    times = pd.to_datetime(pd.Series(series.timestamps, dtype=object), utc=True, errors="coerce", format="ISO8601")
+    values = np.asarray(series.kg_per_kwh, dtype=np.float64)
+    invalid = times.isna().to_numpy() | ~np.isfinite(values)
+    invalid[~invalid] |= (times[~invalid] != times[~invalid].dt.floor("h")).to_numpy()
+    if invalid.any():
+        raise ValueError(f"{int(invalid.sum())} points have an invalid timestamp or value (timestamps must be on the hour)")
+    if not len(values):
+        return 0
+
+    rows = [
+        {"region_id": series.region_id, "time": time, "kg_per_kwh": value, "source": series.source}
+        for time, value in zip(times.dt.to_pydatetime(), values.tolist())
+    ]
+    stmt = insert(EmissionIntensity)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[EmissionIntensity.region_id, EmissionIntensity.time],
+            set_={"kg_per_kwh": stmt.excluded.kg_per_kwh, "source": stmt.excluded.source},
+        ),
+        rows,
+    )
+    await db.commit()
+    await mrv_cache.invalidate_emission_factors(range(times.min().year, times.max().year + 1))
+    return len(rows)
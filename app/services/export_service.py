@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, List
+
+from app.schemas.meter import ExportFormat
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only needed for Arrow exports
+    pa = None
+
+# Encoders for meter reading exports. Each turns partitions of (time, building_id,
+# value_kwh, source) rows into response body chunks, one chunk per partition.
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+# Same header as the CSV upload, so an export can be re-ingested as is.
+CSV_HEADER = ("timestamp", "building_id", "kwh", "source")
+
+def check_available(export_format: ExportFormat) -> None:
+    if export_format == ExportFormat.ARROW and pa is None:
+        raise ValueError("Arrow export requires the 'pyarrow' package")
+
+async def ndjson_chunks(partitions: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    async for rows in partitions:
+        yield "".join(
+            json.dumps({
+                "time": time.isoformat(),
+                "building_id": str(building_id),
+                "value_kwh": value_kwh,
+                "source": source,
+            }) + "\n"
+            for time, building_id, value_kwh, source in rows
+        ).encode()
+
+async def csv_chunks(partitions: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    async for rows in partitions:
+        writer.writerows(
+            (time.isoformat(), building_id, value_kwh, source)
+            for time, building_id, value_kwh, source in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def _arrow_schema():
+    return pa.schema([
+        ("time", pa.timestamp("us", tz="UTC")),
+        ("building_id", pa.string()),
+        ("value_kwh", pa.float64()),
+        ("source", pa.string()),
+    ])
+
+async def arrow_chunks(partitions: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    # Arrow IPC stream: the schema, then one record batch per partition.
+    schema = _arrow_schema()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        async for rows in partitions:
+            times, building_ids, values, sources = zip(*rows) if rows else ((), (), (), ())
+            writer.write_batch(pa.record_batch([
+                pa.array(times, type=schema.field("time").type),
+                pa.array([str(building_id) for building_id in building_ids], type=pa.string()),
+                pa.array(values, type=pa.float64()),
+                pa.array(sources, type=pa.string()),
+            ], schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    # End-of-stream marker written on close (and the schema, if there were no rows).
+    yield sink.getvalue()
+
+ENCODERS = {
+    ExportFormat.NDJSON: ndjson_chunks,
+    ExportFormat.CSV: csv_chunks,
+    ExportFormat.ARROW: arrow_chunks,
+}
+
+def encode(export_format: ExportFormat, partitions: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    return ENCODERS[export_format](partitions)
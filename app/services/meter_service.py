@@ -1,29 +1,224 @@
-from typing import List, Any
+from typing import List, Any, AsyncIterator, Callable, Iterable, Optional, Sequence, Tuple
+from datetime import datetime
+from itertools import repeat
+import base64
+import uuid
+import numpy as np
+import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import text
 from app.models.meter import MeterReading
-from app.schemas.meter import MeterReadingCreate
+from app.core.config import settings
+from app.schemas.meter import MeterReadingCreate, MeterReadingColumnarBatch, ConflictMode, DataSource, SortOrder
+from app.services import mrv_cache
+from app.services.rollup_service import as_utc
 
-async def create_meter_readings_batch(db: AsyncSession, readings: List[MeterReadingCreate]) -> int:
+# Called with the records once they are committed, e.g. to schedule rollup refreshes.
+OnWritten = Callable[[Sequence[Sequence[Any]]], None]
+
+# Column order of the records streamed through COPY.
+METER_READING_COLUMNS = ("time", "building_id", "value_kwh", "source")
+
+# Per-connection staging table. Rows never outlive the transaction that copied them.
+STAGING_TABLE = "meter_readings_staging"
+
+# Matches the unique index ix_meter_readings_building_id_time.
+CONFLICT_TARGET = "(building_id, time)"
+
+ON_CONFLICT_CLAUSES = {
+    ConflictMode.UPDATE: (
+        f"ON CONFLICT {CONFLICT_TARGET} DO UPDATE "
+        "SET value_kwh = EXCLUDED.value_kwh, source = EXCLUDED.source "
+        # Identical re-sends are skipped instead of rewriting the row.
+        "WHERE (meter_readings.value_kwh, meter_readings.source) "
+        "IS DISTINCT FROM (EXCLUDED.value_kwh, EXCLUDED.source)"
+    ),
+    ConflictMode.IGNORE: f"ON CONFLICT {CONFLICT_TARGET} DO NOTHING",
+}
+
+async def copy_meter_readings(
+    db: AsyncSession,
+    records: Iterable[Sequence[Any]],
+    on_conflict: ConflictMode = ConflictMode.UPDATE,
+) -> int:
     """
-    Bulk insert meter readings.
+    Bulk load readings with asyncpg's binary COPY.
+
+    Records are (time, building_id, value_kwh, source) tuples. They are copied into a
+    temporary staging table and merged into the hypertable with a single
+    INSERT ... SELECT ... ON CONFLICT, so re-sent readings are upserted rather than
+    duplicated. Returns the number of rows inserted or changed.
+    The caller owns the transaction (commit/rollback).
     """
-    db_readings = [
-        MeterReading(**reading.model_dump())
+    conn = await db.connection()
+    await conn.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+        f"(LIKE meter_readings INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    ))
+
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        STAGING_TABLE, records=records, columns=METER_READING_COLUMNS
+    )
+
+    columns = ", ".join(METER_READING_COLUMNS)
+    # DISTINCT ON: a single INSERT cannot touch the same conflicting row twice,
+    # so duplicates inside one batch are collapsed first.
+    result = await conn.execute(text(
+        f"INSERT INTO meter_readings ({columns}) "
+        f"SELECT DISTINCT ON (building_id, time) {columns} FROM {STAGING_TABLE} "
+        f"ORDER BY building_id, time "
+        f"{ON_CONFLICT_CLAUSES[on_conflict]}"
+    ))
+    # Keep the staging table empty in case the caller copies again before committing.
+    await conn.execute(text(f"TRUNCATE {STAGING_TABLE}"))
+    return result.rowcount
+
+def records_time_range(records: Sequence[Sequence[Any]]) -> Optional[Tuple[datetime, datetime]]:
+    if not records:
+        return None
+    times = [record[0] for record in records]
+    return min(times), max(times)
+
+def readings_to_records(readings: List[MeterReadingCreate]) -> List[Tuple[Any, ...]]:
+    return [
+        (reading.time, reading.building_id, reading.value_kwh, reading.source.value)
         for reading in readings
     ]
-    db.add_all(db_readings)
+
+def build_reading_records(
+    building_id: uuid.UUID, timestamps: Any, values: Any, source: DataSource
+) -> Tuple[List[Tuple[Any, ...]], int]:
+    """
+    Validate and convert parallel timestamp/value columns in bulk.
+
+    Timestamps are parsed vectorised (naive values are taken as UTC) and values
+    coerced to floats; rows with an unparseable time or a non-finite value are
+    dropped. Returns (records ready for copy_meter_readings, rejected row count).
+    """
+    times = pd.to_datetime(pd.Series(timestamps), utc=True, errors="coerce")
+    kwh = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+    valid = times.notna().to_numpy() & np.isfinite(kwh)
+    rejected = int(len(valid) - valid.sum())
+
+    records = list(zip(
+        list(times[valid].dt.to_pydatetime()),
+        repeat(building_id),
+        kwh[valid].tolist(),
+        repeat(source.value),
+    ))
+    return records, rejected
+
+async def create_meter_readings_batch(
+    db: AsyncSession,
+    readings: List[MeterReadingCreate],
+    on_conflict: ConflictMode = ConflictMode.UPDATE,
+    on_written: Optional[OnWritten] = None,
+) -> int:
+    """
+    Bulk upsert meter readings.
+    """
+    records = readings_to_records(readings)
+    count = await copy_meter_readings(db, records, on_conflict=on_conflict)
     await db.commit()
-    return len(db_readings)
+    await mrv_cache.invalidate_readings(records)
+    if on_written:
+        on_written(records)
+    return count
+
+def columnar_batch_to_records(batch: MeterReadingColumnarBatch) -> Tuple[List[Tuple[Any, ...]], int]:
+    records: List[Tuple[Any, ...]] = []
+    rejected = 0
+    for series in batch.series:
+        series_records, series_rejected = build_reading_records(
+            series.building_id, series.timestamps, series.values_kwh, batch.source
+        )
+        records.extend(series_records)
+        rejected += series_rejected
+    return records, rejected
+
+async def create_meter_readings_columnar(
+    db: AsyncSession,
+    batch: MeterReadingColumnarBatch,
+    on_conflict: ConflictMode = ConflictMode.UPDATE,
+    on_written: Optional[OnWritten] = None,
+) -> int:
+    """
+    Bulk upsert a columnar batch. The whole batch is rejected if any reading is invalid.
+    """
+    records, rejected = columnar_batch_to_records(batch)
+    if rejected:
+        raise ValueError(f"{rejected} readings have an invalid timestamp or value")
+    count = await copy_meter_readings(db, records, on_conflict=on_conflict)
+    await db.commit()
+    await mrv_cache.invalidate_readings(records)
+    if on_written:
+        on_written(records)
+    return count
+
+def _readings_query(building_id: Any, start: Optional[datetime], end: Optional[datetime]):
+    # Plain columns rather than ORM objects: nothing is identity-mapped or tracked.
+    query = select(
+        MeterReading.time, MeterReading.building_id, MeterReading.value_kwh, MeterReading.source
+    ).filter(MeterReading.building_id == building_id)
+    if start is not None:
+        query = query.filter(MeterReading.time >= start)
+    if end is not None:
+        query = query.filter(MeterReading.time < end)
+    return query
+
+def encode_cursor(time: datetime) -> str:
+    return base64.urlsafe_b64encode(time.isoformat().encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> datetime:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        # Cursors are only minted from aware times; an edited one may lack the offset.
+        return as_utc(datetime.fromisoformat(base64.urlsafe_b64decode(padded).decode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
 
 async def get_meter_readings(
-    db: AsyncSession, building_id: str, limit: int = 1000
-) -> List[MeterReading]:
-    result = await db.execute(
-        select(MeterReading)
-        .filter(MeterReading.building_id == building_id)
-        .order_by(MeterReading.time.desc())
-        .limit(limit)
-    )
-    return result.scalars().all()
+    db: AsyncSession,
+    building_id: str,
+    limit: int = 1000,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.DESC,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    One page of readings with start <= time < end, keyset-paginated on time (unique per
+    building). Returns (rows, cursor for the next page or None on the last page).
+    """
+    descending = order == SortOrder.DESC
+    query = _readings_query(building_id, start, end)
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        query = query.filter(MeterReading.time < after if descending else MeterReading.time > after)
+    query = query.order_by(MeterReading.time.desc() if descending else MeterReading.time.asc())
+
+    # One extra row tells whether another page exists.
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].time)
+
+async def stream_meter_readings(
+    db: AsyncSession,
+    building_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> AsyncIterator[List[Any]]:
+    """
+    All readings with start <= time < end, oldest first, in partitions of EXPORT_BATCH_ROWS
+    fetched through a server-side cursor, so memory stays constant however long the range.
+    """
+    query = _readings_query(building_id, start, end).order_by(MeterReading.time.asc())
+    result = await db.stream(query.execution_options(yield_per=settings.EXPORT_BATCH_ROWS))
+    async for partition in result.partitions():
+        yield partition
@@ -0,0 +1,82 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from datetime import datetime, timedelta, timezone
+from pydantic import UUID4
+
+from app.core.cache import build_cache
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.services.rollup_service import add_months, as_utc, floor_month
+
+# Read-through cache of MRV summaries. Entries are never deleted: every key embeds the
+# generation counters of the data it was computed from (one per building and month, one per
+# building for its attributes such as region, one per year of emission factors/intensity),
+# and writers bump those counters, so a write makes exactly the affected summaries
+# unreachable. The TTL only reclaims space.
+_mrv_cache = build_cache("mrv", settings.MRV_CACHE_BACKEND, max_entries=settings.MRV_CACHE_MAX_ENTRIES)
+MRV_CACHE_REQUESTS = REGISTRY.counter("mrv_cache_requests_total", "MRV summary cache lookups.", ("result",))
+
+def _month_key(building_id: Any, month: str) -> str:
+    return f"gen:{building_id}:{month}"
+
+def _building_key(building_id: Any) -> str:
+    return f"gen:{building_id}"
+
+def _factor_key(year: int) -> str:
+    # Per year, not per region: the cache is consulted before the building's region is known.
+    return f"gen:ef:{year}"
+
+def period_months(period_start: datetime, period_end: datetime) -> List[str]:
+    # Calendar months (YYYY-MM) whose readings fall in the period, in UTC like the rollups.
+    month, last = floor_month(as_utc(period_start)), floor_month(as_utc(period_end))
+    months = []
+    while month <= last:
+        months.append(month.strftime("%Y-%m"))
+        month = add_months(month, 1)
+    return months
+
+def readings_months(records: Iterable[Sequence[Any]]) -> Set[Tuple[Any, str]]:
+    # (building_id, YYYY-MM) pairs touched by copy_meter_readings records.
+    return {(record[1], as_utc(record[0]).strftime("%Y-%m")) for record in records}
+
+async def summary_key(
+    building_id: UUID4, period_start: datetime, period_end: datetime, months: Sequence[str]
+) -> str:
+    years = sorted({int(month[:4]) for month in months})
+    generations = await _mrv_cache.get_many(
+        [_building_key(building_id)]
+        + [_factor_key(year) for year in years]
+        + [_month_key(building_id, month) for month in months]
+    )
+    version = ".".join(str(generation or 0) for generation in generations)
+    return f"summary:{building_id}:{period_start.isoformat()}:{period_end.isoformat()}:{version}"
+
+async def get_summary(key: str) -> Optional[Dict[str, Any]]:
+    summary = await _mrv_cache.get(key)
+    MRV_CACHE_REQUESTS.inc(result="hit" if summary is not None else "miss")
+    return summary
+
+async def set_summary(key: str, summary: Dict[str, Any]) -> None:
+    await _mrv_cache.set(key, summary, ttl=settings.MRV_CACHE_TTL_SECONDS)
+
+async def invalidate_building_months(pairs: Iterable[Tuple[Any, str]]) -> None:
+    for building_id, month in pairs:
+        await _mrv_cache.incr(_month_key(building_id, month))
+
+async def invalidate_readings(records: Iterable[Sequence[Any]]) -> None:
+    await invalidate_building_months(readings_months(records))
+
+async def invalidate_building(building_id: Any) -> None:
+    await _mrv_cache.incr(_building_key(building_id))
+
+async def invalidate_emission_factors(years: Iterable[int]) -> None:
+    for year in set(years):
+        await _mrv_cache.incr(_factor_key(year))
+
+def window_years(valid_from: datetime, valid_to: Optional[datetime]) -> range:
+    # Years overlapped by [valid_from, valid_to); open-ended windows are capped a decade out.
+    start = as_utc(valid_from)
+    if valid_to is not None:
+        last = as_utc(valid_to - timedelta(microseconds=1)).year
+    else:
+        last = max(start.year, datetime.now(timezone.utc).year) + 10
+    return range(start.year, last + 1)
@@ -1,20 +1,23 @@
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, Any, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import func, literal
 from datetime import datetime
 from pydantic import UUID4
 
 from app.models.baseline import BaselineHistory
-from app.models.meter import MeterReading
 from app.models.building import Building
-from app.services import emission_factor_service
+from app.schemas.data_quality import DataQualityStatus
+from app.services import carbon_service, data_quality_service, mrv_cache
+from app.services.carbon_service import DEFAULT_FACTOR_KG_PER_KWH, DEFAULT_REGION_ID
+from app.services.emission_factor_index import emission_factor_index
 
 async def get_baseline(db: AsyncSession, building_id: UUID4, period: str) -> Optional[BaselineHistory]:
+    # Latest baseline for the period (a period can be recalculated).
     result = await db.execute(select(BaselineHistory).filter(
         BaselineHistory.building_id == building_id,
         BaselineHistory.period == period
-    ))
+    ).order_by(BaselineHistory.created_at.desc()).limit(1))
     return result.scalars().first()
 
 async def create_baseline(
@@ -29,6 +32,7 @@ async def create_baseline(
     db.add(baseline)
     await db.commit()
     await db.refresh(baseline)
+    await mrv_cache.invalidate_building_months([(building_id, period)])
     return baseline
 
 async def calculate_savings(
@@ -38,16 +42,15 @@ async def calculate_savings(
     Calculate savings for a specific time range.
     Formula: (Baseline - Actual) * EmissionFactor
     """
-    # 1. Get Actual kWh from Meter Readings
-    # Sum value_kwh where time is between start and end
-    # Note: This simple sum assumes meter readings cover the whole period evenly.
-    query = select(func.sum(MeterReading.value_kwh)).filter(
-        MeterReading.building_id == building_id,
-        MeterReading.time >= period_start,
-        MeterReading.time <= period_end
+    # 1. Get Actual kWh and CO2 from the hourly consumption rollup
+    # Sum value_kwh where time is between start and end, each hour weighted by its carbon intensity
+    actual_kwh, actual_co2_kg = await carbon_service.get_emissions(db, building_id, period_start, period_end)
+    # Monitoring rules (data_quality_service): reject, or add the kWh interpolated for gaps
+    status, missing_pct, interpolated_kwh = await data_quality_service.get_period_quality(
+        db, building_id, period_start, period_end
     )
-    result = await db.execute(query)
-    actual_kwh = result.scalars().first() or 0.0
+    if status == DataQualityStatus.REJECTED:
+        return {"error": _rejected_message(period_start, period_end, missing_pct)}
 
     # 2. Get Baseline Logic
     # For MVP, assume the "period" is the YYYY-MM of the start_date
@@ -68,28 +71,146 @@ async def calculate_savings(
     if not building:
         return {"error": "Building not found"}
     
-    # Simple logic: Extract region from address or lookup. 
-    # For MVP, let's hardcode 'US-CA' or fetch from Building if we added region column (we didn't, using address/name).
-    # Let's assume passed region or default.
-    region_id = "US-CA" # Placeholder
-    
-    factor_obj = await emission_factor_service.get_emission_factor_by_region_year(
-        db, region_id=region_id, year=period_start.year
-    )
-    
-    factor_val = factor_obj.factor_kg_per_kwh if factor_obj else 0.5 # Default fallback
+    region_id = building.region_id or DEFAULT_REGION_ID
+    await emission_factor_index.ensure_loaded(db)
+    factor_val = _effective_factor(region_id, actual_kwh, actual_co2_kg, period_start)
+    actual_kwh, actual_co2_kg = _with_interpolated(actual_kwh, actual_co2_kg, interpolated_kwh, factor_val)
     
     # 4. Calculate
+    summary = _savings_summary(period_str, baseline_kwh, actual_kwh, factor_val, actual_co2_kg)
+    return {**summary, **_quality_fields(status, missing_pct)}
+
+def _effective_factor(region_id: str, actual_kwh: float, actual_co2_kg: float, period_start: datetime) -> float:
+    """
+    Consumption-weighted intensity of the period: avoided kWh are valued at the same mix
+    as the kWh actually used. Without consumption, the factor in effect at period_start.
+    """
+    if actual_kwh > 0:
+        return actual_co2_kg / actual_kwh
+    factor_obj = emission_factor_index.lookup(region_id, period_start)
+    return factor_obj.factor_kg_per_kwh if factor_obj else DEFAULT_FACTOR_KG_PER_KWH # Default fallback
+
+# Reported as data_quality for periods whose months have not been assessed yet.
+QUALITY_NOT_ASSESSED = "UNKNOWN"
+
+def _with_interpolated(
+    actual_kwh: float, actual_co2_kg: float, interpolated_kwh: float, factor_val: float
+) -> Tuple[float, float]:
+    # Interpolated consumption is valued at the period's effective factor.
+    return actual_kwh + interpolated_kwh, actual_co2_kg + interpolated_kwh * factor_val
+
+def _quality_fields(status: Optional[DataQualityStatus], missing_pct: float) -> Dict[str, Any]:
+    return {
+        "data_quality": status.value if status else QUALITY_NOT_ASSESSED,
+        "missing_pct": missing_pct,
+    }
+
+def _rejected_message(period_start: datetime, period_end: datetime, missing_pct: float) -> str:
+    return (
+        f"Meter data rejected for {period_start.strftime('%Y-%m')} to {period_end.strftime('%Y-%m')}: "
+        f"{missing_pct:g}% of hourly intervals missing"
+    )
+
+async def calculate_savings_cached(
+    db: AsyncSession, building_id: UUID4, period_start: datetime, period_end: datetime
+) -> Dict[str, Any]:
+    """
+    calculate_savings behind the MRV cache. Error results are not cached.
+    """
+    # Readings of every month in the period, plus the baseline of the start month.
+    months = set(mrv_cache.period_months(period_start, period_end)) | {period_start.strftime("%Y-%m")}
+    key = await mrv_cache.summary_key(building_id, period_start, period_end, sorted(months))
+    summary = await mrv_cache.get_summary(key)
+    if summary is not None:
+        return summary
+
+    summary = await calculate_savings(db, building_id, period_start, period_end)
+    if "error" not in summary:
+        await mrv_cache.set_summary(key, summary)
+    return summary
+
+def _savings_summary(
+    period: str, baseline_kwh: float, actual_kwh: float, factor_val: float, actual_co2_kg: float
+) -> Dict[str, Any]:
     savings_kwh = max(0, baseline_kwh - actual_kwh)
     co2_saved_kg = savings_kwh * factor_val
     credits_estimated = co2_saved_kg / 1000.0 # 1 Credit = 1 Ton
 
     return {
-        "period": period_str,
+        "period": period,
         "baseline_kwh": baseline_kwh,
         "actual_kwh": actual_kwh,
+        "actual_co2_kg": actual_co2_kg,
         "savings_kwh": savings_kwh,
         "emission_factor": factor_val,
         "co2_saved_kg": co2_saved_kg,
         "credits_estimated": credits_estimated
     }
+
+async def stream_portfolio_savings(
+    db: AsyncSession,
+    user_id: UUID4,
+    period_start: datetime,
+    period_end: datetime,
+    building_ids: Optional[List[UUID4]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    calculate_savings for many buildings at once: one set-based query (consumption and
+    CO2 per building, latest baseline) streamed row by row, however many buildings are
+    requested. Only buildings owned by `user_id` are included; building_ids=None means
+    all of them.
+    """
+    period_str = period_start.strftime("%Y-%m")
+    # Fallback factors are looked up in memory while the result is streaming.
+    await emission_factor_index.ensure_loaded(db)
+
+    owned = select(Building.id).filter(Building.user_id == user_id)
+    if building_ids is not None:
+        owned = owned.filter(Building.id.in_(building_ids))
+
+    # Latest baseline per building for the period.
+    baselines = (
+        select(BaselineHistory.building_id, BaselineHistory.adjusted_kwh)
+        .filter(BaselineHistory.building_id.in_(owned), BaselineHistory.period == period_str)
+        .distinct(BaselineHistory.building_id)
+        .order_by(BaselineHistory.building_id, BaselineHistory.created_at.desc())
+        .subquery("baseline")
+    )
+    quality = data_quality_service.period_quality(owned, period_start, period_end)
+    query = (
+        select(Building.id, Building.region_id, baselines.c.adjusted_kwh,
+               quality.c.severity, func.coalesce(quality.c.missing_pct, literal(0.0)),
+               func.coalesce(quality.c.interpolated_kwh, literal(0.0)))
+        .outerjoin(baselines, baselines.c.building_id == Building.id)
+        .outerjoin(quality, quality.c.building_id == Building.id)
+        .filter(Building.id.in_(owned))
+        .order_by(Building.id)
+    )
+    emissions = carbon_service.emissions_by_building(owned, period_start, period_end)
+    if emissions is not None:
+        query = query.add_columns(
+            func.coalesce(emissions.c.kwh, literal(0.0)), func.coalesce(emissions.c.co2_kg, literal(0.0))
+        ).outerjoin(emissions, emissions.c.building_id == Building.id)
+    else:
+        query = query.add_columns(literal(0.0), literal(0.0))
+
+    seen = set()
+    result = await db.stream(query)
+    async for building_id, region_id, baseline_kwh, severity, missing_pct, interpolated_kwh, actual_kwh, actual_co2_kg in result:
+        seen.add(building_id)
+        status = data_quality_service.status_of(severity)
+        if status == DataQualityStatus.REJECTED:
+            yield {"building_id": str(building_id), "error": _rejected_message(period_start, period_end, missing_pct)}
+            continue
+        if baseline_kwh is None:
+            yield {"building_id": str(building_id), "error": f"No baseline found for period {period_str}"}
+            continue
+        actual_kwh, actual_co2_kg = float(actual_kwh), float(actual_co2_kg)
+        factor_val = _effective_factor(region_id or DEFAULT_REGION_ID, actual_kwh, actual_co2_kg, period_start)
+        actual_kwh, actual_co2_kg = _with_interpolated(actual_kwh, actual_co2_kg, float(interpolated_kwh), factor_val)
+        summary = _savings_summary(period_str, baseline_kwh, actual_kwh, factor_val, actual_co2_kg)
+        yield {"building_id": str(building_id), **summary, **_quality_fields(status, float(missing_pct))}
+
+    for building_id in dict.fromkeys(building_ids or []):
+        if building_id not in seen:
+            yield {"building_id": str(building_id), "error": "Building not found"}
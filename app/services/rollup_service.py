@@ -0,0 +1,300 @@
+from typing import Any, Callable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy import Float, Select, Subquery, Table, cast, func, literal, select, text, union_all
+from pydantic import UUID4
+import numpy as np
+
+from app.core.config import settings
+from app.models.meter import MeterReading
+from app.models.rollup import meter_readings_hourly, meter_readings_daily, meter_readings_monthly
+from app.schemas.meter import SeriesAggregate, SeriesFill, SeriesInterval
+
+# Buckets are aligned in UTC (time_bucket on timestamptz).
+
+# Refresh policies look back 3 days (hourly rollup); readings older than this need an explicit refresh.
+BACKFILL_REFRESH_AGE = timedelta(days=2)
+
+def as_utc(value: datetime) -> datetime:
+    # Naive datetimes from query strings are taken as UTC.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def floor_month(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+def _ceil(value: datetime, floor: Callable[[datetime], datetime], step: Callable[[datetime], datetime]) -> datetime:
+    floored = floor(value)
+    return floored if floored == value else step(floored)
+
+def _floor_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+# Coarsest first: (rollup, floor to bucket, next bucket start)
+LEVELS: List[Tuple[Table, Callable[[datetime], datetime], Callable[[datetime], datetime]]] = [
+    (meter_readings_monthly, floor_month, lambda v: add_months(v, 1)),
+    (meter_readings_daily, _floor_day, lambda v: v + timedelta(days=1)),
+    (meter_readings_hourly, _floor_hour, lambda v: v + timedelta(hours=1)),
+]
+
+# Hourly resolution only, for joins against hourly series (e.g. emission intensity).
+HOURLY_LEVELS = LEVELS[-1:]
+
+def split_range(start: datetime, end: datetime, levels=LEVELS) -> List[Tuple[Optional[Table], datetime, datetime]]:
+    """
+    Cover the half-open range [start, end) with as few rollup buckets as possible:
+    whole months from the monthly rollup, then whole days / hours at the edges, and raw
+    readings (table None) only for sub-hour remainders. A query touches O(months) rows.
+    """
+    segments: List[Tuple[Optional[Table], datetime, datetime]] = []
+
+    def cover(lo: datetime, hi: datetime, level: int) -> None:
+        if lo >= hi:
+            return
+        if level == len(levels):
+            segments.append((None, lo, hi))
+            return
+        table, floor, step = levels[level]
+        first, last = _ceil(lo, floor, step), floor(hi)
+        if first < last:
+            segments.append((table, first, last))
+            cover(lo, first, level + 1)
+            cover(last, hi, level + 1)
+        else:
+            cover(lo, hi, level + 1)
+
+    cover(as_utc(start), as_utc(end), 0)
+    return segments
+
+def _consumption_parts(
+    period_start: datetime, period_end: datetime, building_filter: Callable[[Any], Any], levels=LEVELS
+) -> List[Select]:
+    # Inclusive end, as the raw-reading query it replaces.
+    end = as_utc(period_end) + timedelta(microseconds=1)
+    parts = []
+    for table, lo, hi in split_range(period_start, end, levels):
+        if table is None:
+            building, kwh, time = MeterReading.building_id, MeterReading.value_kwh, MeterReading.time
+            bucket = func.time_bucket(text("INTERVAL '1 hour'"), time)
+        else:
+            building, kwh, time = table.c.building_id, table.c.sum_kwh, table.c.bucket
+            bucket = time
+        parts.append(
+            select(building.label("building_id"), bucket.label("bucket"), kwh.label("kwh"))
+            .where(building_filter(building), time >= lo, time < hi)
+        )
+    return parts
+
+async def get_consumption_kwh(
+    db: AsyncSession, building_id: UUID4, period_start: datetime, period_end: datetime
+) -> float:
+    """
+    Total kWh for readings with period_start <= time <= period_end, read from the rollups.
+    """
+    parts = _consumption_parts(period_start, period_end, lambda column: column == building_id)
+    if not parts:
+        return 0.0
+
+    segments = union_all(*parts).subquery()
+    result = await db.execute(select(func.coalesce(func.sum(segments.c.kwh), literal(0.0))))
+    return float(result.scalar_one())
+
+def consumption_by_building(building_ids: Select, period_start: datetime, period_end: datetime) -> Optional[Subquery]:
+    """
+    Subquery of (building_id, kwh) for every building in `building_ids` with readings
+    in period_start <= time <= period_end; same rollup decomposition as get_consumption_kwh.
+    """
+    parts = _consumption_parts(period_start, period_end, lambda column: column.in_(building_ids))
+    if not parts:
+        return None
+    segments = union_all(*parts).subquery()
+    return (
+        select(segments.c.building_id, func.sum(segments.c.kwh).label("kwh"))
+        .group_by(segments.c.building_id)
+        .subquery("consumption")
+    )
+
+def hourly_consumption(building_ids: Select, period_start: datetime, period_end: datetime) -> Optional[Subquery]:
+    """
+    Subquery of (building_id, bucket, kwh) per hour for period_start <= time <= period_end:
+    the hourly rollup for whole hours, raw readings bucketed by hour at the edges.
+    Buckets cut by the period edges appear once per side.
+    """
+    parts = _consumption_parts(
+        period_start, period_end, lambda column: column.in_(building_ids), levels=HOURLY_LEVELS
+    )
+    if not parts:
+        return None
+    return union_all(*parts).subquery("hourly")
+
+async def get_monthly_consumption(
+    db: AsyncSession, building_id: UUID4, months: int = 12, before: Optional[datetime] = None
+) -> List[Tuple[datetime, float]]:
+    """
+    Latest `months` complete calendar months (bucket, kWh), newest first.
+    Months at or after `before` (default: the current month) are excluded.
+    """
+    cutoff = floor_month(as_utc(before or datetime.now(timezone.utc)))
+    result = await db.execute(
+        select(meter_readings_monthly.c.bucket, meter_readings_monthly.c.sum_kwh)
+        .where(
+            meter_readings_monthly.c.building_id == building_id,
+            meter_readings_monthly.c.bucket < cutoff,
+        )
+        .order_by(meter_readings_monthly.c.bucket.desc())
+        .limit(months)
+    )
+    return [(bucket, float(kwh)) for bucket, kwh in result.all()]
+
+async def monthly_consumption_matrix(
+    db: AsyncSession, months: int = 12, before: Optional[datetime] = None,
+    building_ids: Optional[Select] = None,
+) -> Tuple[List[Any], List[datetime], np.ndarray]:
+    """
+    The `months` complete calendar months before `before` (default: the current month)
+    for all buildings with readings, in one query against the monthly rollup.
+    Returns (building IDs, month buckets oldest first, kWh array of shape
+    (buildings, months) with NaN where a building has no readings in a month).
+    """
+    cutoff = floor_month(as_utc(before or datetime.now(timezone.utc)))
+    buckets = [add_months(cutoff, i - months) for i in range(months)]
+    query = (
+        select(meter_readings_monthly.c.building_id, meter_readings_monthly.c.bucket, meter_readings_monthly.c.sum_kwh)
+        .where(meter_readings_monthly.c.bucket >= buckets[0], meter_readings_monthly.c.bucket < cutoff)
+        .order_by(meter_readings_monthly.c.building_id, meter_readings_monthly.c.bucket)
+    )
+    if building_ids is not None:
+        query = query.where(meter_readings_monthly.c.building_id.in_(building_ids))
+    rows = (await db.execute(query)).all()
+
+    ids: List[Any] = []
+    positions = {}
+    column = {bucket: i for i, bucket in enumerate(buckets)}
+    row_index = np.empty(len(rows), dtype=np.int64)
+    col_index = np.empty(len(rows), dtype=np.int64)
+    values = np.empty(len(rows), dtype=np.float64)
+    for i, (building_id, bucket, kwh) in enumerate(rows):
+        if building_id not in positions:
+            positions[building_id] = len(ids)
+            ids.append(building_id)
+        row_index[i] = positions[building_id]
+        col_index[i] = column[as_utc(bucket)]
+        values[i] = kwh
+    matrix = np.full((len(ids), months), np.nan)
+    matrix[row_index, col_index] = values
+    return ids, buckets, matrix
+
+def _floor_15m(value: datetime) -> datetime:
+    return value.replace(minute=value.minute - value.minute % 15, second=0, microsecond=0)
+
+# interval -> (SQL interval, rollup to read or None for raw readings, floor, next bucket start).
+# The bucket width always matches the source's resolution, so every bucket is complete.
+SERIES_INTERVALS = {
+    SeriesInterval.MINUTES_15: ("INTERVAL '15 minutes'", None, _floor_15m, lambda v: v + timedelta(minutes=15)),
+    SeriesInterval.HOUR: ("INTERVAL '1 hour'",) + LEVELS[2],
+    SeriesInterval.DAY: ("INTERVAL '1 day'",) + LEVELS[1],
+    SeriesInterval.MONTH: ("INTERVAL '1 month'",) + LEVELS[0],
+}
+
+def series_buckets(interval: SeriesInterval, start: datetime, end: datetime) -> Tuple[datetime, datetime, int]:
+    """
+    Widen [start, end) to whole buckets of `interval`; returns (start, end, bucket count).
+    """
+    _, _, floor, step = SERIES_INTERVALS[interval]
+    lo, hi = floor(as_utc(start)), _ceil(as_utc(end), floor, step)
+    count, bucket = 0, lo
+    while bucket < hi and count <= settings.SERIES_MAX_POINTS:
+        bucket, count = step(bucket), count + 1
+    return lo, hi, count
+
+def _series_aggregate(source: Optional[Table], aggregate: SeriesAggregate):
+    if source is None:
+        value = MeterReading.value_kwh
+        return {
+            SeriesAggregate.SUM: func.sum(value),
+            SeriesAggregate.AVG: func.avg(value),
+            SeriesAggregate.MIN: func.min(value),
+            SeriesAggregate.MAX: func.max(value),
+        }[aggregate]
+    # Re-aggregating a rollup: avg is per reading, not an average of bucket averages.
+    return {
+        SeriesAggregate.SUM: func.sum(source.c.sum_kwh),
+        SeriesAggregate.AVG: func.sum(source.c.sum_kwh) / func.nullif(cast(func.sum(source.c.reading_count), Float), 0),
+        SeriesAggregate.MIN: func.min(source.c.min_kwh),
+        SeriesAggregate.MAX: func.max(source.c.max_kwh),
+    }[aggregate]
+
+async def get_series(
+    db: AsyncSession,
+    building_id: UUID4,
+    interval: SeriesInterval,
+    aggregate: SeriesAggregate,
+    fill: SeriesFill,
+    start: datetime,
+    end: datetime,
+) -> List[Tuple[datetime, Optional[float]]]:
+    """
+    Readings aggregated into `interval` buckets (UTC) over [start, end) widened to whole
+    buckets, oldest first. 15m buckets come from raw readings, coarser ones from the
+    matching rollup. Gap filling (time_bucket_gapfill with locf / interpolate) runs in
+    the database. Raises ValueError if the range spans more than SERIES_MAX_POINTS buckets.
+    """
+    lo, hi, count = series_buckets(interval, start, end)
+    if count > settings.SERIES_MAX_POINTS:
+        raise ValueError(f"Range spans more than {settings.SERIES_MAX_POINTS} {interval.value} buckets")
+
+    width, source, _, _ = SERIES_INTERVALS[interval]
+    if source is None:
+        building, time = MeterReading.building_id, MeterReading.time
+    else:
+        building, time = source.c.building_id, source.c.bucket
+
+    if fill == SeriesFill.NONE:
+        bucket = func.time_bucket(text(width), time)
+    else:
+        # Explicit bounds so leading and trailing empty buckets are generated too.
+        bucket = func.time_bucket_gapfill(text(width), time, lo, hi)
+    value = _series_aggregate(source, aggregate)
+    if fill == SeriesFill.ZERO:
+        value = func.coalesce(value, literal(0.0))
+    elif fill == SeriesFill.LOCF:
+        value = func.locf(value)
+    elif fill == SeriesFill.INTERPOLATE:
+        value = func.interpolate(value)
+
+    bucket = bucket.label("bucket")
+    result = await db.execute(
+        select(bucket, value.label("value"))
+        .where(building == building_id, time >= lo, time < hi)
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    return [(row.bucket, None if row.value is None else float(row.value)) for row in result]
+
+def needs_backfill_refresh(earliest: datetime) -> bool:
+    return as_utc(earliest) < datetime.now(timezone.utc) - BACKFILL_REFRESH_AGE
+
+async def refresh_rollups(engine: AsyncEngine, start: datetime, end: datetime) -> None:
+    """
+    Materialize the rollups for a backfilled time range. Refresh policies only look back
+    a few days, so older readings (e.g. a CSV of last year's data) need this once.
+    The window is widened to whole months so every level covers complete buckets.
+    """
+    window_start = floor_month(as_utc(start))
+    window_end = add_months(floor_month(as_utc(end)), 1)
+    # refresh_continuous_aggregate cannot run inside a transaction block, and CALL takes
+    # no bind parameters here; the literals are timestamps we formatted ourselves.
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # Finest level first: daily is built from hourly, monthly from daily.
+        for table, _, _ in reversed(LEVELS):
+            await conn.execute(text(
+                f"CALL refresh_continuous_aggregate('{table.name}', "
+                f"'{window_start.isoformat()}'::timestamptz, '{window_end.isoformat()}'::timestamptz)"
+            ))
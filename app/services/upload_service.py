@@ -0,0 +1,136 @@
+import hashlib
+import os
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.storage import get_upload_store
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst uploads
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+class UploadTooLargeError(ValueError):
+    pass
+
+@dataclass
+class StoredUpload:
+    key: str
+    sha256: str
+    size: int
+    duplicate: bool
+
+class _EmitWriter:
+    # File-like target for zstandard's stream_writer.
+    def __init__(self, emit):
+        self.write = emit
+
+class _UploadSink:
+    """
+    Synchronous half of the upload pipeline: decompress, hash, size-check and write.
+    Each call runs in the threadpool so the event loop never touches the disk.
+    """
+    def __init__(self, directory: str, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.decompressor = None
+        self.compression: Optional[str] = None
+        self.started = False
+        self.tmp_path = os.path.join(directory, f".{uuid.uuid4()}.part")
+        self.file = open(self.tmp_path, "wb")
+
+    def _detect_compression(self, head: bytes) -> None:
+        if head.startswith(GZIP_MAGIC):
+            self.compression = "gzip"
+            self.decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        elif head.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                raise ValueError("zstd-compressed uploads require the 'zstandard' package")
+            self.compression = "zstd"
+            # Decompressed output is pushed to _emit in bounded pieces, like the gzip path.
+            self.decompressor = zstandard.ZstdDecompressor().stream_writer(
+                _EmitWriter(self._emit), write_size=settings.UPLOAD_CHUNK_BYTES
+            )
+
+    def _emit(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds the {self.max_bytes} byte limit")
+        self.digest.update(data)
+        self.file.write(data)
+
+    def write(self, chunk: bytes) -> None:
+        if not self.started:
+            self._detect_compression(chunk)
+            self.started = True
+
+        if self.compression is None:
+            self._emit(chunk)
+        elif self.compression == "gzip":
+            # Bounded output per step guards against decompression bombs.
+            data = self.decompressor.decompress(chunk, settings.UPLOAD_CHUNK_BYTES)
+            self._emit(data)
+            while self.decompressor.unconsumed_tail:
+                data = self.decompressor.decompress(self.decompressor.unconsumed_tail, settings.UPLOAD_CHUNK_BYTES)
+                self._emit(data)
+        else:
+            self.decompressor.write(chunk)
+
+    def finish(self) -> str:
+        if self.compression == "gzip":
+            self._emit(self.decompressor.flush())
+            if not self.decompressor.eof:
+                raise ValueError("Truncated gzip upload")
+        elif self.compression == "zstd":
+            self.decompressor.flush()
+        self.file.close()
+        return self.digest.hexdigest()
+
+    def discard(self) -> None:
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+UPLOAD_PREFIX = "meter-uploads/"
+# Uploads whose ingestion failed are moved here, out of the content-addressed keys, so
+# they stay available for inspection and re-uploading the same file is ingested again.
+FAILED_UPLOAD_PREFIX = "meter-uploads-failed/"
+
+def upload_key(building_id: str, sha256: str) -> str:
+    return f"{UPLOAD_PREFIX}{building_id}/{sha256}.csv"
+
+def failed_upload_key(key: str) -> str:
+    return FAILED_UPLOAD_PREFIX + key.removeprefix(UPLOAD_PREFIX)
+
+async def save_upload(file: UploadFile, building_id: str) -> StoredUpload:
+    """
+    Stream an upload into the upload store in chunks without blocking the event loop.
+
+    Gzip/zstd payloads are decompressed on the fly. The decompressed content is
+    size-limited (UPLOAD_MAX_BYTES) and hashed while being spooled to local disk,
+    then handed to the store under a content-addressed key; it only becomes
+    visible there once fully written. Identical content for the same building
+    still waiting for ingestion is reported as a duplicate.
+    """
+    await run_in_threadpool(os.makedirs, settings.UPLOAD_SPOOL_DIR, exist_ok=True)
+
+    sink = await run_in_threadpool(_UploadSink, settings.UPLOAD_SPOOL_DIR, settings.UPLOAD_MAX_BYTES)
+    try:
+        while chunk := await file.read(settings.UPLOAD_CHUNK_BYTES):
+            await run_in_threadpool(sink.write, chunk)
+        sha256 = await run_in_threadpool(sink.finish)
+    except Exception:
+        await run_in_threadpool(sink.discard)
+        raise
+
+    key = upload_key(building_id, sha256)
+    created = await run_in_threadpool(get_upload_store().put_file, sink.tmp_path, key)
+    return StoredUpload(key=key, sha256=sha256, size=sink.size, duplicate=not created)
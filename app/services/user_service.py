@@ -1,18 +1,32 @@
-from typing import Optional, Union
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash, verify_password
+from app.core.cache import build_cache
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.core.security import get_password_hash_async, verify_password_async
+
+# Short-TTL cache of authenticated users, keyed by token subject (email).
+# Password hashes are never cached.
+_user_cache = build_cache("user", settings.USER_CACHE_BACKEND, max_entries=settings.USER_CACHE_MAX_ENTRIES)
+USER_CACHE_REQUESTS = REGISTRY.counter("user_cache_requests_total", "Authenticated user cache lookups.", ("result",))
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     result = await db.execute(select(User).filter(User.email == email))
     return result.scalars().first()
 
+async def get_user(db: AsyncSession, user_id: uuid.UUID) -> Optional[User]:
+    result = await db.execute(select(User).filter(User.id == user_id))
+    return result.scalars().first()
+
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
     db_user = User(
         email=user.email,
-        password_hash=get_password_hash(user.password),
+        password_hash=await get_password_hash_async(user.password),
         role=user.role,
         is_active=user.is_active
     )
@@ -25,6 +39,57 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> Opti
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
     return user
+
+def _user_snapshot(user: User) -> Dict[str, Any]:
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "role": user.role,
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+    }
+
+def _user_from_snapshot(snapshot: Dict[str, Any]) -> User:
+    # Transient instance, not attached to any session.
+    return User(
+        id=uuid.UUID(snapshot["id"]),
+        email=snapshot["email"],
+        role=snapshot["role"],
+        is_active=snapshot["is_active"],
+        created_at=datetime.fromisoformat(snapshot["created_at"]) if snapshot["created_at"] else None,
+    )
+
+async def get_user_by_email_cached(db: AsyncSession, email: str) -> Optional[User]:
+    """
+    Resolve a token subject without a DB round-trip while the cached entry is fresh
+    (USER_CACHE_TTL_SECONDS). Use get_user_by_email when the password hash is needed.
+    """
+    snapshot = await _user_cache.get(email)
+    if snapshot is not None:
+        USER_CACHE_REQUESTS.inc(result="hit")
+        return _user_from_snapshot(snapshot)
+
+    USER_CACHE_REQUESTS.inc(result="miss")
+    user = await get_user_by_email(db, email)
+    if user:
+        await _user_cache.set(email, _user_snapshot(user), ttl=settings.USER_CACHE_TTL_SECONDS)
+    return user
+
+async def invalidate_cached_user(email: str) -> None:
+    await _user_cache.delete(email)
+
+async def set_user_active(db: AsyncSession, user: User, is_active: bool) -> User:
+    """
+    Activate/deactivate a user. The cache entry is dropped so a deactivated user is
+    rejected on the next request (with the memory backend, other processes may
+    still accept it until their entry expires).
+    """
+    user.is_active = is_active
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    await invalidate_cached_user(user.email)
+    return user
@@ -0,0 +1,201 @@
+import calendar
+from datetime import datetime, timezone
+from typing import IO, Any, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.models.building import Building
+from app.models.weather import WeatherObservation, weather_daily, weather_monthly
+from app.services.rollup_service import add_months, as_utc, floor_month
+
+# Offline weather files -> weather_observations, and degree days for baseline normalization.
+# HDD/CDD (base 18 °C) are computed by the weather_daily / weather_monthly continuous
+# aggregates (migration e5b2c7d9a413); this module only reads them.
+
+Source = Union[str, IO]
+
+# Rows per upsert statement when importing.
+IMPORT_CHUNK_ROWS = 10000
+
+# A month's degree days are used only if at least this share of its days has observations.
+MIN_MONTH_COVERAGE = 0.9
+
+# NOAA ISD-Lite: whitespace separated, one hourly observation per line. Columns are
+# year, month, day, hour, air temperature (°C x 10), dew point, pressure, wind ...;
+# -9999 marks a missing value. Files may be gzipped (the format NOAA publishes).
+ISD_LITE_COLUMNS = ["year", "month", "day", "hour", "temperature"]
+ISD_LITE_MISSING = -9999
+
+def read_isd_lite(source: Source) -> pd.DataFrame:
+    """
+    (time, temperature_c) frame from an ISD-Lite file; missing temperatures are NaN.
+    """
+    frame = pd.read_csv(
+        source, sep=r"\s+", header=None, usecols=range(len(ISD_LITE_COLUMNS)),
+        names=ISD_LITE_COLUMNS, na_values=[ISD_LITE_MISSING], compression="infer",
+    )
+    times = pd.to_datetime(frame[["year", "month", "day", "hour"]], utc=True, errors="coerce")
+    return pd.DataFrame({"time": times, "temperature_c": frame["temperature"] / 10.0})
+
+def read_weather_csv(source: Source) -> pd.DataFrame:
+    """
+    (time, temperature_c) frame from a CSV with a `timestamp` column (naive = UTC) and a
+    `temperature_c` or `temperature_f` column.
+    """
+    frame = pd.read_csv(source, dtype={"timestamp": str}, compression="infer")
+    if "timestamp" not in frame.columns:
+        raise ValueError("Weather CSV needs a 'timestamp' column")
+    if "temperature_c" in frame.columns:
+        temperature = pd.to_numeric(frame["temperature_c"], errors="coerce")
+    elif "temperature_f" in frame.columns:
+        temperature = (pd.to_numeric(frame["temperature_f"], errors="coerce") - 32.0) * 5.0 / 9.0
+    else:
+        raise ValueError("Weather CSV needs a 'temperature_c' or 'temperature_f' column")
+    times = pd.to_datetime(frame["timestamp"], utc=True, errors="coerce", format="ISO8601")
+    return pd.DataFrame({"time": times, "temperature_c": temperature})
+
+READERS = {
+    "isd": read_isd_lite,
+    "csv": read_weather_csv,
+}
+
+def observation_rows(station_id: str, frame: pd.DataFrame, source: Optional[str]) -> Tuple[List[dict], int]:
+    """
+    Rows for weather_observations from a (time, temperature_c) frame, and the number of
+    rejected observations (unparseable time, missing or implausible temperature).
+    """
+    temperature = frame["temperature_c"].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = frame["time"].notna().to_numpy() & np.isfinite(temperature)
+    valid[valid] &= np.abs(temperature[valid]) <= 90.0
+    # Duplicate timestamps within a file: keep the last, like the upsert would.
+    deduped = frame.loc[valid].drop_duplicates("time", keep="last")
+    rows = [
+        {"station_id": station_id, "time": time, "temperature_c": value, "source": source}
+        for time, value in zip(deduped["time"].dt.to_pydatetime(), deduped["temperature_c"].tolist())
+    ]
+    return rows, len(frame) - len(rows)
+
+async def upsert_observations(db: AsyncSession, rows: List[dict]) -> int:
+    stmt = insert(WeatherObservation)
+    for lo in range(0, len(rows), IMPORT_CHUNK_ROWS):
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[WeatherObservation.station_id, WeatherObservation.time],
+                set_={"temperature_c": stmt.excluded.temperature_c, "source": stmt.excluded.source},
+            ),
+            rows[lo:lo + IMPORT_CHUNK_ROWS],
+        )
+    await db.commit()
+    return len(rows)
+
+async def refresh_degree_days(engine: AsyncEngine, start: datetime, end: datetime) -> None:
+    """
+    Materialize weather_daily / weather_monthly for an imported time range, widened to
+    whole months. Like rollup_service.refresh_rollups, this runs outside a transaction.
+    """
+    window_start = floor_month(as_utc(start))
+    window_end = add_months(floor_month(as_utc(end)), 1)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in (weather_daily, weather_monthly):
+            await conn.execute(text(
+                f"CALL refresh_continuous_aggregate('{table.name}', "
+                f"'{window_start.isoformat()}'::timestamptz, '{window_end.isoformat()}'::timestamptz)"
+            ))
+
+async def import_weather_file(
+    db: AsyncSession, engine: AsyncEngine, station_id: str, source: Source,
+    file_format: str = "isd", source_label: Optional[str] = None,
+) -> dict:
+    """
+    Import one offline weather file for a station and refresh the degree day aggregates
+    for the months it covers. Re-importing a file overwrites its observations.
+    """
+    if file_format not in READERS:
+        raise ValueError(f"Unknown weather file format '{file_format}' (expected one of {', '.join(READERS)})")
+    frame = READERS[file_format](source)
+    rows, rejected = observation_rows(station_id, frame, source_label or file_format)
+    summary = {"station_id": station_id, "imported": 0, "rejected": rejected, "start": None, "end": None}
+    if not rows:
+        return summary
+
+    summary["imported"] = await upsert_observations(db, rows)
+    start, end = min(row["time"] for row in rows), max(row["time"] for row in rows)
+    await refresh_degree_days(engine, start, end)
+    summary.update(start=start.isoformat(), end=end.isoformat())
+    return summary
+
+def _days_in_month(bucket: datetime) -> int:
+    return calendar.monthrange(bucket.year, bucket.month)[1]
+
+async def monthly_degree_days(
+    db: AsyncSession, building_ids: Sequence[Any], buckets: Sequence[datetime],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Monthly (HDD, CDD) arrays of shape (len(building_ids), len(buckets)) for the
+    buildings' weather stations, in one query. NaN where a building has no station or its
+    station covers less than MIN_MONTH_COVERAGE of the month.
+    """
+    hdd = np.full((len(building_ids), len(buckets)), np.nan)
+    cdd = np.full_like(hdd, np.nan)
+    if not len(building_ids) or not len(buckets):
+        return hdd, cdd
+
+    buckets = [as_utc(bucket) for bucket in buckets]
+    result = await db.execute(
+        select(Building.id, weather_monthly.c.bucket, weather_monthly.c.hdd, weather_monthly.c.cdd,
+               weather_monthly.c.observation_count)
+        .join(weather_monthly, weather_monthly.c.station_id == Building.weather_station_id)
+        .where(
+            Building.id.in_(building_ids),
+            weather_monthly.c.bucket >= min(buckets),
+            weather_monthly.c.bucket <= max(buckets),
+        )
+    )
+    rows = {building_id: i for i, building_id in enumerate(building_ids)}
+    columns = {bucket: i for i, bucket in enumerate(buckets)}
+    for building_id, bucket, month_hdd, month_cdd, days in result.all():
+        bucket = as_utc(bucket)
+        if bucket not in columns or days < MIN_MONTH_COVERAGE * _days_in_month(bucket):
+            continue
+        hdd[rows[building_id], columns[bucket]] = month_hdd
+        cdd[rows[building_id], columns[bucket]] = month_cdd
+    return hdd, cdd
+
+async def normal_degree_days(
+    db: AsyncSession, building_ids: Sequence[Any], years: int = 10, before: Optional[datetime] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Long-term mean monthly (HDD, CDD) per building over the `years` years of complete
+    months before `before` (default: the current month), i.e. the normal weather a
+    baseline is normalized to. NaN for buildings without enough station history.
+    """
+    normal_hdd = np.full(len(building_ids), np.nan)
+    normal_cdd = np.full_like(normal_hdd, np.nan)
+    if not len(building_ids):
+        return normal_hdd, normal_cdd
+
+    cutoff = floor_month(as_utc(before or datetime.now(timezone.utc)))
+    # Days in the bucket's month, for the coverage check.
+    days = func.extract("day", weather_monthly.c.bucket + literal_column("INTERVAL '1 month'") - literal_column("INTERVAL '1 day'"))
+    result = await db.execute(
+        select(Building.id, func.avg(weather_monthly.c.hdd), func.avg(weather_monthly.c.cdd), func.count())
+        .join(weather_monthly, weather_monthly.c.station_id == Building.weather_station_id)
+        .where(
+            Building.id.in_(building_ids),
+            weather_monthly.c.bucket >= add_months(cutoff, -12 * years),
+            weather_monthly.c.bucket < cutoff,
+            weather_monthly.c.observation_count >= MIN_MONTH_COVERAGE * days,
+        )
+        .group_by(Building.id)
+    )
+    rows = {building_id: i for i, building_id in enumerate(building_ids)}
+    for building_id, mean_hdd, mean_cdd, months in result.all():
+        # At least one full year, so every calendar month is represented.
+        if months >= 12:
+            normal_hdd[rows[building_id]] = mean_hdd
+            normal_cdd[rows[building_id]] = mean_cdd
+    return normal_hdd, normal_cdd
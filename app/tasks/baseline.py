@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import uuid
+from typing import Any, Dict, Optional, Tuple
+from celery.result import AsyncResult
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.cache import RedisCache, build_cache
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.schemas.baseline import BaselineJob, BaselineMethod, BaselineRequest
+from app.services.baseline_engine import OUTLIER_THRESHOLD_PCT
+from app.services import baseline_stats_service
+from app.services.baseline_service import BaselineService
+from app.tasks import runtime
+
+logger = logging.getLogger(__name__)
+
+# "dedupe:<fingerprint>" -> job ID while a job for that exact request is queued or running;
+# "job:<id>" -> building ID for every job enqueued through enqueue_baseline_job.
+# The worker releases locks the API took, so the cache has to be shared between processes.
+# Built on first use, so importing this module does not need redis.
+_jobs: Optional[RedisCache] = None
+
+def _job_cache() -> RedisCache:
+    global _jobs
+    if _jobs is None:
+        if settings.BASELINE_JOB_CACHE_BACKEND != "redis":
+            raise RuntimeError("BASELINE_JOB_CACHE_BACKEND must be 'redis' (locks are released by the Celery worker)")
+        _jobs = build_cache("baseline-jobs", settings.BASELINE_JOB_CACHE_BACKEND)
+    return _jobs
+
+JOB_STATUS = {
+    "PENDING": "queued",
+    "RECEIVED": "queued",
+    "RETRY": "queued",
+    "STARTED": "running",
+    "SUCCESS": "succeeded",
+    "FAILURE": "failed",
+    "REVOKED": "failed",
+}
+
+def request_fingerprint(request: BaselineRequest) -> str:
+    # Identical requests (same building, method and input months) share one job.
+    return hashlib.sha256(request.model_dump_json().encode()).hexdigest()
+
+async def calculate_baseline_async(request: BaselineRequest, session_factory: async_sessionmaker) -> Dict[str, Any]:
+    async with session_factory() as db:
+        response = await BaselineService(db).calculate_baseline(request)
+    return response.model_dump(mode="json")
+
+async def _release(dedupe_key: str, job_id: str) -> None:
+    # Only drop the lock if it still points at this job.
+    jobs = _job_cache()
+    if await jobs.get(dedupe_key) == job_id:
+        await jobs.delete(dedupe_key)
+
+@celery_app.task(bind=True, name="calculate_baseline", track_started=True)
+def calculate_baseline(self, request: Dict[str, Any], dedupe_key: str):
+    """
+    Run BaselineService.calculate_baseline on the worker. The result is the BaselineResponse
+    as JSON; a ValueError (e.g. no readings) fails the job with its message.
+    """
+    try:
+        return runtime.run(calculate_baseline_async(
+            BaselineRequest.model_validate(request), runtime.get_session_factory()
+        ))
+    finally:
+        runtime.run(_release(dedupe_key, self.request.id))
+
+async def enqueue_baseline_job(request: BaselineRequest) -> Tuple[str, bool]:
+    """
+    Enqueue a baseline calculation; returns (job ID, deduplicated). While an identical
+    request is queued or running, its job ID is returned instead of enqueueing another.
+    """
+    dedupe_key = f"dedupe:{request_fingerprint(request)}"
+    job_id = str(uuid.uuid4())
+    jobs = _job_cache()
+    for _ in range(3):
+        if await jobs.add(dedupe_key, job_id, ttl=settings.BASELINE_JOB_DEDUPE_TTL_SECONDS):
+            await jobs.set(f"job:{job_id}", str(request.building_id), ttl=settings.BASELINE_JOB_TTL_SECONDS)
+            calculate_baseline.apply_async(args=[request.model_dump(mode="json"), dedupe_key], task_id=job_id)
+            return job_id, False
+        existing = await jobs.get(dedupe_key)
+        if existing is not None:
+            return existing, True
+        # The running job finished between add and get; try to take the lock again.
+    raise RuntimeError("Could not enqueue baseline job")
+
+def baseline_job_status(job_id: str, known: bool) -> Optional[BaselineJob]:
+    """
+    Current state of a job from the Celery result backend (blocking; call from a thread).
+    Returns None for IDs that were never enqueued (`known` is False and Celery has no state).
+    """
+    result = AsyncResult(job_id, app=celery_app)
+    state = result.state
+    if state == "PENDING" and not known:
+        return None
+    job = BaselineJob(job_id=job_id, status=JOB_STATUS.get(state, state.lower()))
+    if state == "SUCCESS":
+        job.result = result.result
+    elif state in ("FAILURE", "REVOKED"):
+        job.error = str(result.result)
+    return job
+
+async def is_known_job(job_id: str) -> bool:
+    return await _job_cache().get(f"job:{job_id}") is not None
+
+async def recalculate_baselines_async(
+    method: BaselineMethod, threshold_pct: float, session_factory: async_sessionmaker
+) -> Dict[str, Any]:
+    async with session_factory() as db:
+        return await BaselineService(db).recalculate_baselines(method, threshold_pct)
+
+@celery_app.task(name="recalculate_baselines")
+def recalculate_baselines(method: str = BaselineMethod.HISTORICAL_12_MONTHS.value,
+                          threshold_pct: float = OUTLIER_THRESHOLD_PCT):
+    """
+    Recompute every building's baseline in bulk; returns counts, timings and buildings/sec.
+    """
+    stats = runtime.run(recalculate_baselines_async(
+        BaselineMethod(method), threshold_pct, runtime.get_session_factory()
+    ))
+    logger.info("recalculated %(baselines_written)s baselines in %(seconds)ss (%(buildings_per_second)s buildings/sec)", stats)
+    return stats
+
+async def rebuild_baseline_stats_async(session_factory: async_sessionmaker) -> Dict[str, int]:
+    async with session_factory() as db:
+        return await baseline_stats_service.rebuild_maintained(db)
+
+@celery_app.task(name="rebuild_baseline_stats")
+def rebuild_baseline_stats():
+    """
+    Rebuild every maintained baseline's stats from the rollups and weather (monthly beat
+    schedule): picks up late degree days and resets drift of the incremental sums.
+    """
+    stats = runtime.run(rebuild_baseline_stats_async(runtime.get_session_factory()))
+    logger.info("rebuilt baseline stats of %(buildings_updated)s buildings, %(baselines_written)s baselines written", stats)
+    return stats
@@ -0,0 +1,30 @@
+import logging
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.celery_app import celery_app
+from app.services import baseline_stats_service, data_quality_service
+from app.tasks import runtime
+
+logger = logging.getLogger(__name__)
+
+async def assess_data_quality_async(pairs: Optional[List[List[str]]], session_factory: async_sessionmaker) -> Dict[str, Any]:
+    async with session_factory() as db:
+        if pairs is None:
+            pairs = await data_quality_service.previous_month_pairs(db)
+        pairs = [tuple(pair) for pair in pairs]
+        statuses = await data_quality_service.assess_months(db, pairs)
+        # Quality feeds the maintained baselines, so they are folded in afterwards.
+        window_months = baseline_stats_service.window_months(pairs)
+        baselines = await baseline_stats_service.apply_rollup_changes(db, window_months) if window_months else {}
+        return {"statuses": statuses, "baselines": baselines}
+
+@celery_app.task(name="assess_data_quality")
+def assess_data_quality(pairs: Optional[List[List[str]]] = None):
+    """
+    Assess the data quality of changed months ([building_id, YYYY-MM] pairs; months not
+    ended yet are skipped) and fold them into the maintained baselines. Without pairs,
+    every building's previous month is assessed (the monthly beat schedule).
+    """
+    summary = runtime.run(assess_data_quality_async(pairs, runtime.get_session_factory()))
+    logger.info("assessed data quality: %s", summary)
+    return summary
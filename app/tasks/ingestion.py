@@ -1,43 +1,111 @@
-import asyncio
+import logging
 import pandas as pd
 import uuid
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from app.core.celery_app import celery_app
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
-from app.services import meter_service
-from app.schemas.meter import MeterReadingCreate, DataSource
+from app.core.storage import get_upload_store
+from app.services import baseline_stats_service, data_quality_service, meter_service, mrv_cache, rollup_service, upload_service
+from app.schemas.meter import DataSource
+from app.tasks import runtime
 
-async def process_csv_async(file_path: str, building_id: str):
+logger = logging.getLogger(__name__)
+
+# Expected Headers: timestamp, kwh
+CSV_COLUMNS = ["timestamp", "kwh"]
+
+async def process_csv_async(
+    upload_key: str,
+    building_id: str,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    session_factory: async_sessionmaker = AsyncSessionLocal,
+) -> Dict[str, Any]:
+    """
+    Stream a meter CSV from the upload store into the database in bounded chunks.
+
+    Each chunk of CSV_CHUNK_ROWS rows is validated column-wise, copied in and
+    committed on its own, so memory stays constant regardless of file size.
+    The upload is deleted from the store once it has been fully ingested, or moved to
+    its failed-upload key if ingestion fails.
+    """
+    summary = {"chunks": 0, "inserted": 0, "rejected": 0}
+    earliest = latest = None
+    months = set()
+    store = get_upload_store()
     try:
-        # 1. Read CSV
-        df = pd.read_csv(file_path)
-        
-        # 2. Normalize columns (Simple assumption: timestamp, value)
-        # Expected Headers: timestamp, kwh
-        if 'timestamp' not in df.columns or 'kwh' not in df.columns:
-            print(f"Invalid CSV format in {file_path}")
-            return
-            
-        readings = []
-        for _, row in df.iterrows():
-            readings.append(MeterReadingCreate(
-                time=pd.to_datetime(row['timestamp']),
-                building_id=uuid.UUID(building_id),
-                value_kwh=float(row['kwh']),
-                source=DataSource.CSV,
-                meta_data={"filename": file_path}
-            ))
-
-        # 3. Insert Batch
-        async with AsyncSessionLocal() as db:
-            count = await meter_service.create_meter_readings_batch(db, readings)
-            print(f"Successfully inserted {count} readings from {file_path}")
-
-    except Exception as e:
-        print(f"Error processing CSV {file_path}: {e}")
-
-@celery_app.task(name="process_meter_csv")
-def process_meter_csv(file_path: str, building_id: str):
+        building_uuid = uuid.UUID(building_id)
+
+        # 1. Read, validate and insert chunk by chunk straight from the store
+        async with session_factory() as db:
+            with store.open(upload_key) as stream, pd.read_csv(
+                stream,
+                dtype={"timestamp": str},
+                chunksize=settings.CSV_CHUNK_ROWS,
+            ) as reader:
+                for chunk in reader:
+                    if not set(CSV_COLUMNS).issubset(chunk.columns):
+                        raise ValueError(f"Invalid CSV format (expected columns {', '.join(CSV_COLUMNS)})")
+
+                    records, rejected = meter_service.build_reading_records(
+                        building_uuid, chunk["timestamp"], chunk["kwh"], DataSource.CSV
+                    )
+                    if records:
+                        summary["inserted"] += await meter_service.copy_meter_readings(db, records)
+                        await db.commit()
+                        await mrv_cache.invalidate_readings(records)
+                        months |= mrv_cache.readings_months(records)
+                        chunk_start, chunk_end = meter_service.records_time_range(records)
+                        earliest = min(earliest or chunk_start, chunk_start)
+                        latest = max(latest or chunk_end, chunk_end)
+
+                    summary["chunks"] += 1
+                    summary["rejected"] += rejected
+                    if on_progress:
+                        on_progress(dict(summary))
+
+            # 2. Historical data lands behind the rollup refresh policies; materialize it now
+            if earliest and rollup_service.needs_backfill_refresh(earliest):
+                await rollup_service.refresh_rollups(db.bind, earliest, latest)
+
+            # 3. Reassess the data quality of completed months, then fold the months in the
+            #    maintained baseline window into the baseline stats
+            complete_months = data_quality_service.complete_months(months)
+            if complete_months:
+                summary["data_quality"] = await data_quality_service.assess_months(db, complete_months)
+            window_months = baseline_stats_service.window_months(months)
+            if window_months:
+                summary["baselines"] = await baseline_stats_service.apply_rollup_changes(db, window_months)
+
+        logger.info(
+            "inserted %d readings from %s (%d chunks, %d rejected rows)",
+            summary["inserted"], upload_key, summary["chunks"], summary["rejected"],
+        )
+
+        # 4. Cleanup
+        store.delete(upload_key)
+
+    except Exception:
+        logger.exception("error processing CSV %s", upload_key)
+        # Kept for inspection under another key; the content-addressed key is freed so
+        # uploading the file again is not reported as a duplicate.
+        try:
+            store.move(upload_key, upload_service.failed_upload_key(upload_key))
+        except Exception:
+            logger.exception("could not move failed upload %s", upload_key)
+
+    return summary
+
+@celery_app.task(bind=True, name="process_meter_csv")
+def process_meter_csv(self, upload_key: str, building_id: str):
     """
-    Wrapper to run async ingestion in Celery.
+    Wrapper to run async ingestion in Celery, on the worker's persistent loop and pool.
+    Progress is reported per chunk as PROGRESS task state.
     """
-    asyncio.run(process_csv_async(file_path, building_id))
+    def report(progress: Dict[str, Any]) -> None:
+        self.update_state(state="PROGRESS", meta=progress)
+
+    return runtime.run(process_csv_async(
+        upload_key, building_id, on_progress=report, session_factory=runtime.get_session_factory()
+    ))
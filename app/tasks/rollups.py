@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any, Sequence
+from celery import chain
+from app.core.celery_app import celery_app
+from app.services import data_quality_service, meter_service, mrv_cache, rollup_service
+from app.tasks import runtime
+from app.tasks.data_quality import assess_data_quality
+
+@celery_app.task(name="refresh_meter_rollups")
+def refresh_meter_rollups(start: str, end: str):
+    """
+    Materialize the hourly/daily/monthly rollups after readings were backfilled into [start, end].
+    """
+    runtime.run(rollup_service.refresh_rollups(
+        runtime.get_engine(), datetime.fromisoformat(start), datetime.fromisoformat(end)
+    ))
+
+def schedule_rollup_refresh(records: Sequence[Sequence[Any]]) -> None:
+    """
+    Backfilled readings are older than the rollup refresh policies look; refresh them in the background.
+    Completed months are then reassessed for data quality and folded into the baseline stats.
+    Passed as `on_written` to the meter_service write paths.
+    """
+    time_range = meter_service.records_time_range(records)
+    months = data_quality_service.complete_months(mrv_cache.readings_months(records))
+    backfill = time_range and rollup_service.needs_backfill_refresh(time_range[0])
+    if backfill and months:
+        chain(
+            refresh_meter_rollups.si(time_range[0].isoformat(), time_range[1].isoformat()),
+            assess_data_quality.si(months),
+        ).delay()
+    elif backfill:
+        refresh_meter_rollups.delay(time_range[0].isoformat(), time_range[1].isoformat())
+    elif months:
+        assess_data_quality.delay(months)
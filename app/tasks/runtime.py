@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+from celery.signals import task_prerun, worker_process_init, worker_process_shutdown
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from app.core.database import build_engine, build_session_factory
+from app.core.instrumentation import set_endpoint_label
+
+T = TypeVar("T")
+
+# One event loop and one connection pool per worker process.
+# Pooled asyncpg connections are bound to the loop that opened them, so every
+# task in this process must run on _loop instead of a fresh asyncio.run() loop.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+_lock = threading.Lock()
+
+def init_runtime() -> None:
+    global _loop, _engine, _session_factory
+    if _loop is not None:
+        return
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    _engine = build_engine(role="worker")
+    _session_factory = build_session_factory(_engine)
+
+def shutdown_runtime() -> None:
+    global _loop, _engine, _session_factory
+    if _loop is None:
+        return
+    try:
+        _loop.run_until_complete(_engine.dispose())
+    finally:
+        _loop.close()
+        _loop = _engine = _session_factory = None
+
+def get_engine() -> AsyncEngine:
+    init_runtime()
+    return _engine
+
+def get_session_factory() -> async_sessionmaker:
+    init_runtime()
+    return _session_factory
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine on the worker's persistent loop.
+    Initialised lazily for pools that don't fire worker_process_init (solo, threads);
+    the lock serialises tasks when the threads pool shares one process.
+    """
+    with _lock:
+        init_runtime()
+        return _loop.run_until_complete(coro)
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs) -> None:
+    global _loop, _engine, _session_factory
+    # A forked child must not reuse a loop or pool inherited from the parent.
+    _loop = _engine = _session_factory = None
+    init_runtime()
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs) -> None:
+    shutdown_runtime()
+
+@task_prerun.connect
+def _on_task_prerun(task=None, **kwargs) -> None:
+    # Label SQL metrics with the task; run() copies this context into the coroutine.
+    set_endpoint_label(f"task:{task.name}" if task else None)
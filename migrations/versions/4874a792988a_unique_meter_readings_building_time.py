@@ -0,0 +1,38 @@
+"""unique index on meter_readings (building_id, time)
+
+Revision ID: 4874a792988a
+Revises: 561297abc2e5
+Create Date: 2026-10-18 17:45:02.114530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4874a792988a'
+down_revision: Union[str, None] = '561297abc2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The hypertable was created without a primary key, so re-sent batches may have
+    # produced duplicates. Keep one row per (building_id, time) before enforcing uniqueness.
+    # Duplicates share a timestamp, so they always live in the same chunk (tableoid).
+    op.execute("""
+        DELETE FROM meter_readings a
+        USING meter_readings b
+        WHERE a.building_id = b.building_id
+          AND a.time = b.time
+          AND a.tableoid = b.tableoid
+          AND a.ctid < b.ctid
+    """)
+    # Unique indexes on a hypertable must include the partitioning column (time).
+    op.create_index('ix_meter_readings_building_id_time', 'meter_readings', ['building_id', 'time'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_meter_readings_building_id_time', table_name='meter_readings')
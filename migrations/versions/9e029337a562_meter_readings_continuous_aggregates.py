@@ -0,0 +1,94 @@
+"""continuous aggregates for meter_readings (hourly, daily, monthly)
+
+Revision ID: 9e029337a562
+Revises: 4874a792988a
+Create Date: 2026-10-18 17:47:44.602911
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e029337a562'
+down_revision: Union[str, None] = '4874a792988a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Hierarchical rollups: daily is built from hourly, monthly from daily.
+# materialized_only = false keeps not-yet-refreshed data visible (real-time aggregation).
+ROLLUPS = [
+    (
+        "meter_readings_hourly",
+        """
+        SELECT building_id,
+               time_bucket(INTERVAL '1 hour', time) AS bucket,
+               sum(value_kwh) AS sum_kwh,
+               count(*) AS reading_count,
+               min(value_kwh) AS min_kwh,
+               max(value_kwh) AS max_kwh
+        FROM meter_readings
+        GROUP BY building_id, time_bucket(INTERVAL '1 hour', time)
+        """,
+        "INTERVAL '3 days'", "INTERVAL '1 hour'", "INTERVAL '30 minutes'",
+    ),
+    (
+        "meter_readings_daily",
+        """
+        SELECT building_id,
+               time_bucket(INTERVAL '1 day', bucket) AS bucket,
+               sum(sum_kwh) AS sum_kwh,
+               sum(reading_count) AS reading_count,
+               min(min_kwh) AS min_kwh,
+               max(max_kwh) AS max_kwh
+        FROM meter_readings_hourly
+        GROUP BY building_id, time_bucket(INTERVAL '1 day', bucket)
+        """,
+        "INTERVAL '7 days'", "INTERVAL '1 day'", "INTERVAL '1 hour'",
+    ),
+    (
+        "meter_readings_monthly",
+        """
+        SELECT building_id,
+               time_bucket(INTERVAL '1 month', bucket) AS bucket,
+               sum(sum_kwh) AS sum_kwh,
+               sum(reading_count) AS reading_count,
+               min(min_kwh) AS min_kwh,
+               max(max_kwh) AS max_kwh
+        FROM meter_readings_daily
+        GROUP BY building_id, time_bucket(INTERVAL '1 month', bucket)
+        """,
+        "INTERVAL '3 months'", "INTERVAL '1 day'", "INTERVAL '1 day'",
+    ),
+]
+
+
+def upgrade() -> None:
+    # Continuous aggregates cannot be created inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, query, start_offset, end_offset, schedule in ROLLUPS:
+            op.execute(f"""
+                CREATE MATERIALIZED VIEW {name}
+                WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+                {query}
+                WITH NO DATA
+            """)
+            op.execute(f"CREATE INDEX ix_{name}_building_id_bucket ON {name} (building_id, bucket DESC)")
+            op.execute(f"""
+                SELECT add_continuous_aggregate_policy('{name}',
+                    start_offset => {start_offset},
+                    end_offset => {end_offset},
+                    schedule_interval => {schedule})
+            """)
+            # Materialize existing history once; policies only look back start_offset.
+            op.execute(f"CALL refresh_continuous_aggregate('{name}', NULL, NULL)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, *_ in reversed(ROLLUPS):
+            op.execute(f"SELECT remove_continuous_aggregate_policy('{name}', if_exists => true)")
+            op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {name}")
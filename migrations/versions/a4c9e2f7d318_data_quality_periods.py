@@ -0,0 +1,42 @@
+"""data_quality_periods: monitoring quality per building and month
+
+Revision ID: a4c9e2f7d318
+Revises: f8a3d6b1c902
+Create Date: 2026-10-18 20:58:03.641577
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c9e2f7d318'
+down_revision: Union[str, None] = 'f8a3d6b1c902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The primary key (building_id, period_start) serves the per-building range lookups of
+    # MRV and baselines.
+    op.create_table('data_quality_periods',
+        sa.Column('building_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('period_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expected_hours', sa.Integer(), nullable=False),
+        sa.Column('missing_hours', sa.Integer(), nullable=False),
+        sa.Column('missing_pct', sa.Float(), nullable=False),
+        sa.Column('longest_gap_hours', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('measured_kwh', sa.Float(), nullable=False),
+        sa.Column('interpolated_kwh', sa.Float(), nullable=False),
+        sa.Column('assessed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['building_id'], ['buildings.id'], ),
+        sa.PrimaryKeyConstraint('building_id', 'period_start')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('data_quality_periods')
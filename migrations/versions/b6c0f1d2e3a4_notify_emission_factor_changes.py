@@ -0,0 +1,40 @@
+"""notify on emission_factors changes
+
+Revision ID: b6c0f1d2e3a4
+Revises: 9e029337a562
+Create Date: 2026-10-18 18:20:11.402318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6c0f1d2e3a4'
+down_revision: Union[str, None] = '9e029337a562'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # API processes cache the whole table and reload it when notified (NOTIFY is sent on commit).
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_emission_factors_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('emission_factors_changed', TG_OP);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER emission_factors_changed
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON emission_factors
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_emission_factors_changed()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS emission_factors_changed ON emission_factors")
+    op.execute("DROP FUNCTION IF EXISTS notify_emission_factors_changed()")
@@ -0,0 +1,51 @@
+"""time-resolved emission factors: validity windows, hourly intensity, building region
+
+Revision ID: c3d8e5a1f927
+Revises: b6c0f1d2e3a4
+Create Date: 2026-10-18 18:41:37.220964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8e5a1f927'
+down_revision: Union[str, None] = 'b6c0f1d2e3a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Annual / monthly factors: a validity window per row (valid_to exclusive, NULL = open-ended).
+    op.add_column('emission_factors', sa.Column('valid_from', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('emission_factors', sa.Column('valid_to', sa.DateTime(timezone=True), nullable=True))
+    op.execute("""
+        UPDATE emission_factors
+        SET valid_from = make_timestamptz(year, 1, 1, 0, 0, 0, 'UTC'),
+            valid_to = make_timestamptz(year + 1, 1, 1, 0, 0, 0, 'UTC')
+    """)
+    op.alter_column('emission_factors', 'valid_from', nullable=False)
+    op.create_index('ix_emission_factors_region_id_valid_from', 'emission_factors', ['region_id', 'valid_from'], unique=False)
+
+    # Hourly (e.g. marginal) intensity series; takes precedence over the factor windows.
+    op.create_table('emission_intensity',
+        sa.Column('region_id', sa.String(), nullable=False),
+        sa.Column('time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('kg_per_kwh', sa.Float(), nullable=False),
+        sa.Column('source', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('region_id', 'time')
+    )
+    op.execute("SELECT create_hypertable('emission_intensity', 'time', chunk_time_interval => INTERVAL '90 days');")
+
+    op.add_column('buildings', sa.Column('region_id', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('buildings', 'region_id')
+    op.drop_table('emission_intensity')
+    op.drop_index('ix_emission_factors_region_id_valid_from', table_name='emission_factors')
+    op.drop_column('emission_factors', 'valid_to')
+    op.drop_column('emission_factors', 'valid_from')
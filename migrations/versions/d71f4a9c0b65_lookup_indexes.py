@@ -0,0 +1,54 @@
+"""composite / unique indexes for baseline, emission factor and building lookups
+
+Revision ID: d71f4a9c0b65
+Revises: c3d8e5a1f927
+Create Date: 2026-10-18 19:05:52.817340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd71f4a9c0b65'
+down_revision: Union[str, None] = 'c3d8e5a1f927'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # get_baseline (building_id, period, latest first), get_baselines (building_id prefix)
+    # and the portfolio DISTINCT ON (building_id) ... ORDER BY created_at DESC.
+    op.create_index(
+        'ix_baseline_history_building_id_period_created_at', 'baseline_history',
+        ['building_id', 'period', sa.text('created_at DESC')], unique=False
+    )
+
+    # A factor is identified by region and start of validity (several monthly factors
+    # may share a year). Concurrent creates could have inserted duplicates; keep one.
+    op.execute("""
+        DELETE FROM emission_factors a
+        USING emission_factors b
+        WHERE a.region_id = b.region_id
+          AND a.valid_from = b.valid_from
+          AND a.ctid < b.ctid
+    """)
+    op.drop_index('ix_emission_factors_region_id_valid_from', table_name='emission_factors')
+    op.create_index('ix_emission_factors_region_id_valid_from', 'emission_factors', ['region_id', 'valid_from'], unique=True)
+    op.create_index('ix_emission_factors_region_id_year', 'emission_factors', ['region_id', 'year'], unique=False)
+    # Both composites lead with region_id.
+    op.drop_index('ix_emission_factors_region_id', table_name='emission_factors')
+
+    # get_user_buildings and the portfolio ownership filter.
+    op.create_index('ix_buildings_user_id', 'buildings', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_buildings_user_id', table_name='buildings')
+    op.create_index('ix_emission_factors_region_id', 'emission_factors', ['region_id'], unique=False)
+    op.drop_index('ix_emission_factors_region_id_year', table_name='emission_factors')
+    op.drop_index('ix_emission_factors_region_id_valid_from', table_name='emission_factors')
+    op.create_index('ix_emission_factors_region_id_valid_from', 'emission_factors', ['region_id', 'valid_from'], unique=False)
+    op.drop_index('ix_baseline_history_building_id_period_created_at', table_name='baseline_history')
@@ -0,0 +1,98 @@
+"""weather observations hypertable, daily / monthly degree day aggregates, building weather station
+
+Revision ID: e5b2c7d9a413
+Revises: d71f4a9c0b65
+Create Date: 2026-10-18 19:42:10.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c7d9a413'
+down_revision: Union[str, None] = 'd71f4a9c0b65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Degree day base temperature (°C), the usual 18 °C / 65 °F.
+BASE_C = 18.0
+
+# Daily degree days from the daily mean temperature; monthly is built from daily.
+# Imports are offline backfills (the importer refreshes the range it wrote), so the
+# policies only pick up late observations for recent days.
+ROLLUPS = [
+    (
+        "weather_daily",
+        f"""
+        SELECT station_id,
+               time_bucket(INTERVAL '1 day', time) AS bucket,
+               avg(temperature_c) AS avg_temperature_c,
+               greatest({BASE_C} - avg(temperature_c), 0) AS hdd,
+               greatest(avg(temperature_c) - {BASE_C}, 0) AS cdd,
+               count(*) AS observation_count
+        FROM weather_observations
+        GROUP BY station_id, time_bucket(INTERVAL '1 day', time)
+        """,
+        "INTERVAL '7 days'", "INTERVAL '1 day'", "INTERVAL '1 hour'",
+    ),
+    (
+        "weather_monthly",
+        """
+        SELECT station_id,
+               time_bucket(INTERVAL '1 month', bucket) AS bucket,
+               avg(avg_temperature_c) AS avg_temperature_c,
+               sum(hdd) AS hdd,
+               sum(cdd) AS cdd,
+               count(*) AS observation_count
+        FROM weather_daily
+        GROUP BY station_id, time_bucket(INTERVAL '1 month', bucket)
+        """,
+        "INTERVAL '3 months'", "INTERVAL '1 day'", "INTERVAL '1 day'",
+    ),
+]
+
+
+def upgrade() -> None:
+    op.create_table('weather_observations',
+        sa.Column('station_id', sa.String(), nullable=False),
+        sa.Column('time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('temperature_c', sa.Float(), nullable=False),
+        sa.Column('source', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('station_id', 'time')
+    )
+    op.execute("SELECT create_hypertable('weather_observations', 'time', chunk_time_interval => INTERVAL '1 year');")
+
+    op.add_column('buildings', sa.Column('weather_station_id', sa.String(), nullable=True))
+    op.create_index('ix_buildings_weather_station_id', 'buildings', ['weather_station_id'], unique=False)
+
+    # Continuous aggregates cannot be created inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, query, start_offset, end_offset, schedule in ROLLUPS:
+            op.execute(f"""
+                CREATE MATERIALIZED VIEW {name}
+                WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+                {query}
+                WITH NO DATA
+            """)
+            # Baseline jobs join (station_id, bucket) ranges for many buildings at once.
+            op.execute(f"CREATE INDEX ix_{name}_station_id_bucket ON {name} (station_id, bucket DESC)")
+            op.execute(f"""
+                SELECT add_continuous_aggregate_policy('{name}',
+                    start_offset => {start_offset},
+                    end_offset => {end_offset},
+                    schedule_interval => {schedule})
+            """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, *_ in reversed(ROLLUPS):
+            op.execute(f"SELECT remove_continuous_aggregate_policy('{name}', if_exists => true)")
+            op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {name}")
+    op.drop_index('ix_buildings_weather_station_id', table_name='buildings')
+    op.drop_column('buildings', 'weather_station_id')
+    op.drop_table('weather_observations')
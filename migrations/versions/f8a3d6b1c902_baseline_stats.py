@@ -0,0 +1,44 @@
+"""baseline_stats: running statistics for incrementally maintained baselines
+
+Revision ID: f8a3d6b1c902
+Revises: e5b2c7d9a413
+Create Date: 2026-10-18 20:16:48.119204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8a3d6b1c902'
+down_revision: Union[str, None] = 'e5b2c7d9a413'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows are created on a building's first baseline calculation.
+    op.create_table('baseline_stats',
+        sa.Column('building_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('method', sa.String(), nullable=False),
+        sa.Column('threshold_pct', sa.Float(), nullable=False),
+        sa.Column('window_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('monthly_kwh', postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column('monthly_hdd', postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column('monthly_cdd', postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column('kwh_count', sa.Integer(), nullable=False),
+        sa.Column('kwh_sum', sa.Float(), nullable=False),
+        sa.Column('regression_xtx', postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column('regression_xty', postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column('regression_yty', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['building_id'], ['buildings.id'], ),
+        sa.PrimaryKeyConstraint('building_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('baseline_stats')
@@ -0,0 +1,30 @@
+import argparse
+import asyncio
+import json
+from datetime import datetime, timezone
+from sqlalchemy import select
+from app.core.database import AsyncSessionLocal
+from app.models.building import Building
+from app.services import baseline_stats_service, data_quality_service
+from app.services.rollup_service import add_months, floor_month
+
+# Assess the data quality of every building's last N complete months, e.g. after
+# deploying the data quality engine on existing readings:
+#   python -m scripts.assess_data_quality --months 24
+# New readings are assessed by ingestion and the "assess_data_quality" Celery task.
+
+async def assess(args) -> dict:
+    current = floor_month(datetime.now(timezone.utc))
+    months = [add_months(current, -i).strftime("%Y-%m") for i in range(1, args.months + 1)]
+    async with AsyncSessionLocal() as db:
+        building_ids = [str(building_id) for building_id in (await db.execute(select(Building.id))).scalars()]
+        pairs = [(building_id, month) for building_id in building_ids for month in months]
+        statuses = await data_quality_service.assess_months(db, pairs)
+        window_months = baseline_stats_service.window_months(pairs)
+        baselines = await baseline_stats_service.apply_rollup_changes(db, window_months) if window_months else {}
+    return {"buildings": len(building_ids), "months": len(months), "statuses": statuses, "baselines": baselines}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assess the data quality of past months for every building.")
+    parser.add_argument("--months", type=int, default=12, help="complete months to assess, counting back from the current one")
+    print(json.dumps(asyncio.run(assess(parser.parse_args())), indent=2))
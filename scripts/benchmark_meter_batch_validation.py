@@ -0,0 +1,57 @@
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+from pydantic import TypeAdapter
+from app.schemas.meter import MeterReadingCreate, MeterReadingColumnarBatch
+from app.services import meter_service
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+INTERVAL = timedelta(minutes=15)
+
+def make_payloads(rows: int, buildings: int):
+    building_ids = [str(uuid.uuid4()) for _ in range(buildings)]
+    per_building = rows // buildings
+    times = [(START + i * INTERVAL).isoformat() for i in range(per_building)]
+    values = [10.0 + (i % 96) * 0.5 for i in range(per_building)]
+
+    list_payload = [
+        {"time": t, "building_id": b, "value_kwh": v, "source": "API"}
+        for b in building_ids
+        for t, v in zip(times, values)
+    ]
+    columnar_payload = {
+        "source": "API",
+        "series": [{"building_id": b, "timestamps": times, "values_kwh": values} for b in building_ids],
+    }
+    return json.dumps(list_payload), json.dumps(columnar_payload)
+
+def list_of_objects(body: str) -> int:
+    # What POST /meters/batch does: one model per reading, then one tuple per model.
+    readings = TypeAdapter(List[MeterReadingCreate]).validate_json(body)
+    return len(meter_service.readings_to_records(readings))
+
+def columnar(body: str) -> int:
+    batch = MeterReadingColumnarBatch.model_validate_json(body)
+    records, _ = meter_service.columnar_batch_to_records(batch)
+    return len(records)
+
+def run(rows: int, buildings: int, repeat: int):
+    list_body, columnar_body = make_payloads(rows, buildings)
+    for name, parse, body in (("list-of-objects", list_of_objects, list_body), ("columnar", columnar, columnar_body)):
+        best = float("inf")
+        for _ in range(repeat):
+            began = time.perf_counter()
+            count = parse(body)
+            best = min(best, time.perf_counter() - began)
+        print(f"{name:<16} {count:>8} rows  {len(body) / 1e6:6.2f} MB  best {best * 1000:8.1f} ms  ({count / best:,.0f} rows/sec)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare validation cost of meter batch payload formats.")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--buildings", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.buildings, args.repeat)
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, delete
+from app.core.database import AsyncSessionLocal
+from app.models.building import Building
+from app.models.meter import MeterReading, DataSource
+from app.services import meter_service
+
+# Synthetic readings are written far in the past so they never collide with real data.
+ORM_START = datetime(1990, 1, 1, tzinfo=timezone.utc)
+COPY_START = datetime(1995, 1, 1, tzinfo=timezone.utc)
+INTERVAL = timedelta(minutes=15)
+
+def synthetic_records(building_id, start: datetime, rows: int):
+    return [
+        (start + i * INTERVAL, building_id, 10.0 + (i % 96) * 0.5, DataSource.API.value)
+        for i in range(rows)
+    ]
+
+async def orm_insert(session, records) -> int:
+    # The previous create_meter_readings_batch implementation.
+    session.add_all([
+        MeterReading(time=t, building_id=b, value_kwh=v, source=s)
+        for t, b, v, s in records
+    ])
+    await session.commit()
+    return len(records)
+
+async def copy_insert(session, records) -> int:
+    count = await meter_service.copy_meter_readings(session, records)
+    await session.commit()
+    return count
+
+async def cleanup(session, building_id, start: datetime, rows: int):
+    await session.execute(delete(MeterReading).where(
+        MeterReading.building_id == building_id,
+        MeterReading.time >= start,
+        MeterReading.time < start + rows * INTERVAL
+    ))
+    await session.commit()
+
+async def run(rows: int):
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(Building))
+        building = result.scalars().first()
+        if not building:
+            print("No building found.")
+            return
+
+        for name, insert, start in (("ORM add_all", orm_insert, ORM_START), ("COPY + merge", copy_insert, COPY_START)):
+            records = synthetic_records(building.id, start, rows)
+            began = time.perf_counter()
+            count = await insert(session, records)
+            elapsed = time.perf_counter() - began
+            print(f"{name:<14} {count:>8} rows in {elapsed:7.3f}s  ({count / elapsed:,.0f} rows/sec)")
+            await cleanup(session, building.id, start, rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ORM and COPY ingestion throughput.")
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows))
@@ -0,0 +1,33 @@
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from app.core.database import AsyncSessionLocal, engine
+from app.services import baseline_stats_service, weather_service
+
+# Import offline weather files into weather_observations and refresh the degree day
+# aggregates for the months they cover, e.g. NOAA ISD-Lite yearly files for a station:
+#   python -m scripts.import_weather 724940-23234 724940-23234-2023.gz 724940-23234-2024.gz
+#   python -m scripts.import_weather KSFO temps.csv --format csv
+# Buildings pick up the station via buildings.weather_station_id; maintained baselines of
+# those buildings are updated for the imported months.
+
+async def main(args) -> None:
+    async with AsyncSessionLocal() as db:
+        for path in args.files:
+            summary = await weather_service.import_weather_file(
+                db, engine, args.station_id, path, args.format, source_label=args.source
+            )
+            if summary["imported"]:
+                summary["baselines"] = await baseline_stats_service.apply_weather_changes(
+                    db, args.station_id, datetime.fromisoformat(summary["start"]), datetime.fromisoformat(summary["end"])
+                )
+            print(json.dumps({"file": path, **summary}))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import offline weather observations for a station.")
+    parser.add_argument("station_id", help="e.g. the ISD 'USAF-WBAN' identifier")
+    parser.add_argument("files", nargs="+", help="ISD-Lite (optionally gzipped) or CSV files")
+    parser.add_argument("--format", choices=sorted(weather_service.READERS), default="isd")
+    parser.add_argument("--source", default=None, help="source label stored with the observations (default: the format)")
+    asyncio.run(main(parser.parse_args()))
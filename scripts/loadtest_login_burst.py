@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+# Measures how a burst of logins affects the latency of another endpoint on the same API.
+# Run against a live server with an existing user, e.g.:
+#   python -m scripts.loadtest_login_burst --email user@example.com --password secret
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(name: str, samples) -> None:
+    if not samples:
+        print(f"{name:<22} no samples")
+        return
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{name:<22} n={len(ms):<5} p50={statistics.median(ms):7.1f} ms  "
+        f"p99={percentile(ms, 99):7.1f} ms  max={max(ms):7.1f} ms"
+    )
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, samples: list, interval: float):
+    while not stop.is_set():
+        began = time.perf_counter()
+        await client.get(path)
+        samples.append(time.perf_counter() - began)
+        await asyncio.sleep(interval)
+
+async def login(client: httpx.AsyncClient, email: str, password: str, samples: list):
+    began = time.perf_counter()
+    await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    samples.append(time.perf_counter() - began)
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0) as client:
+        # 1. Baseline probe latency
+        stop = asyncio.Event()
+        baseline = []
+        task = asyncio.create_task(probe(client, args.probe_path, stop, baseline, args.probe_interval))
+        await asyncio.sleep(args.warmup)
+        stop.set()
+        await task
+
+        # 2. Probe latency while logins are hammering the server
+        stop = asyncio.Event()
+        during, logins = [], []
+        task = asyncio.create_task(probe(client, args.probe_path, stop, during, args.probe_interval))
+        began = time.perf_counter()
+        await asyncio.gather(*(login(client, args.email, args.password, logins) for _ in range(args.logins)))
+        elapsed = time.perf_counter() - began
+        stop.set()
+        await task
+
+    report(f"{args.probe_path} idle", baseline)
+    report(f"{args.probe_path} burst", during)
+    report("login", logins)
+    print(f"{args.logins} logins in {elapsed:.2f}s ({args.logins / elapsed:.1f} logins/sec)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login burst vs. other-endpoint latency.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--probe-path", default="/health")
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,56 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from app.core.database import AsyncSessionLocal
+from app.schemas.baseline import BaselineMethod
+from app.services import baseline_engine
+from app.services.baseline_service import BaselineService
+
+# Portfolio-wide baseline recalculation, e.g. after a methodology or threshold change:
+#   python -m scripts.recalculate_baselines --method historical_12_months --processes 4
+# The same work runs on the workers as the "recalculate_baselines" Celery task.
+#
+# --synthetic N skips the database and times the engine alone on N random buildings:
+#   python -m scripts.recalculate_baselines --synthetic 100000 --processes 4
+
+async def recalculate(args) -> dict:
+    async with AsyncSessionLocal() as db:
+        return await BaselineService(db).recalculate_baselines(
+            args.method, args.threshold, processes=args.processes, batch_size=args.batch_size
+        )
+
+def synthetic(args) -> dict:
+    rng = np.random.default_rng(0)
+    shape = (args.synthetic, 12)
+    hdd, cdd = rng.uniform(0, 400, shape), rng.uniform(0, 200, shape)
+    occupancy = rng.uniform(50, 100, shape)
+    kwh = rng.uniform(500, 5000, (args.synthetic, 1)) + 2 * hdd + 3 * cdd + rng.normal(0, 50, shape)
+    kwh[rng.random(shape) < 0.05] = np.nan
+
+    started = time.perf_counter()
+    baseline_engine.compute_baselines_chunked(
+        args.method, kwh, args.batch_size or 5000, args.processes or 1, args.threshold,
+        hdd=hdd, cdd=cdd, occupancy=occupancy,
+    )
+    elapsed = time.perf_counter() - started
+    return {
+        "method": args.method.value,
+        "buildings": args.synthetic,
+        "compute_seconds": round(elapsed, 3),
+        "buildings_per_second": round(args.synthetic / elapsed, 1),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalculate the baseline of every building in bulk.")
+    parser.add_argument("--method", type=BaselineMethod, default=BaselineMethod.HISTORICAL_12_MONTHS)
+    parser.add_argument("--threshold", type=float, default=baseline_engine.OUTLIER_THRESHOLD_PCT,
+                        help="outlier threshold as a fraction of the mean")
+    parser.add_argument("--processes", type=int, default=None, help="default: BASELINE_RECALC_PROCESSES")
+    parser.add_argument("--batch-size", type=int, default=None, help="default: BASELINE_RECALC_BATCH_SIZE")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N",
+                        help="time the engine on N synthetic buildings instead of the database")
+    args = parser.parse_args()
+    stats = synthetic(args) if args.synthetic else asyncio.run(recalculate(args))
+    print(json.dumps(stats, indent=2))
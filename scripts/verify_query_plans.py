@@ -0,0 +1,15 @@
+import os
+import sys
+import pytest
+from app.core.config import settings
+
+# Query-plan regression check against DATABASE_URL, e.g. for CI after migrations:
+#   python -m scripts.seed_meter_readings   # hypertables need at least one chunk
+#   python -m scripts.verify_query_plans [pytest options, e.g. -v]
+# The cases live in tests/test_query_plans.py (skipped unless QUERY_PLAN_DATABASE_URL is set).
+
+TESTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "test_query_plans.py")
+
+if __name__ == "__main__":
+    os.environ.setdefault("QUERY_PLAN_DATABASE_URL", settings.DATABASE_URL)
+    sys.exit(pytest.main([TESTS, *sys.argv[1:]]))
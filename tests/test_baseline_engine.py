@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from app.schemas.baseline import BaselineMethod
+from app.services import baseline_engine
+
+
+def _sample(rows=4, periods=12, seed=0):
+    rng = np.random.default_rng(seed)
+    hdd = rng.uniform(0, 400, (rows, periods))
+    cdd = rng.uniform(0, 150, (rows, periods))
+    kwh = 1000 + 1.5 * hdd + 3.0 * cdd + rng.normal(0, 40, (rows, periods))
+    return kwh, hdd, cdd
+
+
+def test_masked_mean_ignores_unmasked_and_empty_rows():
+    values = np.array([[1.0, 2.0, 100.0], [np.nan, 5.0, 7.0], [3.0, 3.0, 3.0]])
+    mask = np.array([[True, True, False], [False, True, True], [False, False, False]])
+    means = baseline_engine._masked_mean(values, mask)
+    assert means[:2] == pytest.approx([1.5, 6.0])
+    assert np.isnan(means[2])
+
+
+def test_solve_regression_matches_lstsq():
+    kwh, hdd, cdd = _sample()
+    kwh[1, 3] = np.nan
+    hdd[2, 5] = np.nan
+    drivers = np.stack([hdd, cdd], axis=2)
+    mask = np.isfinite(kwh)
+    coefficients, r_squared, fitted = baseline_engine.solve_regression(
+        *baseline_engine.regression_accumulators(kwh, drivers, mask)
+    )
+    assert fitted.all()
+    for row in range(kwh.shape[0]):
+        used = np.isfinite(kwh[row]) & np.isfinite(drivers[row]).all(axis=1)
+        design = np.column_stack([np.ones(used.sum()), drivers[row, used]])
+        expected, residuals, _, _ = np.linalg.lstsq(design, kwh[row, used], rcond=None)
+        assert coefficients[row] == pytest.approx(expected, rel=1e-8)
+        y = kwh[row, used]
+        assert r_squared[row] == pytest.approx(1 - residuals[0] / ((y - y.mean()) ** 2).sum(), rel=1e-8)
+
+
+def test_solve_regression_skips_underdetermined_rows():
+    kwh, hdd, cdd = _sample(rows=1, periods=3)
+    coefficients, r_squared, fitted = baseline_engine.fit_regression(
+        kwh, np.stack([hdd, cdd], axis=2), np.isfinite(kwh)
+    )
+    assert not fitted[0]
+    assert np.isnan(coefficients).all() and np.isnan(r_squared[0])
+
+
+def test_accumulators_add_over_disjoint_periods():
+    kwh, hdd, cdd = _sample(rows=2)
+    drivers = np.stack([hdd, cdd], axis=2)
+    first = np.zeros_like(kwh, dtype=bool)
+    first[:, :5] = True
+    whole = baseline_engine.regression_accumulators(kwh, drivers, np.ones_like(first))
+    parts = [baseline_engine.regression_accumulators(kwh, drivers, mask) for mask in (first, ~first)]
+    for total, a, b in zip(whole, *parts):
+        assert total == pytest.approx(a + b)
+
+
+@pytest.mark.parametrize("method", [
+    BaselineMethod.HISTORICAL_12_MONTHS,
+    BaselineMethod.STATIC,
+    BaselineMethod.WEATHER_NORMALIZED,
+])
+@pytest.mark.parametrize("threshold_pct", [0.05, baseline_engine.OUTLIER_THRESHOLD_PCT])
+def test_from_stats_matches_compute_baselines(method, threshold_pct):
+    kwh, hdd, cdd = _sample(rows=6)
+    kwh[0, 2] *= 3  # outlier
+    kwh[1, 4] = np.nan
+    cdd[3, 7] = np.nan
+    xtx, xty, yty = baseline_engine.regression_accumulators(kwh, np.stack([hdd, cdd], axis=2), np.isfinite(kwh))
+    normal_hdd = np.full(6, 200.0)
+    normal_cdd = np.full(6, np.nan)
+    expected = baseline_engine.compute_baselines(
+        method, kwh, hdd, cdd, normal_hdd=normal_hdd, normal_cdd=normal_cdd, threshold_pct=threshold_pct
+    )
+    actual = baseline_engine.compute_baselines_from_stats(
+        method, kwh, hdd, cdd,
+        np.isfinite(kwh).sum(axis=1), np.nansum(kwh, axis=1), xtx, xty, yty,
+        normal_hdd=normal_hdd, normal_cdd=normal_cdd, threshold_pct=threshold_pct,
+    )
+    assert actual.raw_kwh == pytest.approx(expected.raw_kwh)
+    assert actual.adjusted_kwh == pytest.approx(expected.adjusted_kwh, rel=1e-8, nan_ok=True)
+    assert (actual.periods_used == expected.periods_used).all()
+    assert (actual.weather_applied == expected.weather_applied).all()
+    if method == BaselineMethod.WEATHER_NORMALIZED:
+        assert actual.r_squared == pytest.approx(expected.r_squared, rel=1e-6, nan_ok=True)
+
+
+def test_compute_baselines_drops_outliers():
+    kwh = np.array([[100.0, 100.0, 100.0, 100.0, 400.0]])
+    batch = baseline_engine.compute_baselines(BaselineMethod.HISTORICAL_12_MONTHS, kwh)
+    assert batch.raw_kwh[0] == pytest.approx(160.0)
+    # Every period is more than 20% from the mean of 160, so all of them are kept.
+    assert batch.periods_used[0] == 5
+    kwh = np.array([[100.0, 105.0, 95.0, 100.0, 130.0]])
+    batch = baseline_engine.compute_baselines(BaselineMethod.HISTORICAL_12_MONTHS, kwh)
+    assert batch.periods_used[0] == 4
+    assert batch.adjusted_kwh[0] == pytest.approx(100.0)
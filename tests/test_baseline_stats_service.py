@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.models.baseline import BaselineStats
+from app.schemas.baseline import BaselineMethod
+from app.services import baseline_engine, baseline_stats_service
+from app.services.baseline_stats_service import STATS_MONTHS, _Window, _accumulate, _as_list
+
+
+def _stats(kwh, hdd, cdd, method=BaselineMethod.HISTORICAL_12_MONTHS, threshold_pct=0.2):
+    sums = _accumulate(kwh[None], hdd[None], cdd[None])
+    return BaselineStats(
+        method=method.value,
+        threshold_pct=threshold_pct,
+        window_start=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        monthly_kwh=_as_list(kwh),
+        monthly_hdd=_as_list(hdd),
+        monthly_cdd=_as_list(cdd),
+        kwh_count=int(sums["kwh_count"][0]),
+        kwh_sum=float(sums["kwh_sum"][0]),
+        regression_xtx=sums["regression_xtx"][0].tolist(),
+        regression_xty=sums["regression_xty"][0].tolist(),
+        regression_yty=float(sums["regression_yty"][0]),
+    )
+
+
+def _window_values(rng):
+    kwh = rng.uniform(800, 1200, STATS_MONTHS)
+    hdd = rng.uniform(0, 400, STATS_MONTHS)
+    cdd = rng.uniform(0, 150, STATS_MONTHS)
+    kwh[[2, 9]] = np.nan
+    hdd[5] = np.nan
+    return kwh, hdd, cdd
+
+
+def _assert_matches_rebuild(window):
+    expected = _accumulate(window.kwh[None], window.hdd[None], window.cdd[None])
+    assert window.count == expected["kwh_count"][0]
+    assert window.total == pytest.approx(expected["kwh_sum"][0])
+    assert window.xtx.ravel() == pytest.approx(expected["regression_xtx"][0])
+    assert window.xty == pytest.approx(expected["regression_xty"][0])
+    assert window.yty == pytest.approx(expected["regression_yty"][0])
+
+
+def test_set_month_matches_rebuilt_sums():
+    rng = np.random.default_rng(1)
+    window = _Window(_stats(*_window_values(rng)))
+    window.set_month(0, 950.0, 120.0, 10.0)     # replace a month
+    window.set_month(2, 1010.0, 80.0, 30.0)     # fill a missing month
+    window.set_month(4, np.nan, 50.0, 20.0)     # rejected month
+    window.set_month(5, 990.0, 60.0, 15.0)      # degree days arrive
+    window.set_month(7, 1005.0, np.nan, 25.0)   # degree days withdrawn
+    _assert_matches_rebuild(window)
+
+
+@pytest.mark.parametrize("months", [1, 5, STATS_MONTHS])
+def test_shift_matches_rebuilt_sums(months):
+    rng = np.random.default_rng(2)
+    window = _Window(_stats(*_window_values(rng)))
+    window.shift(months)
+    assert window.start == datetime(2025 + (months // 12), 1 + months % 12, 1, tzinfo=timezone.utc)
+    assert np.isnan(window.kwh[STATS_MONTHS - months:]).all()
+    window.set_month(STATS_MONTHS - 1, 1000.0, 100.0, 20.0)
+    _assert_matches_rebuild(window)
+
+
+def test_save_round_trips():
+    rng = np.random.default_rng(3)
+    stats = _stats(*_window_values(rng))
+    window = _Window(stats)
+    window.shift(2)
+    window.set_month(10, 1000.0, 100.0, 20.0)
+    window.save()
+    reloaded = _Window(stats)
+    assert reloaded.start == window.start
+    np.testing.assert_array_equal(reloaded.kwh, window.kwh)
+    _assert_matches_rebuild(reloaded)
+
+
+def test_evaluate_overrides_method_and_threshold_for_the_call_only():
+    kwh = np.array([100.0, 110.0, 90.0, 300.0] + [100.0] * 8)
+    empty = np.full(STATS_MONTHS, np.nan)
+    stats = _stats(kwh, empty, empty)
+    normal = np.full(1, np.nan)
+
+    (method, batch, i), = baseline_stats_service.evaluate([stats], normal, normal)
+    assert method == BaselineMethod.HISTORICAL_12_MONTHS
+    assert batch.periods_used[i] == 10  # 300 and 90 are outside +/- 20% of the mean
+
+    (method, batch, i), = baseline_stats_service.evaluate([stats], normal, normal, BaselineMethod.STATIC)
+    assert method == BaselineMethod.STATIC
+    assert batch.adjusted_kwh[i] == pytest.approx(np.mean(kwh))
+
+    (_, batch, i), = baseline_stats_service.evaluate([stats], normal, normal, threshold_pct=5.0)
+    assert batch.periods_used[i] == 12
+    assert stats.method == BaselineMethod.HISTORICAL_12_MONTHS.value
+    assert stats.threshold_pct == baseline_engine.OUTLIER_THRESHOLD_PCT
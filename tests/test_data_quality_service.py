@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.schemas.data_quality import DataQualityStatus
+from app.services import data_quality_service
+
+
+@pytest.mark.parametrize("pct, status", [
+    (0.0, DataQualityStatus.OK),
+    (0.1, DataQualityStatus.INTERPOLATED),
+    (5.0, DataQualityStatus.INTERPOLATED),
+    (5.01, DataQualityStatus.FLAGGED),
+    (20.0, DataQualityStatus.FLAGGED),
+    (20.01, DataQualityStatus.REJECTED),
+    (100.0, DataQualityStatus.REJECTED),
+])
+def test_classify_boundaries(pct, status):
+    assert data_quality_service.classify(np.array([pct])) == [status]
+
+
+def test_interpolate_gaps_matches_np_interp():
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 10, (5, 48))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[1, :6] = np.nan    # leading gap
+    values[2, -6:] = np.nan   # trailing gap
+    values[3] = np.nan        # no readings at all
+    filled = data_quality_service.interpolate_gaps(values)
+    positions = np.arange(values.shape[1])
+    for row in (0, 1, 2, 4):
+        valid = np.isfinite(values[row])
+        expected = np.interp(positions, positions[valid], values[row, valid])
+        assert filled[row] == pytest.approx(expected)
+    assert np.isnan(filled[3]).all()
+
+
+def test_interpolate_gaps_keeps_readings():
+    values = np.array([[1.0, np.nan, np.nan, 4.0, 5.0]])
+    np.testing.assert_array_equal(data_quality_service.interpolate_gaps(values), [[1.0, 2.0, 3.0, 4.0, 5.0]])
+
+
+def test_longest_gaps():
+    nan = np.nan
+    values = np.array([
+        [1.0, 2.0, 3.0, 4.0],
+        [nan, nan, 1.0, nan],
+        [1.0, nan, nan, nan],
+        [nan, nan, nan, nan],
+        [1.0, nan, 2.0, nan],
+    ])
+    assert data_quality_service.longest_gaps(values).tolist() == [0, 2, 3, 4, 1]
+    assert data_quality_service.longest_gaps(np.empty((2, 0))).tolist() == [0, 0]
+
+
+def test_complete_months_skips_the_current_month():
+    now = datetime(2026, 3, 15, tzinfo=timezone.utc)
+    pairs = [("b", "2026-01"), ("b", "2026-02"), ("b", "2026-03"), ("b", "2026-02")]
+    assert data_quality_service.complete_months(pairs, now) == [("b", "2026-01"), ("b", "2026-02")]
+
+
+@pytest.mark.parametrize("status, expected", [
+    (DataQualityStatus.OK, 100.0),
+    (DataQualityStatus.INTERPOLATED, 104.0),
+    (DataQualityStatus.FLAGGED, 104.0),
+])
+def test_adjusted_kwh(status, expected):
+    assert data_quality_service.adjusted_kwh(100.0, (status, 104.0)) == expected
+
+
+def test_adjusted_kwh_drops_rejected_months():
+    assert np.isnan(data_quality_service.adjusted_kwh(100.0, (DataQualityStatus.REJECTED, 140.0)))
+    assert data_quality_service.adjusted_kwh(100.0, None) == 100.0
@@ -0,0 +1,60 @@
+import base64
+from datetime import datetime, timedelta, timezone
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.main import app
+from app.services import meter_service
+
+
+def _encode(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("time", [
+    datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc),
+    datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone(timedelta(hours=2))),
+])
+def test_cursor_round_trip(time):
+    assert meter_service.decode_cursor(meter_service.encode_cursor(time)) == time
+
+
+def test_cursor_without_offset_is_taken_as_utc():
+    decoded = meter_service.decode_cursor(_encode("2026-03-01T12:30:00"))
+    assert decoded == datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    "%%%%",
+    "é",
+    _encode("not a time"),
+    _encode("2026-13-45T99:00:00"),
+    base64.urlsafe_b64encode(b"\xff\xfe\x00").decode(),
+    meter_service.encode_cursor(datetime(2026, 3, 1, tzinfo=timezone.utc))[:-3],
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        meter_service.decode_cursor(cursor)
+
+
+@pytest.fixture
+def client():
+    # The cursor is decoded before the database is touched, so no session is needed.
+    app.dependency_overrides[deps.get_db] = lambda: None
+    app.dependency_overrides[deps.get_current_user] = lambda: None
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", _encode("not a time"), "é"])
+def test_readings_with_tampered_cursor_return_400(client, cursor):
+    response = client.get(f"/api/v1/meters/{uuid.uuid4()}", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
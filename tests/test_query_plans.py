@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.database import build_session_factory
+from app.services import (
+    building_service, carbon_service, emission_factor_service, meter_service,
+    mrv_service, rollup_service, user_service,
+)
+from app.services.baseline_service import BaselineService
+
+# Query-plan regression check: runs every read query of the services against a live
+# TimescaleDB, EXPLAINs each statement they issue (with sequential scans disabled, so the
+# planner picks an index whenever one can serve the query) and asserts that the indexes
+# we rely on are used. Needs the migrations applied and at least one hypertable chunk:
+#   python -m scripts.seed_meter_readings
+#   QUERY_PLAN_DATABASE_URL=postgresql+asyncpg://... pytest tests/test_query_plans.py
+# (or python -m scripts.verify_query_plans, which uses DATABASE_URL).
+#
+# Index names are matched as substrings: TimescaleDB prefixes chunk indexes with the
+# chunk name (e.g. _hyper_1_3_chunk_ix_meter_readings_building_id_time).
+
+DSN = os.environ.get("QUERY_PLAN_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DSN, reason="QUERY_PLAN_DATABASE_URL (TimescaleDB) is not set")
+
+ANY_ID = uuid.UUID(int=0)
+PERIOD_START = datetime(2025, 1, 15, 6, 30, tzinfo=timezone.utc)
+PERIOD_END = datetime(2025, 3, 2, 17, 45, tzinfo=timezone.utc)
+
+
+async def drain(stream):
+    return [item async for item in stream]
+
+
+# (name, service call, indexes that must appear in the plans of its statements)
+CASES = [
+    ("mrv_service.get_baseline",
+     lambda db: mrv_service.get_baseline(db, ANY_ID, "2025-01"),
+     ["ix_baseline_history_building_id_period_created_at"]),
+    ("BaselineService.get_baselines",
+     lambda db: BaselineService(db).get_baselines(ANY_ID),
+     ["ix_baseline_history_building_id_period_created_at"]),
+    ("emission_factor_service.get_emission_factor",
+     lambda db: emission_factor_service.get_emission_factor(db, ANY_ID),
+     ["emission_factors_pkey"]),
+    ("emission_factor_service.get_emission_factor_by_region_year",
+     lambda db: emission_factor_service.get_emission_factor_by_region_year(db, "US-CA", 2025),
+     ["ix_emission_factors_region_id_year"]),
+    ("emission_factor_service.get_emission_factor_by_region_valid_from",
+     lambda db: emission_factor_service.get_emission_factor_by_region_valid_from(db, "US-CA", PERIOD_START),
+     ["ix_emission_factors_region_id_valid_from"]),
+    ("building_service.get_building",
+     lambda db: building_service.get_building(db, ANY_ID),
+     ["buildings_pkey"]),
+    ("building_service.get_user_buildings",
+     lambda db: building_service.get_user_buildings(db, ANY_ID),
+     ["ix_buildings_user_id"]),
+    ("user_service.get_user_by_email",
+     lambda db: user_service.get_user_by_email(db, "nobody@example.com"),
+     ["ix_users_email"]),
+    ("meter_service.get_meter_readings",
+     lambda db: meter_service.get_meter_readings(db, str(ANY_ID)),
+     ["ix_meter_readings_building_id_time"]),
+    ("rollup_service.get_monthly_consumption",
+     lambda db: rollup_service.get_monthly_consumption(db, ANY_ID),
+     ["ix_meter_readings_monthly_building_id_bucket"]),
+    ("rollup_service.get_consumption_kwh",
+     lambda db: rollup_service.get_consumption_kwh(db, ANY_ID, PERIOD_START, PERIOD_END),
+     ["ix_meter_readings_monthly_building_id_bucket", "ix_meter_readings_daily_building_id_bucket",
+      "ix_meter_readings_hourly_building_id_bucket", "ix_meter_readings_building_id_time"]),
+    # emission_intensity is not required: it has no chunks until a series is loaded.
+    ("carbon_service.get_emissions",
+     lambda db: carbon_service.get_emissions(db, ANY_ID, PERIOD_START, PERIOD_END),
+     ["ix_meter_readings_hourly_building_id_bucket", "ix_emission_factors_region_id_valid_from",
+      "buildings_pkey"]),
+    ("mrv_service.stream_portfolio_savings",
+     lambda db: drain(mrv_service.stream_portfolio_savings(db, ANY_ID, PERIOD_START, PERIOD_END)),
+     ["ix_buildings_user_id", "ix_baseline_history_building_id_period_created_at"]),
+]
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def explain(db, statement, parameters):
+    conn = await db.connection()
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    plan = result.scalar_one()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return list(plan_nodes(plan[0]["Plan"]))
+
+
+async def query_plans(call):
+    """
+    Run a service call and EXPLAIN the SELECTs it issued.
+    Returns (statements, index names used, relations scanned sequentially).
+    """
+    engine = create_async_engine(DSN, poolclass=NullPool)
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    try:
+        async with build_session_factory(engine)() as db:
+            conn = await db.connection()
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+            event.listen(engine.sync_engine, "before_cursor_execute", capture)
+            try:
+                await call(db)
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+            used, seq_scans = set(), set()
+            for statement, parameters in captured:
+                for node in await explain(db, statement, parameters):
+                    if "Index Name" in node:
+                        used.add(node["Index Name"])
+                    if node.get("Node Type") == "Seq Scan":
+                        seq_scans.add(node.get("Relation Name"))
+            await db.rollback()
+    finally:
+        await engine.dispose()
+    return captured, used, seq_scans
+
+
+@pytest.mark.parametrize("name, call, expected", CASES, ids=[case[0] for case in CASES])
+def test_service_queries_use_indexes(name, call, expected):
+    statements, used, seq_scans = asyncio.run(query_plans(call))
+    assert statements, f"{name} issued no SELECT"
+    missing = [index for index in expected if not any(index in name_used for name_used in used)]
+    assert not missing, (
+        f"missing: {', '.join(missing)}; indexes used: {', '.join(sorted(used)) or '-'}; "
+        f"seq scans: {', '.join(sorted(seq_scans)) or '-'}"
+    )
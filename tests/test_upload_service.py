@@ -0,0 +1,110 @@
+import asyncio
+import gzip
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.services import upload_service
+from app.services.upload_service import UploadTooLargeError, _UploadSink
+
+LIMIT = 64 * 1024
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_BYTES", 8 * 1024)
+
+
+def _feed(sink, payload, chunk=4096):
+    for i in range(0, len(payload), chunk):
+        sink.write(payload[i:i + chunk])
+    return sink.finish()
+
+
+def _leftovers(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".part")]
+
+
+def test_plain_upload_is_hashed(tmp_path):
+    payload = b"time,value_kwh\n" * 1000
+    sink = _UploadSink(str(tmp_path), LIMIT)
+    assert _feed(sink, payload) == hashlib.sha256(payload).hexdigest()
+    assert sink.size == len(payload)
+    with open(sink.tmp_path, "rb") as f:
+        assert f.read() == payload
+
+
+def test_plain_upload_over_the_limit(tmp_path):
+    sink = _UploadSink(str(tmp_path), LIMIT)
+    with pytest.raises(UploadTooLargeError):
+        _feed(sink, b"x" * (LIMIT + 1))
+    sink.discard()
+    assert _leftovers(tmp_path) == []
+
+
+def test_gzip_upload_is_decompressed(tmp_path, small_chunks):
+    payload = b"2026-01-01T00:00:00Z,1.5\n" * 2000
+    sink = _UploadSink(str(tmp_path), LIMIT)
+    assert _feed(sink, gzip.compress(payload)) == hashlib.sha256(payload).hexdigest()
+    assert sink.compression == "gzip" and sink.size == len(payload)
+
+
+def test_limit_applies_to_decompressed_bytes(tmp_path, small_chunks):
+    compressed = gzip.compress(b"a" * (LIMIT + 1))
+    assert len(compressed) < LIMIT
+    sink = _UploadSink(str(tmp_path), LIMIT)
+    with pytest.raises(UploadTooLargeError):
+        _feed(sink, compressed)
+
+
+def test_gzip_bomb_stops_at_the_limit(tmp_path, small_chunks):
+    # ~1 KB that inflates to 64 MB, sent as a single chunk.
+    bomb = gzip.compress(b"\0" * (64 << 20), compresslevel=9)
+    sink = _UploadSink(str(tmp_path), LIMIT)
+    with pytest.raises(UploadTooLargeError):
+        sink.write(bomb)
+    # Decompression stopped within one step of the limit.
+    assert sink.size <= LIMIT + settings.UPLOAD_CHUNK_BYTES
+    assert os.path.getsize(sink.tmp_path) <= LIMIT
+    sink.discard()
+    assert _leftovers(tmp_path) == []
+
+
+def test_truncated_gzip_is_rejected(tmp_path):
+    compressed = gzip.compress(b"time,value_kwh\n" * 1000)
+    sink = _UploadSink(str(tmp_path), LIMIT)
+    with pytest.raises(ValueError, match="Truncated"):
+        _feed(sink, compressed[: len(compressed) // 2])
+
+
+def test_zstd_bomb_stops_at_the_limit(tmp_path, small_chunks):
+    zstandard = pytest.importorskip("zstandard")
+    bomb = zstandard.ZstdCompressor().compress(b"\0" * (64 << 20))
+    sink = _UploadSink(str(tmp_path), LIMIT)
+    with pytest.raises(UploadTooLargeError):
+        sink.write(bomb)
+    assert sink.size <= LIMIT + settings.UPLOAD_CHUNK_BYTES
+    sink.discard()
+
+
+def test_zstd_upload_is_decompressed(tmp_path, small_chunks):
+    zstandard = pytest.importorskip("zstandard")
+    payload = b"2026-01-01T00:00:00Z,1.5\n" * 2000
+    sink = _UploadSink(str(tmp_path), LIMIT)
+    assert _feed(sink, zstandard.ZstdCompressor().compress(payload)) == hashlib.sha256(payload).hexdigest()
+
+
+def test_save_upload_rejects_oversized_files_without_storing(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_STORE", "local")
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(settings, "UPLOAD_SPOOL_DIR", str(tmp_path / "spool"))
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", LIMIT)
+    upload = UploadFile(io.BytesIO(gzip.compress(b"\0" * (8 << 20))), filename="readings.csv.gz")
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(upload_service.save_upload(upload, "building"))
+    assert _leftovers(tmp_path / "spool") == []
+    assert not (tmp_path / "store").exists()